@@ -0,0 +1,74 @@
+"""
+Benchmark : passage exact de SearchEngine.search en fonction de la taille du corpus.
+
+Vérifie que le coût par commande reste constant de 10k à 1M commandes
+(scan linéaire, plus de commands.index() quadratique). La requête large
+('git') s'arrête dès que la limite est atteinte ; la requête absente
+parcourt tout le corpus (scan exact + passe floue).
+
+Usage : python benchmarks/bench_search_scaling.py [--sizes 10000,100000,1000000]
+"""
+
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from rapidstory.search import SearchEngine  # noqa: E402
+
+VERBS = ["git", "docker", "kubectl", "ls", "cd", "grep", "make", "ssh", "vim", "cat"]
+ARGS = [
+    "status",
+    "log",
+    "ps",
+    "-la",
+    "run",
+    "apply -f",
+    "build",
+    "push",
+    "pull",
+    "logs",
+]
+
+
+def generate_commands(count: int, seed: int = 42) -> list:
+    """Génère `count` commandes uniques (≈10 % commencent par 'git')."""
+    rng = random.Random(seed)
+    return [f"{rng.choice(VERBS)} {rng.choice(ARGS)} target-{i}" for i in range(count)]
+
+
+def bench(size: int, query: str, repeats: int = 3) -> float:
+    """Retourne le meilleur temps (secondes) d'une recherche sur `size` commandes."""
+    commands = generate_commands(size)
+    engine = SearchEngine()
+    engine.search(query, commands, 20, generation=0)  # Prétraitement du corpus
+
+    best = float("inf")
+    for _ in range(repeats):
+        start = time.perf_counter()
+        engine.search(query, commands, 20, generation=0)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main() -> None:
+    sizes = [10_000, 100_000, 1_000_000]
+    if "--sizes" in sys.argv:
+        sizes = [int(s) for s in sys.argv[sys.argv.index("--sizes") + 1].split(",")]
+
+    print(
+        f"{'requête':>10}  {'commandes':>10}  {'temps (ms)':>10}  {'ns/commande':>12}"
+    )
+    for query in ("git", "zz-absent"):
+        for size in sizes:
+            elapsed = bench(size, query)
+            print(
+                f"{query:>10}  {size:>10}  {elapsed * 1000:>10.1f}"
+                f"  {elapsed / size * 1e9:>12.1f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,339 @@
+"""
+Contrôles de non-régression sur des cas limites (relevés en revue).
+
+Chaque check_* lève AssertionError en cas d'échec. Le script exécute
+tous les contrôles, affiche un résumé et sort avec le code 1 si l'un
+d'eux échoue.
+
+Usage :
+  python benchmarks/check_regressions.py
+"""
+
+import json
+import os
+import socket
+import sys
+import tempfile
+import threading
+from typing import Callable, List
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+SRC_DIR = os.path.abspath(os.path.join(BENCH_DIR, "..", "src"))
+sys.path.insert(0, SRC_DIR)
+
+CHECKS: List[Callable[[], None]] = []
+
+
+def check(fn: Callable[[], None]) -> Callable[[], None]:
+    """Enregistre un contrôle."""
+    CHECKS.append(fn)
+    return fn
+
+
+class _StubService:
+    """Service minimal pour le démon (aucune base, aucun moteur)."""
+
+    def create_session(self):
+        return None
+
+    def search(self, query, limit, session=None, scope=None):
+        return [f"{query}:{scope}"]
+
+    def close(self):
+        pass
+
+
+@check
+def check_daemon_malformed_scope() -> None:
+    """Portée mal formée : erreur JSON, la connexion reste utilisable."""
+    from rapidstory.daemon import SearchServer
+
+    with tempfile.TemporaryDirectory() as workdir:
+        server = SearchServer(os.path.join(workdir, "rs.sock"), _StubService())
+        thread = threading.Thread(target=server.serve_forever, daemon=True)
+        thread.start()
+        try:
+            with socket.socket(socket.AF_UNIX) as sock:
+                sock.connect(server.socket_path)
+                stream = sock.makefile("rwb")
+                for scope in (["dir"], "dir", ["exact", "/tmp", "x"]):
+                    request = {"op": "search", "query": "a", "limit": 5, "scope": scope}
+                    stream.write(json.dumps(request).encode() + b"\n")
+                    stream.flush()
+                    response = json.loads(stream.readline())
+                    assert response["ok"] is False, response
+                request = {
+                    "op": "search",
+                    "query": "a",
+                    "limit": 5,
+                    "scope": ["exact", "/"],
+                }
+                stream.write(json.dumps(request).encode() + b"\n")
+                stream.flush()
+                response = json.loads(stream.readline())
+                assert response == {
+                    "ok": True,
+                    "results": ["a:('exact', '/')"],
+                }, response
+        finally:
+            server.shutdown()
+            server.server_close()
+
+
+@check
+def check_ingest_rewritten_in_place() -> None:
+    """Historique réécrit sur place (même inode, plus long) : relu en entier."""
+    from rapidstory.database import HistoryManager
+
+    with tempfile.TemporaryDirectory() as workdir:
+        history_path = os.path.join(workdir, "bash_history")
+        with open(history_path, "w") as f:
+            f.write("echo first\n")
+        manager = HistoryManager(os.path.join(workdir, "rs.db"), history_path, 100, 1)
+        try:
+            manager.load_from_file()
+            # Tronqué puis réécrit (même inode) au-delà de l'offset persisté
+            with open(history_path, "r+") as f:
+                f.truncate(0)
+                f.write("git status --short\nmake test\n")
+            manager.load_from_file()
+            known = set(manager.db.search_commands("git", 10))
+            assert "git status --short" in known, known
+        finally:
+            manager.db.close()
+
+
+@check
+def check_trigram_index_follows_sqlite() -> None:
+    """Base ouverte sans puis avec tokenizer trigram : index recréé et complet."""
+    from rapidstory import database
+
+    if not database.TRIGRAM_AVAILABLE:
+        return
+    with tempfile.TemporaryDirectory() as workdir:
+        db_path = os.path.join(workdir, "rs.db")
+        database.DatabaseRepository(db_path).close()
+        database.TRIGRAM_AVAILABLE = False
+        try:
+            db = database.DatabaseRepository(db_path)
+            assert not db.has_trigram
+            # Triggers supprimés : l'insertion ne dépend plus du tokenizer
+            assert db.insert_entries([("docker compose up", 1.0)], True) == 1
+            db.close()
+        finally:
+            database.TRIGRAM_AVAILABLE = True
+        db = database.DatabaseRepository(db_path)
+        try:
+            assert db.has_trigram
+            found = db.search_substring("ompose", 10)
+            assert found == ["docker compose up"], found
+        finally:
+            db.close()
+
+
+@check
+def check_recorder_late_write_kept() -> None:
+    """Écriture dans le spool déjà pris par drain : relue au vidage suivant."""
+    from rapidstory.recorder import CommandRecorder
+
+    with tempfile.TemporaryDirectory() as workdir:
+        recorder = CommandRecorder(os.path.join(workdir, "record.spool"))
+        recorder.append({"command": "make"})
+        # Shell ayant ouvert le spool juste avant le renommage de drain
+        fd = os.open(recorder.spool_path, os.O_WRONLY | os.O_APPEND)
+        try:
+            assert [r["command"] for r in recorder.drain()] == ["make"]
+            os.write(fd, b'{"command": "make test"}\n')
+        finally:
+            os.close(fd)
+        recorder.append({"command": "ls"})
+        drained = sorted(r["command"] for r in recorder.drain())
+        assert drained == ["ls", "make test"], drained
+        assert recorder.drain() == []
+        assert os.listdir(workdir) == [], os.listdir(workdir)
+
+
+@check
+def check_scope_keeps_every_directory() -> None:
+    """Commande lancée dans deux dossiers : présente dans les deux portées."""
+    from rapidstory.database import HistoryManager
+
+    with tempfile.TemporaryDirectory() as workdir:
+        history_path = os.path.join(workdir, "bash_history")
+        manager = HistoryManager(os.path.join(workdir, "rs.db"), history_path, 2, 1)
+        try:
+            manager.db.insert_records(
+                [
+                    {"command": "make", "timestamp": 1.0, "cwd": "/src/a"},
+                    {"command": "make", "timestamp": 2.0, "cwd": "/src/b"},
+                    {"command": "ls", "timestamp": 3.0, "cwd": "/src/a"},
+                    {"command": "pwd", "timestamp": 4.0, "cwd": "/src/a/sub"},
+                ]
+            )
+            for scope in (("exact", "/src/a"), ("exact", "/src/b"), ("prefix", "/src")):
+                _, commands = manager.get_scoped_corpus(scope, limit=10)
+                assert "make" in commands, (scope, commands)
+            # Limite par défaut : load_limit du corpus global
+            _, commands = manager.get_scoped_corpus(("prefix", "/src"))
+            assert commands == ["pwd", "ls"], commands
+        finally:
+            manager.db.close()
+
+
+@check
+def check_multiline_command_single_row() -> None:
+    """Commande multi-ligne (heredoc importé) : une rangée par résultat."""
+    from rapidstory.ui.ui_full_mode import FullModeDisplay
+    from rapidstory.ui.ui_inline_mode import InlineModeDisplay
+    from rapidstory.utils import ConfigLoader
+
+    heredoc = "cat <<EOF > notes.txt\nligne 1\r\nligne 2\nEOF"
+    results = [heredoc, "ls -la"]
+    config = ConfigLoader().defaults
+    full = FullModeDisplay(200, config)._build_display("cat", results, 1)
+    inline = InlineModeDisplay(5, config)._build_display("cat", heredoc, results[1:])
+    for rows in (full, inline):
+        texts = [text for row in rows for _, text in row]
+        assert not any("\n" in text or "\r" in text for text in texts), texts
+        assert any("notes.txt⏎ligne 1⏎" in text for text in texts), texts
+
+
+@check
+def check_older_record_keeps_metadata() -> None:
+    """Enregistrement plus ancien : métadonnées de la dernière exécution gardées."""
+    from rapidstory.database import DatabaseRepository
+
+    with tempfile.TemporaryDirectory() as workdir:
+        db = DatabaseRepository(os.path.join(workdir, "rs.db"))
+        try:
+            db.insert_records(
+                [
+                    {
+                        "command": "make",
+                        "timestamp": 20.0,
+                        "cwd": "/new",
+                        "exit_status": 0,
+                    },
+                    {
+                        "command": "make",
+                        "timestamp": 10.0,
+                        "cwd": "/old",
+                        "exit_status": 2,
+                    },
+                    {
+                        "command": "make",
+                        "timestamp": 30.0,
+                        "cwd": None,
+                        "hostname": "h",
+                    },
+                ]
+            )
+            row = db._conn.execute(
+                "SELECT cwd, exit_status, hostname FROM history WHERE command = 'make'"
+            ).fetchone()
+            assert row == ("/new", None, "h"), row
+        finally:
+            db.close()
+
+
+@check
+def check_background_compaction_survives_lock() -> None:
+    """Base verrouillée pendant le compactage d'arrière-plan : pas d'exception."""
+    import sqlite3
+
+    from rapidstory.database import DatabaseRepository
+    from rapidstory.maintenance import RetentionPolicy, compact_in_background
+
+    def locked() -> None:
+        raise sqlite3.OperationalError("database is locked")
+
+    with tempfile.TemporaryDirectory() as workdir:
+        db = DatabaseRepository(os.path.join(workdir, "rs.db"))
+        try:
+            db.merge_index = locked
+            assert compact_in_background(db, RetentionPolicy()) is None
+            del db.merge_index
+            report = compact_in_background(db, RetentionPolicy())
+            assert report is not None and report["removed"] == 0, report
+        finally:
+            db.close()
+
+
+@check
+def check_substring_search_follows_ranking() -> None:
+    """Recherche SQL de sous-chaîne : même ordre que SEARCH_RANKING."""
+    from rapidstory import database
+
+    if not database.TRIGRAM_AVAILABLE:
+        return
+    with tempfile.TemporaryDirectory() as workdir:
+        db = database.DatabaseRepository(os.path.join(workdir, "rs.db"))
+        try:
+            # "git status" : souvent lancée, mais il y a longtemps
+            db.insert_entries([("git status", 1.0)] * 50 + [("git stash", 2.0)], True)
+            assert db.search_substring("git st", 5) == ["git status", "git stash"]
+            found = db.search_substring("git st", 5, by_frecency=False)
+            assert found == ["git stash", "git status"], found
+        finally:
+            db.close()
+
+
+@check
+def check_rerun_command_moves_up() -> None:
+    """Commande relancée vue par le watcher : remonte en tête du corpus."""
+    from rapidstory.database import HistoryManager
+
+    for ranking in ("recency", "frecency"):
+        with tempfile.TemporaryDirectory() as workdir:
+            history_path = os.path.join(workdir, "bash_history")
+            with open(history_path, "w") as f:
+                f.write("git status\nls\n")
+            manager = HistoryManager(
+                os.path.join(workdir, "rs.db"), history_path, 100, 1, ranking
+            )
+            try:
+                manager.load_from_file()
+                assert list(manager.get_corpus()[1])[0] == "ls"
+                with open(history_path, "a") as f:
+                    f.write("git status\n" * 3)
+                manager._on_history_changed()
+                corpus = list(manager.get_corpus()[1])
+                assert corpus[0] == "git status", (ranking, corpus)
+            finally:
+                manager.db.close()
+
+
+@check
+def check_import_dates_from_file_mtime() -> None:
+    """Import sans horodatage : dates ancrées sur la mtime du fichier."""
+    from rapidstory.importers import parse_bash, parse_zsh
+
+    with tempfile.TemporaryDirectory() as workdir:
+        for name, parser, text in (
+            ("bash_history", parse_bash, "make\nls\n"),
+            ("zsh_history", parse_zsh, "make\ncat <<EOF\\\nx\\\n"),
+        ):
+            path = os.path.join(workdir, name)
+            with open(path, "w") as f:
+                f.write(text)
+            os.utime(path, (1_000_000.0, 1_000_000.0))
+            stamps = [entry["timestamp"] for entry in parser(path)]
+            assert len(stamps) == 2 and stamps == sorted(stamps), (name, stamps)
+            assert all(999_999.0 < t <= 1_000_000.0 for t in stamps), (name, stamps)
+
+
+def main() -> None:
+    failures = 0
+    for fn in CHECKS:
+        try:
+            fn()
+            print(f"OK     {fn.__name__}")
+        except Exception as e:  # Un contrôle en échec n'arrête pas les autres
+            failures += 1
+            print(f"ÉCHEC  {fn.__name__} : {e!r}")
+    print(f"{len(CHECKS) - failures}/{len(CHECKS)} contrôles réussis.")
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+"""
+Vérifie que l'ensemble des modules importés au démarrage ne grossit pas.
+
+Chemin contrôlé : `rapidstory` / `rapidstory --inline` jusqu'à la
+connexion au démon (rapidstory.main + modes TTY). rapidfuzz, sqlite3,
+logging... ne doivent être chargés qu'à la première utilisation.
+
+La liste de référence est benchmarks/startup_imports.txt (un module par
+ligne : modules rapidstory complets, paquets tiers/stdlib au premier
+niveau). Un module absent de la liste fait échouer le contrôle (code 1).
+
+Usage :
+  python benchmarks/check_startup_imports.py           # contrôle
+  python benchmarks/check_startup_imports.py --update  # régénère la liste
+"""
+
+import json
+import os
+import subprocess
+import sys
+from typing import Set
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+SRC_DIR = os.path.abspath(os.path.join(BENCH_DIR, "..", "src"))
+ALLOWLIST = os.path.join(BENCH_DIR, "startup_imports.txt")
+
+PROBE = """
+import sys
+sys.path.insert(0, {src!r})
+before = set(sys.modules)
+import rapidstory.main, rapidstory.rapidstory_full, rapidstory.rapidstory_inline
+loaded = sorted(set(sys.modules) - before)
+import json
+print(json.dumps(loaded))
+"""
+
+
+def startup_imports() -> Set[str]:
+    """Modules chargés par le démarrage, dans un interpréteur neuf."""
+    output = subprocess.run(
+        [sys.executable, "-c", PROBE.format(src=SRC_DIR)],
+        check=True,
+        capture_output=True,
+        text=True,
+    ).stdout
+    return {
+        name if name.startswith("rapidstory") else name.split(".")[0]
+        for name in json.loads(output)
+    }
+
+
+def main() -> None:
+    current = startup_imports()
+
+    if "--update" in sys.argv:
+        with open(ALLOWLIST, "w") as f:
+            f.write("\n".join(sorted(current)) + "\n")
+        print(f"{len(current)} modules enregistrés dans {ALLOWLIST}")
+        return
+
+    with open(ALLOWLIST) as f:
+        allowed = {line.strip() for line in f if line.strip()}
+
+    added = sorted(current - allowed)
+    removed = sorted(allowed - current)
+    if removed:
+        print(f"Plus importés au démarrage (--update pour les retirer) : {removed}")
+    if added:
+        print(f"Nouveaux imports au démarrage : {added}")
+        print("Différez-les (import local) ou lancez --update si c'est voulu.")
+        sys.exit(1)
+    print(f"OK : {len(current)} modules au démarrage.")
+
+
+if __name__ == "__main__":
+    main()
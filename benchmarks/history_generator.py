@@ -0,0 +1,176 @@
+"""
+Générateur d'historiques bash synthétiques pour les benchmarks.
+
+Distribution de Zipf sur un vocabulaire de commandes (quelques commandes
+très fréquentes, une longue traîne de commandes uniques), avec des
+pipelines longs et des heredocs (plusieurs lignes dans ~/.bash_history,
+comme bash les écrit sans `shopt -s lithist`).
+
+Usage : python benchmarks/history_generator.py --lines 100000 -o /tmp/bash_history
+"""
+
+import argparse
+import bisect
+import itertools
+import random
+from typing import Iterator, List
+
+VERBS = [
+    "git",
+    "ls",
+    "cd",
+    "docker",
+    "kubectl",
+    "make",
+    "grep",
+    "vim",
+    "ssh",
+    "cat",
+    "python",
+    "npm",
+    "cargo",
+    "curl",
+    "find",
+    "rg",
+    "sed",
+    "awk",
+    "tar",
+    "systemctl",
+]
+SUBCOMMANDS = {
+    "git": [
+        "status",
+        "log --oneline",
+        "diff",
+        "commit -m",
+        "push",
+        "pull --rebase",
+        "checkout -b",
+        "rebase -i HEAD~3",
+        "stash pop",
+        "fetch --all",
+    ],
+    "docker": ["ps -a", "compose up -d", "logs -f", "build -t", "exec -it", "run --rm"],
+    "kubectl": [
+        "get pods -n",
+        "describe pod",
+        "logs -f",
+        "apply -f",
+        "rollout restart deploy",
+    ],
+    "make": ["", "test", "build", "clean", "install", "lint"],
+    "systemctl": ["status", "restart", "--user restart", "list-units --failed"],
+}
+WORDS = [
+    "api",
+    "web",
+    "worker",
+    "db",
+    "cache",
+    "auth",
+    "billing",
+    "search",
+    "infra",
+    "docs",
+    "frontend",
+    "backend",
+    "staging",
+    "prod",
+    "release",
+    "hotfix",
+    "config",
+    "deploy",
+]
+PIPE_STAGES = [
+    "grep -v '^#'",
+    "sort",
+    "uniq -c",
+    "sort -rn",
+    "head -20",
+    "awk '{print $1}'",
+    "xargs -n1",
+    "sed 's/foo/bar/g'",
+    "tr -d '\\r'",
+    "wc -l",
+    "cut -d: -f1",
+    "jq .",
+]
+
+# Proportions de formes de commande (cumulées)
+PIPELINE_RATE = 0.08
+HEREDOC_RATE = 0.01
+
+
+class HistoryGenerator:
+    """
+    Génère des lignes d'historique reproductibles (graine fixe).
+
+    Le vocabulaire compte autant d'entrées que de lignes demandées ; la
+    fréquence de la k-ième commande suit 1/k^s (Zipf).
+    """
+
+    def __init__(self, lines: int, seed: int = 42, zipf_s: float = 1.1):
+        self.lines = lines
+        self.rng = random.Random(seed)
+        self.vocabulary = [self._simple_command(i) for i in range(max(lines // 4, 100))]
+        weights = [1.0 / (rank + 1) ** zipf_s for rank in range(len(self.vocabulary))]
+        self._cumulative = list(itertools.accumulate(weights))
+
+    def _simple_command(self, index: int) -> str:
+        """Commande simple unique (verbe + arguments + suffixe discriminant)."""
+        verb = self.rng.choice(VERBS)
+        sub = self.rng.choice(SUBCOMMANDS.get(verb, [""]))
+        words = " ".join(self.rng.sample(WORDS, self.rng.randint(0, 3)))
+        return " ".join(part for part in (verb, sub, words, f"#{index}") if part)
+
+    def _zipf_command(self) -> str:
+        """Tire une commande du vocabulaire selon Zipf."""
+        point = self.rng.random() * self._cumulative[-1]
+        return self.vocabulary[bisect.bisect_left(self._cumulative, point)]
+
+    def _pipeline(self) -> str:
+        """Pipeline long (3 à 8 étages)."""
+        stages = self.rng.sample(PIPE_STAGES, self.rng.randint(3, 8))
+        return " | ".join([self._zipf_command()] + stages)
+
+    def _heredoc(self) -> List[str]:
+        """Heredoc : une ligne par ligne du document."""
+        body = [
+            f"{self.rng.choice(WORDS)}: {self.rng.randint(0, 9999)}"
+            for _ in range(self.rng.randint(2, 10))
+        ]
+        return [f"cat <<'EOF' > {self.rng.choice(WORDS)}.yaml", *body, "EOF"]
+
+    def generate(self) -> Iterator[str]:
+        """Produit exactement `lines` lignes d'historique."""
+        produced = 0
+        while produced < self.lines:
+            roll = self.rng.random()
+            if roll < HEREDOC_RATE:
+                block = self._heredoc()
+            elif roll < HEREDOC_RATE + PIPELINE_RATE:
+                block = [self._pipeline()]
+            else:
+                block = [self._zipf_command()]
+            for line in block[: self.lines - produced]:
+                yield line
+                produced += 1
+
+    def write(self, path: str) -> None:
+        """Écrit l'historique dans `path`."""
+        with open(path, "w", encoding="utf-8") as f:
+            for line in self.generate():
+                f.write(line + "\n")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--lines", type=int, default=100_000)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("-o", "--output", required=True)
+    args = parser.parse_args()
+    HistoryGenerator(args.lines, args.seed).write(args.output)
+
+
+if __name__ == "__main__":
+    main()
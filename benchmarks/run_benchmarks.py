@@ -0,0 +1,267 @@
+"""
+Suite de benchmarks RapidStory sur historiques synthétiques (Zipf).
+
+Pour chaque taille (10k, 100k, 1M lignes par défaut), dans un processus
+séparé (RSS de pointe propre à la taille) :
+
+  cache_load_ms          HistoryCache._load (lecture de la fin du fichier)
+  snapshot_load_ms       HistoryCache._load depuis l'instantané mmap à jour,
+                         puis décodage des 20 premières commandes
+  ingest_cold_ms         HistoryManager.load_from_file, base vide
+  ingest_warm_ms         HistoryManager.load_from_file, rien de nouveau
+  insert_batch_ms        DatabaseRepository.insert_commands_batch (tout le fichier)
+  sql_search_p50/p99_ms  DatabaseRepository.search_commands
+  keystroke_p50/p99_ms   SearchEngine.search à chaque frappe (requêtes tapées
+                         caractère par caractère, corpus complet)
+  peak_rss_mb            RSS de pointe du processus de mesure
+  startup_cold_ms        Processus neuf jusqu'aux premiers résultats, base vide
+  startup_warm_ms        Idem, base déjà remplie (seule la fin du fichier est lue)
+
+Le cache de pages de l'OS n'est pas vidé : "cold" désigne le premier
+lancement (base à construire), pas un disque froid.
+
+Usage :
+  python benchmarks/run_benchmarks.py [--sizes 10000,100000] [--output run.json]
+  python benchmarks/run_benchmarks.py --baseline base.json --threshold 0.2
+
+Avec --baseline, toute métrique plus lente que baseline × (1 + threshold)
+(et d'au moins --min-delta, pour ignorer le bruit des mesures sub-ms)
+est signalée et le code de sortie vaut 1.
+"""
+
+import argparse
+import json
+import os
+import platform
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Dict, List
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+SRC_DIR = os.path.join(BENCH_DIR, "..", "src")
+sys.path.insert(0, SRC_DIR)
+sys.path.insert(0, BENCH_DIR)
+
+from history_generator import HistoryGenerator  # noqa: E402
+
+DEFAULT_SIZES = [10_000, 100_000, 1_000_000]
+# Requêtes tapées caractère par caractère (la dernière ne trouve rien)
+TYPED_QUERIES = [
+    "git push",
+    "kubectl logs",
+    "docker compose",
+    "make test",
+    "zzqx absent",
+]
+SQL_QUERIES = ["git", "dock", "kubectl", "make", "api", "deploy", "sort", "EOF", "zzqx"]
+SEARCH_LIMIT = 20
+
+STARTUP_SCRIPT = """
+import sys
+sys.path.insert(0, {src!r})
+from rapidstory.utils import ConfigLoader
+from rapidstory.service import SearchService
+SearchService(ConfigLoader({config!r})).search("", {limit})
+import os
+os._exit(0)
+"""
+
+
+def percentile(samples: List[float], fraction: float) -> float:
+    """Percentile par rang le plus proche (samples non vide)."""
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, max(0, round(fraction * len(ordered)) - 1))
+    return ordered[index]
+
+
+def timed_ms(fn) -> float:
+    """Durée d'un appel en millisecondes."""
+    start = time.perf_counter()
+    fn()
+    return (time.perf_counter() - start) * 1000
+
+
+def measure(size: int, workdir: str) -> Dict[str, float]:
+    """Mesures en processus pour une taille (appelé dans un sous-processus)."""
+    from rapidstory.command_store import CommandStore
+    from rapidstory.database import DatabaseRepository, HistoryCache, HistoryManager
+    from rapidstory.search import SearchEngine
+
+    history_path = os.path.join(workdir, "bash_history")
+    results: Dict[str, float] = {}
+
+    cache = HistoryCache(history_path, load_limit=size)
+    results["cache_load_ms"] = timed_ms(cache._load)
+
+    snapshot_path = os.path.join(workdir, "corpus.snapshot")
+    HistoryCache(history_path, size, snapshot_path=snapshot_path)._load()
+    cache = HistoryCache(history_path, size, snapshot_path=snapshot_path)
+    start = time.perf_counter()
+    cache._load()
+    list(cache._commands[:SEARCH_LIMIT])
+    results["snapshot_load_ms"] = (time.perf_counter() - start) * 1000
+    del cache
+
+    start = time.perf_counter()
+    manager = HistoryManager(
+        os.path.join(workdir, "ingest.db"), history_path, 1000, 3600, "frecency"
+    )
+    manager.load_from_file()
+    results["ingest_cold_ms"] = (time.perf_counter() - start) * 1000
+    results["ingest_warm_ms"] = timed_ms(manager.load_from_file)
+
+    samples = [
+        timed_ms(lambda q=q: manager.db.search_commands(q, SEARCH_LIMIT))
+        for _ in range(10)
+        for q in SQL_QUERIES
+    ]
+    results["sql_search_p50_ms"] = percentile(samples, 0.50)
+    results["sql_search_p99_ms"] = percentile(samples, 0.99)
+
+    with open(history_path, encoding="utf-8") as f:
+        lines = [line.strip() for line in f if line.strip()]
+
+    db = DatabaseRepository(os.path.join(workdir, "insert.db"))
+    start = time.perf_counter()
+    db.insert_commands_batch(lines)
+    results["insert_batch_ms"] = (time.perf_counter() - start) * 1000
+    db.close()
+
+    # Corpus complet, plus récent en premier, dédupliqué (comme HistoryCache)
+    corpus = CommandStore.from_commands(dict.fromkeys(reversed(lines)))
+    del lines
+    engine = SearchEngine()
+    engine.search("", corpus, SEARCH_LIMIT, generation=0)
+    samples = [
+        timed_ms(
+            lambda p=query[:n]: engine.search(p, corpus, SEARCH_LIMIT, generation=0)
+        )
+        for query in TYPED_QUERIES
+        for n in range(1, len(query) + 1)
+    ]
+    results["keystroke_p50_ms"] = percentile(samples, 0.50)
+    results["keystroke_p99_ms"] = percentile(samples, 0.99)
+
+    # ru_maxrss : kilo-octets sous Linux, octets sous macOS
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    results["peak_rss_mb"] = rss / (1024 * 1024 if sys.platform == "darwin" else 1024)
+    return results
+
+
+def measure_startup(workdir: str) -> Dict[str, float]:
+    """Démarrage jusqu'aux premiers résultats : base vide puis remplie."""
+    config_path = os.path.join(workdir, "config.py")
+    with open(config_path, "w") as f:
+        f.write(f"DB_PATH = {os.path.join(workdir, 'startup.db')!r}\n")
+        f.write(f"BASH_HISTORY_PATH = {os.path.join(workdir, 'bash_history')!r}\n")
+        f.write(f"RECORD_SPOOL_PATH = {os.path.join(workdir, 'record.spool')!r}\n")
+
+    script = STARTUP_SCRIPT.format(
+        src=os.path.abspath(SRC_DIR), config=config_path, limit=SEARCH_LIMIT
+    )
+    results = {}
+    for label in ("startup_cold_ms", "startup_warm_ms"):
+        start = time.perf_counter()
+        subprocess.run([sys.executable, "-c", script], check=True)
+        results[label] = (time.perf_counter() - start) * 1000
+    return results
+
+
+def run_size(size: int) -> Dict[str, float]:
+    """Génère l'historique et lance les mesures dans des processus neufs."""
+    with tempfile.TemporaryDirectory(prefix="rapidstory-bench-") as workdir:
+        HistoryGenerator(size).write(os.path.join(workdir, "bash_history"))
+        output = subprocess.run(
+            [sys.executable, __file__, "--measure", str(size), "--workdir", workdir],
+            check=True,
+            capture_output=True,
+            text=True,
+        ).stdout
+        results = json.loads(output)
+        results.update(measure_startup(workdir))
+    return results
+
+
+def compare(
+    current: Dict[str, Dict[str, float]],
+    baseline: Dict[str, Dict[str, float]],
+    threshold: float,
+    min_delta: float = 0.0,
+) -> List[str]:
+    """Liste des régressions (métriques plus lentes/lourdes que la baseline)."""
+    regressions = []
+    for size, metrics in current.items():
+        for name, value in metrics.items():
+            reference = baseline.get(size, {}).get(name)
+            if (
+                reference
+                and value > reference * (1 + threshold)
+                and value - reference >= min_delta
+            ):
+                regressions.append(
+                    f"{size} {name}: {value:.2f} > {reference:.2f} "
+                    f"(+{(value / reference - 1) * 100:.0f} %)"
+                )
+    return regressions
+
+
+def print_table(results: Dict[str, Dict[str, float]]) -> None:
+    """Affiche les résultats (une colonne par taille)."""
+    sizes = list(results)
+    names = list(results[sizes[0]])
+    print(f"{'métrique':<20}" + "".join(f"{size:>14}" for size in sizes))
+    for name in names:
+        print(f"{name:<20}" + "".join(f"{results[s][name]:>14.2f}" for s in sizes))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmarks RapidStory")
+    parser.add_argument("--sizes", default=",".join(str(s) for s in DEFAULT_SIZES))
+    parser.add_argument("--output", help="Fichier JSON des résultats")
+    parser.add_argument("--baseline", help="Résultats JSON de référence")
+    parser.add_argument("--threshold", type=float, default=0.2)
+    parser.add_argument("--min-delta", type=float, default=1.0)
+    parser.add_argument("--measure", type=int, help=argparse.SUPPRESS)
+    parser.add_argument("--workdir", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.measure:
+        json.dump(measure(args.measure, args.workdir), sys.stdout)
+        sys.stdout.flush()
+        os._exit(0)  # Sans attendre les threads (fermeture des bases)
+
+    results = {}
+    for size in (int(s) for s in args.sizes.split(",")):
+        print(f"Taille {size}...", file=sys.stderr)
+        results[str(size)] = run_size(size)
+
+    print_table(results)
+
+    if args.output:
+        report = {
+            "meta": {
+                "python": platform.python_version(),
+                "platform": platform.platform(),
+                "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            },
+            "results": results,
+        }
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)["results"]
+        regressions = compare(results, baseline, args.threshold, args.min_delta)
+        for line in regressions:
+            print(f"RÉGRESSION {line}")
+        if regressions:
+            sys.exit(1)
+        print(f"Aucune régression (seuil {args.threshold * 100:.0f} %).")
+
+
+if __name__ == "__main__":
+    main()
@@ -12,7 +12,8 @@ HISTSIZE = 20000
 # Taille de l'historique sur disque (HISTFILESIZE dans bash)
 HISTFILESIZE = 20000
 
-# Intervalle de surveillance du fichier d'historique (secondes)
+# Intervalle de scrutation du fichier d'historique (secondes), utilisé
+# par le démon seulement sans inotify (hors Linux) ; sinon événementiel
 MONITOR_INTERVAL = 30
 
 # Fréquence d'append dans l'historique (tous les N commandes)
@@ -26,16 +27,64 @@ DB_PATH = "~/.local/share/rapidstory/rapidstory.db"
 # Fichier d'historique Bash
 BASH_HISTORY_PATH = "~/.bash_history"
 
+# Socket Unix du démon de recherche (`rapidstory serve`, optionnel)
+# Si le démon tourne, Ctrl+R / Ctrl+Up deviennent de simples clients
+DAEMON_SOCKET_PATH = "~/.local/share/rapidstory/rapidstory.sock"
+
+# Délai max (secondes) d'une réponse du démon avant bascule en local
+DAEMON_TIMEOUT = 2.0
+
+# Spool du hook `rapidstory record` (répertoire, code retour, durée...)
+# Versé en base toutes les ~RECORD_BATCH_SIZE exécutions (estimé d'après la
+# taille du spool), ou à l'ouverture de Ctrl+R / Ctrl+Up, ou par le démon
+RECORD_SPOOL_PATH = "~/.local/share/rapidstory/record.spool"
+RECORD_BATCH_SIZE = 32
+
+# Mesure des latences par frappe (lecture, recherche, scoring, affichage)
+# Résultats : `rapidstory stats --perf`
+PERF_STATS = False
+
+# Attente max (secondes) de la fin d'une séquence d'échappement (flèches...)
+# Au-delà, Échap est considéré seul (sortie). À augmenter en SSH lent.
+ESCAPE_TIMEOUT = 0.05
+
+# Rétention de la base (`rapidstory compact`), 0 = critère désactivé
+# Commandes en base au maximum (frecency la plus basse supprimée d'abord)
+RETENTION_MAX_ROWS = 0
+# Suppression des commandes inutilisées depuis N jours...
+RETENTION_MAX_AGE_DAYS = 0
+# ...sauf celles lancées ou choisies au moins N fois
+RETENTION_MIN_USES = 0
+# Les commandes épinglées (`rapidstory pin`) ne sont jamais supprimées
+RETENTION_KEEP_PINNED = True
+
+# Compactage automatique en arrière-plan (rétention, index, VACUUM incrémental)
+# au plus toutes les N heures, en fin de session ou par le démon (0 = manuel)
+COMPACT_INTERVAL_HOURS = 24
+
 
 # === Recherche ===
 # Seuil de correspondance pour la recherche floue (0.0 à 1.0)
 FUZZY_SEARCH_THRESHOLD = 0.5
 
+# Recherche floue multi-thread au-delà de FUZZY_PARALLEL_MIN_SIZE commandes
+# (-1 = tous les cœurs, 1 = désactivé ; nécessite numpy : pip install numpy)
+FUZZY_WORKERS = -1
+FUZZY_PARALLEL_MIN_SIZE = 50000
+
 # Délimiteur pour mode recherche avec chiffres (ex: '8000' cherche "8000")
 # Hors délimiteurs, les chiffres sélectionnent des commandes
 # Changez en '"' pour utiliser des guillemets au lieu d'apostrophes
 SEARCH_MODE_DELIMITER = "'"
 
+# Recherche de sous-chaîne via l'index trigramme SQLite (toute l'historique)
+# Requêtes de 3 caractères et plus ; False = scan Python des commandes chargées
+SQL_SUBSTRING_SEARCH = True
+
+# Ordre des résultats : "frecency" (fréquence + récence + sélections)
+# ou "recency" (ordre du fichier d'historique)
+SEARCH_RANKING = "frecency"
+
 # ============================================================================
 # MODE FULL (Ctrl+R) - Interface alternate screen
 # ============================================================================
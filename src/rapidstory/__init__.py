@@ -1,6 +1,19 @@
 from .main import main
-from .rapidstory_global import RapidStoryGlobal
-from .rapidstory_full import RapidStoryFull
-from .rapidstory_inline import RapidStoryInline
 
 __all__ = ["main", "RapidStoryGlobal", "RapidStoryFull", "RapidStoryInline"]
+
+# Modes chargés à la demande : `rapidstory` (et `rapidstory record`) ne
+# paient que les imports du chemin réellement emprunté
+_LAZY = {
+    "RapidStoryGlobal": ".rapidstory_global",
+    "RapidStoryFull": ".rapidstory_full",
+    "RapidStoryInline": ".rapidstory_inline",
+}
+
+
+def __getattr__(name: str):
+    if name not in _LAZY:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    import importlib
+
+    return getattr(importlib.import_module(_LAZY[name], __name__), name)
@@ -0,0 +1,77 @@
+import os
+import json
+import socket
+from typing import Any, Dict, List, Optional, Tuple
+
+
+class SearchClient:
+    """
+    Client léger du démon de recherche.
+
+    N'importe ni rapidfuzz ni sqlite3 : une session TTY connectée au
+    démon n'a rien à charger avant la première frame.
+    """
+
+    def __init__(self, sock: socket.socket):
+        self._sock = sock
+        self._reader = sock.makefile("rb")
+
+    @classmethod
+    def connect(cls, socket_path: str, timeout: float) -> Optional["SearchClient"]:
+        """
+        Se connecte au démon s'il tourne.
+
+        Args:
+            socket_path: Chemin du socket Unix
+            timeout: Délai max (secondes) pour chaque échange
+
+        Returns:
+            Client connecté ou None si aucun démon disponible
+        """
+        path = os.path.expanduser(socket_path)
+        if not os.path.exists(path):
+            return None
+
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        sock.settimeout(timeout)
+        try:
+            sock.connect(path)
+        except OSError:
+            sock.close()
+            return None
+
+        return cls(sock)
+
+    def _request(self, payload: Dict[str, Any]) -> Dict[str, Any]:
+        """Envoie une requête et attend la réponse (lève OSError si démon perdu)."""
+        self._sock.sendall(json.dumps(payload).encode("utf-8") + b"\n")
+
+        line = self._reader.readline()
+        if not line:
+            raise ConnectionError("Connexion au démon perdue")
+
+        response = json.loads(line)
+        if not response.get("ok"):
+            raise ConnectionError(response.get("error", "Erreur démon"))
+        return response
+
+    def search(
+        self, query: str, limit: int, scope: Optional[Tuple[str, str]] = None
+    ) -> List[str]:
+        """Recherche déléguée au démon (même contrat que SearchService)."""
+        payload: Dict[str, Any] = {"op": "search", "query": query, "limit": limit}
+        if scope is not None:
+            payload["scope"] = list(scope)
+        return self._request(payload)["results"]
+
+    def record_selection(self, command: str) -> None:
+        """Transmet la commande choisie au démon (frecency)."""
+        self._request({"op": "select", "command": command})
+
+    def close(self) -> None:
+        """Ferme la connexion."""
+        try:
+            self._reader.close()
+            self._sock.close()
+        except OSError:
+            pass
@@ -0,0 +1,104 @@
+import mmap
+from array import array
+from typing import Iterable, Iterator, Sequence, Union, overload
+
+# Zone texte : bytearray (construit en mémoire) ou mmap (instantané sur disque)
+Buffer = Union[bytes, bytearray, mmap.mmap]
+
+
+class CommandStore(Sequence[str]):
+    """
+    Corpus compact en lecture seule : commandes UTF-8 bout à bout dans un
+    seul buffer, bornes dans un array('I') (count + 1 offsets).
+
+    ~1 objet Python pour tout le corpus au lieu d'un str par commande
+    (49 octets d'en-tête + pointeur de liste). Les tranches contiguës sont
+    des vues (aucune copie, aucun décodage) ; une commande n'est décodée
+    que lorsqu'elle est lue.
+    """
+
+    __slots__ = ("_buffer", "_offsets", "_base")
+
+    def __init__(self, buffer: Buffer, offsets: memoryview, base: int = 0):
+        """
+        Args:
+            buffer: Zone contenant le texte UTF-8
+            offsets: Vue 'I' : la commande i occupe
+                buffer[base + offsets[i] : base + offsets[i + 1]]
+            base: Début du texte dans buffer (après l'en-tête d'un fichier)
+        """
+        self._buffer = buffer
+        self._offsets = offsets
+        self._base = base
+
+    @classmethod
+    def from_commands(cls, commands: Iterable[str]) -> "CommandStore":
+        """
+        Construit un store à partir de chaînes (ordre conservé).
+
+        Raises:
+            OverflowError: Texte total >= 4 Gio (offsets 32 bits)
+        """
+        # Un seul buffer qui grandit : pas d'objet bytes par commande
+        buffer = bytearray()
+        offsets = array("I", [0])
+        for command in commands:
+            buffer += command.encode("utf-8", errors="surrogatepass")
+            offsets.append(len(buffer))
+        return cls(buffer, memoryview(offsets))
+
+    def __len__(self) -> int:
+        return len(self._offsets) - 1
+
+    @overload
+    def __getitem__(self, index: int) -> str: ...
+
+    @overload
+    def __getitem__(self, index: slice) -> Sequence[str]: ...
+
+    def __getitem__(self, index: Union[int, slice]) -> Union[str, Sequence[str]]:
+        if isinstance(index, slice):
+            start, stop, step = index.indices(len(self))
+            if step != 1:
+                return [self._decode(i) for i in range(start, stop, step)]
+            # Tranche contiguë : nouvelle vue sur les mêmes buffers
+            stop = max(start, stop)
+            return CommandStore(
+                self._buffer, self._offsets[start : stop + 1], self._base
+            )
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("index hors du corpus")
+        return self._decode(index)
+
+    def __iter__(self) -> Iterator[str]:
+        buffer, offsets, base = self._buffer, self._offsets, self._base
+        end = base + offsets[0]
+        for i in range(1, len(offsets)):
+            start, end = end, base + offsets[i]
+            yield str(buffer[start:end], "utf-8", "surrogatepass")
+
+    def _decode(self, index: int) -> str:
+        start = self._base + self._offsets[index]
+        end = self._base + self._offsets[index + 1]
+        return str(self._buffer[start:end], "utf-8", "surrogatepass")
+
+    @property
+    def nbytes(self) -> int:
+        """Taille du texte UTF-8 couvert par cette vue."""
+        return self._offsets[-1] - self._offsets[0]
+
+    def text(self) -> memoryview:
+        """Texte UTF-8 de la vue, sans copie (écriture de l'instantané)."""
+        start = self._base + self._offsets[0]
+        return memoryview(self._buffer)[start : start + self.nbytes]
+
+    def relative_offsets(self) -> array:
+        """Offsets ramenés à 0 (une vue peut commencer au milieu du texte)."""
+        first = self._offsets[0]
+        if first != 0:
+            return array("I", (offset - first for offset in self._offsets))
+        offsets = array("I")
+        offsets.frombytes(self._offsets.cast("B"))
+        return offsets
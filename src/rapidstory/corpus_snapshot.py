@@ -0,0 +1,85 @@
+import mmap
+import os
+import struct
+from typing import Optional, Tuple
+
+from .command_store import CommandStore
+
+# En-tête : magic, version du format, load_limit, nombre de commandes,
+# clé de la source (4 entiers, cf. HistoryCache._source_key). Ordre
+# d'octets natif, comme les offsets : fichier local à la machine
+_HEADER = struct.Struct("=4sIII4q")
+MAGIC = b"RSCS"
+FORMAT_VERSION = 1
+
+SourceKey = Tuple[int, int, int, int]
+
+
+def write_snapshot(
+    path: str, commands: CommandStore, load_limit: int, key: SourceKey
+) -> bool:
+    """
+    Écrit l'instantané du corpus (remplacement atomique).
+
+    Disposition : en-tête, offsets (count + 1 entrées 'I') puis le texte
+    UTF-8 du store tel quel, dans l'ordre du classement (frecency ou
+    récence) : la ligne i du fichier est le rang i.
+
+    Returns:
+        False si l'écriture a échoué (dossier en lecture seule...)
+    """
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    try:
+        with open(tmp_path, "wb") as f:
+            f.write(
+                _HEADER.pack(MAGIC, FORMAT_VERSION, load_limit, len(commands), *key)
+            )
+            f.write(commands.relative_offsets())
+            f.write(commands.text())
+        os.replace(tmp_path, path)
+        return True
+    except OSError:
+        try:
+            os.unlink(tmp_path)
+        except OSError:
+            pass
+        return False
+
+
+def open_snapshot(path: str, load_limit: int, key: SourceKey) -> Optional[CommandStore]:
+    """
+    Ouvre l'instantané s'il correspond exactement à la source actuelle.
+
+    Returns:
+        Store paresseux sur le fichier mmap, ou None (absent, périmé, corrompu)
+    """
+    try:
+        with open(path, "rb") as f:
+            size = os.fstat(f.fileno()).st_size
+            if size < _HEADER.size:
+                return None
+            buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    except (OSError, ValueError):
+        return None
+
+    magic, version, limit, count, *stored_key = _HEADER.unpack_from(buffer)
+    blob_start = _HEADER.size + 4 * (count + 1)
+    if (
+        magic != MAGIC
+        or version != FORMAT_VERSION
+        or limit != load_limit
+        or tuple(stored_key) != key
+        or size < blob_start
+    ):
+        buffer.close()
+        return None
+
+    # Vue sans copie sur les offsets (memoryview exporte le mmap : il est
+    # libéré avec la dernière vue, pas par close()). Les pages du fichier
+    # restent dans le cache du noyau, partagées entre processus
+    offsets = memoryview(buffer)[_HEADER.size : blob_start].cast("I")
+    if offsets[-1] != size - blob_start:
+        offsets.release()
+        buffer.close()
+        return None
+    return CommandStore(buffer, offsets, blob_start)
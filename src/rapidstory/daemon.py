@@ -0,0 +1,125 @@
+import os
+import json
+import socketserver
+import logging
+from typing import Any, Dict
+
+from .client import SearchClient
+
+
+class _RequestHandler(socketserver.StreamRequestHandler):
+    """
+    Traite une connexion client (une session Ctrl+R / Ctrl+Up).
+
+    Protocole : une requête JSON par ligne, une réponse JSON par ligne.
+    """
+
+    def handle(self) -> None:
+        """Répond aux requêtes tant que le client garde la connexion."""
+        # Une session incrémentale par connexion (= par session TTY)
+        session = self.server.service.create_session()  # type: ignore[attr-defined]
+
+        for line in self.rfile:
+            try:
+                request = json.loads(line)
+                response = self.server.dispatch(request, session)  # type: ignore[attr-defined]
+            except (ValueError, TypeError, KeyError) as e:
+                response = {"ok": False, "error": f"Requête invalide : {e}"}
+
+            try:
+                self.wfile.write(json.dumps(response).encode("utf-8") + b"\n")
+            except OSError:
+                return
+
+
+class SearchServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    """
+    Démon de recherche (`rapidstory serve`).
+
+    Garde en mémoire l'historique, la connexion SQLite et le moteur de
+    recherche, et répond aux clients via un socket Unix local.
+    """
+
+    daemon_threads = True
+
+    def __init__(self, socket_path: str, service):
+        """
+        Args:
+            socket_path: Chemin du socket Unix
+            service: SearchService déjà initialisé (corpus chargé)
+        """
+        self.socket_path = os.path.expanduser(socket_path)
+        self.service = service
+        self.logger = logging.getLogger(__name__)
+
+        self._remove_stale_socket()
+        super().__init__(self.socket_path, _RequestHandler)
+        os.chmod(self.socket_path, 0o600)  # Par sécurité : déjà créé en 0o600
+
+    def server_bind(self) -> None:
+        """
+        bind() sous umask 0o177 : le socket est créé directement en 0o600,
+        aucun autre utilisateur ne peut s'y connecter avant le chmod.
+        """
+        previous = os.umask(0o177)
+        try:
+            super().server_bind()
+        finally:
+            os.umask(previous)
+
+    def _remove_stale_socket(self) -> None:
+        """Supprime un socket orphelin (démon précédent tué)."""
+        os.makedirs(os.path.dirname(self.socket_path), exist_ok=True)
+
+        if not os.path.exists(self.socket_path):
+            return
+
+        client = SearchClient.connect(self.socket_path, timeout=0.2)
+        if client is not None:
+            client.close()
+            raise RuntimeError(f"Un démon écoute déjà sur {self.socket_path}")
+
+        os.unlink(self.socket_path)
+
+    def dispatch(self, request: Dict[str, Any], session=None) -> Dict[str, Any]:
+        """
+        Exécute une requête client.
+
+        Args:
+            request: Requête décodée ({"op": ..., ...})
+            session: Session de recherche de la connexion
+
+        Returns:
+            Réponse à sérialiser ({"ok": bool, ...})
+        """
+        op = request.get("op")
+
+        if op == "ping":
+            return {"ok": True}
+
+        if op == "search":
+            scope = request.get("scope")
+            if scope and not (isinstance(scope, list) and len(scope) == 2):
+                return {"ok": False, "error": f"Portée invalide : {scope!r}"}
+            results = self.service.search(
+                str(request["query"]),
+                int(request["limit"]),
+                session,
+                scope=(str(scope[0]), str(scope[1])) if scope else None,
+            )
+            return {"ok": True, "results": results}
+
+        if op == "select":
+            self.service.record_selection(str(request["command"]))
+            return {"ok": True}
+
+        return {"ok": False, "error": f"Opération inconnue : {op}"}
+
+    def server_close(self) -> None:
+        """Ferme le socket et supprime le fichier."""
+        super().server_close()
+        try:
+            os.unlink(self.socket_path)
+        except OSError:
+            pass
+        self.service.close()
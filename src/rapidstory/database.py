@@ -1,215 +1,1375 @@
 import os
+import math
 import sqlite3
 import threading
 import time
-from typing import List, Optional, Set
-from functools import lru_cache
+from contextlib import contextmanager
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    Sequence,
+    Tuple,
+)
+
+from .command_store import CommandStore
+from .corpus_snapshot import SourceKey, open_snapshot, write_snapshot
+from .history_watcher import create_history_watcher
+from .importers import BASH_TIMESTAMP
+
+# Migrations successives : _MIGRATIONS[n] fait passer user_version de n à n+1
+_MIGRATIONS: List[List[str]] = [
+    [
+        """
+        CREATE TABLE IF NOT EXISTS history (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            command TEXT NOT NULL UNIQUE,
+            timestamp DATETIME DEFAULT CURRENT_TIMESTAMP
+        )
+        """,
+        """
+        CREATE VIRTUAL TABLE IF NOT EXISTS history_fts USING fts5(
+            command, content='history', content_rowid='id'
+        )
+        """,
+        """
+        CREATE INDEX IF NOT EXISTS idx_command_lower
+        ON history (LOWER(command))
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS ingest_state (
+            path TEXT PRIMARY KEY,
+            inode INTEGER NOT NULL,
+            offset INTEGER NOT NULL,
+            size INTEGER NOT NULL
+        )
+        """,
+    ],
+    [
+        # Synchronisation automatique de l'index FTS5 (external content)
+        """
+        CREATE TRIGGER IF NOT EXISTS history_ai AFTER INSERT ON history BEGIN
+            INSERT INTO history_fts (rowid, command) VALUES (new.id, new.command);
+        END
+        """,
+        """
+        CREATE TRIGGER IF NOT EXISTS history_ad AFTER DELETE ON history BEGIN
+            INSERT INTO history_fts (history_fts, rowid, command)
+            VALUES ('delete', old.id, old.command);
+        END
+        """,
+        """
+        CREATE TRIGGER IF NOT EXISTS history_au AFTER UPDATE OF command ON history BEGIN
+            INSERT INTO history_fts (history_fts, rowid, command)
+            VALUES ('delete', old.id, old.command);
+            INSERT INTO history_fts (rowid, command) VALUES (new.id, new.command);
+        END
+        """,
+        # Resynchronise les index ayant dérivé avant les triggers
+        "INSERT INTO history_fts (history_fts) VALUES ('rebuild')",
+    ],
+    # Emplacement conservé (numérotation) : l'index trigramme dépend du
+    # SQLite qui ouvre la base, cf. DatabaseRepository._ensure_trigram_index
+    [],
+    # Frecency : compteurs d'usage, dernière utilisation, score précalculé indexé
+    [
+        "ALTER TABLE history ADD COLUMN run_count INTEGER NOT NULL DEFAULT 1",
+        "ALTER TABLE history ADD COLUMN select_count INTEGER NOT NULL DEFAULT 0",
+        "ALTER TABLE history ADD COLUMN last_used REAL NOT NULL DEFAULT 0",
+        "ALTER TABLE history ADD COLUMN frecency REAL NOT NULL DEFAULT 0",
+        # id départage les commandes importées dans la même seconde
+        """
+        UPDATE history SET last_used =
+            COALESCE(CAST(strftime('%s', timestamp) AS REAL), 0) + id * 1e-6
+        """,
+        "UPDATE history SET frecency = rs_frecency(last_used, run_count, select_count)",
+        "CREATE INDEX IF NOT EXISTS idx_history_frecency ON history (frecency DESC)",
+    ],
+    # Métadonnées de la dernière exécution (`rapidstory record`)
+    [
+        "ALTER TABLE history ADD COLUMN cwd TEXT",
+        "ALTER TABLE history ADD COLUMN exit_status INTEGER",
+        "ALTER TABLE history ADD COLUMN duration REAL",
+        "ALTER TABLE history ADD COLUMN hostname TEXT",
+        "ALTER TABLE history ADD COLUMN session TEXT",
+        "CREATE INDEX IF NOT EXISTS idx_history_cwd ON history (cwd, last_used)",
+        "CREATE INDEX IF NOT EXISTS idx_history_hostname ON history (hostname)",
+        "CREATE INDEX IF NOT EXISTS idx_history_session ON history (session)",
+    ],
+    # Histogrammes de latence par étape (`rapidstory stats --perf`)
+    [
+        """
+        CREATE TABLE IF NOT EXISTS perf_histogram (
+            stage TEXT NOT NULL,
+            bucket INTEGER NOT NULL,
+            count INTEGER NOT NULL,
+            PRIMARY KEY (stage, bucket)
+        ) WITHOUT ROWID
+        """,
+    ],
+    # Compteur de modifications du corpus : clé de l'instantané mmap
+    # (corpus_snapshot), quel que soit le processus qui écrit
+    [
+        """
+        CREATE TABLE IF NOT EXISTS corpus_version (
+            id INTEGER PRIMARY KEY CHECK (id = 0),
+            version INTEGER NOT NULL
+        )
+        """,
+        "INSERT OR IGNORE INTO corpus_version (id, version) VALUES (0, 0)",
+        """
+        CREATE TRIGGER IF NOT EXISTS corpus_version_ai AFTER INSERT ON history BEGIN
+            UPDATE corpus_version SET version = version + 1;
+        END
+        """,
+        """
+        CREATE TRIGGER IF NOT EXISTS corpus_version_ad AFTER DELETE ON history BEGIN
+            UPDATE corpus_version SET version = version + 1;
+        END
+        """,
+        """
+        CREATE TRIGGER IF NOT EXISTS corpus_version_au
+        AFTER UPDATE OF command, frecency ON history BEGIN
+            UPDATE corpus_version SET version = version + 1;
+        END
+        """,
+    ],
+    # Rétention (`rapidstory compact`) : commandes épinglées, jamais purgées,
+    # et date de la dernière maintenance (la première a lieu un intervalle
+    # après la migration, pas au premier lancement)
+    [
+        "ALTER TABLE history ADD COLUMN pinned INTEGER NOT NULL DEFAULT 0",
+        """
+        CREATE TABLE IF NOT EXISTS maintenance (
+            task TEXT PRIMARY KEY,
+            last_run REAL NOT NULL
+        ) WITHOUT ROWID
+        """,
+        """
+        INSERT OR IGNORE INTO maintenance (task, last_run)
+        VALUES ('compact', CAST(strftime('%s', 'now') AS REAL))
+        """,
+    ],
+    # Détection d'un historique réécrit sur place (même inode) : mtime et
+    # derniers octets lus avant l'offset
+    [
+        "ALTER TABLE ingest_state ADD COLUMN mtime_ns INTEGER NOT NULL DEFAULT 0",
+        "ALTER TABLE ingest_state ADD COLUMN tail BLOB",
+    ],
+    # Tous les dossiers d'exécution d'une commande (history.cwd : le dernier
+    # seulement) : une commande lancée à plusieurs endroits est dans chaque portée
+    [
+        """
+        CREATE TABLE IF NOT EXISTS history_cwd (
+            cwd TEXT NOT NULL,
+            history_id INTEGER NOT NULL,
+            last_used REAL NOT NULL,
+            PRIMARY KEY (cwd, history_id)
+        ) WITHOUT ROWID
+        """,
+        "CREATE INDEX IF NOT EXISTS idx_history_cwd_id ON history_cwd (history_id)",
+        """
+        INSERT OR IGNORE INTO history_cwd (cwd, history_id, last_used)
+        SELECT cwd, id, last_used FROM history WHERE cwd IS NOT NULL
+        """,
+        """
+        CREATE TRIGGER IF NOT EXISTS history_cwd_ad AFTER DELETE ON history BEGIN
+            DELETE FROM history_cwd WHERE history_id = old.id;
+        END
+        """,
+        # Remplacé par history_cwd pour les portées
+        "DROP INDEX IF EXISTS idx_history_cwd",
+    ],
+]
+
+SCHEMA_VERSION = len(_MIGRATIONS)
+
+# Index trigramme : recherche de sous-chaîne arbitraire (SQLite >= 3.34).
+# Hors migrations : une même base peut être ouverte par plusieurs SQLite
+TRIGRAM_AVAILABLE = sqlite3.sqlite_version_info >= (3, 34, 0)
+_TRIGRAM_TRIGGERS = ("history_trgm_ai", "history_trgm_ad", "history_trgm_au")
+_TRIGRAM_SCHEMA: List[str] = [
+    """
+    CREATE VIRTUAL TABLE IF NOT EXISTS history_trgm USING fts5(
+        command, content='history', content_rowid='id', tokenize='trigram'
+    )
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS history_trgm_ai AFTER INSERT ON history BEGIN
+        INSERT INTO history_trgm (rowid, command) VALUES (new.id, new.command);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS history_trgm_ad AFTER DELETE ON history BEGIN
+        INSERT INTO history_trgm (history_trgm, rowid, command)
+        VALUES ('delete', old.id, old.command);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS history_trgm_au AFTER UPDATE OF command ON history BEGIN
+        INSERT INTO history_trgm (history_trgm, rowid, command)
+        VALUES ('delete', old.id, old.command);
+        INSERT INTO history_trgm (rowid, command) VALUES (new.id, new.command);
+    END
+    """,
+    # Index créé ou triggers recréés : rattrape les lignes manquées
+    "INSERT INTO history_trgm (history_trgm) VALUES ('rebuild')",
+]
+
+# Chaque doublement d'usage vaut FRECENCY_WEIGHT secondes de récence
+FRECENCY_WEIGHT = 3 * 86400
+# Une sélection dans RapidStory compte comme SELECTION_WEIGHT exécutions
+SELECTION_WEIGHT = 2
+
+
+def frecency_score(last_used: float, run_count: int, select_count: int) -> float:
+    """
+    Score de frecency (récence + fréquence).
+
+    Forme additive en secondes : l'ordre entre deux commandes ne dépend pas
+    de l'instant présent, le score peut donc être précalculé et indexé.
+    """
+    usage = 1 + run_count + SELECTION_WEIGHT * select_count
+    return last_used + FRECENCY_WEIGHT * math.log2(usage)
 
 
 class DatabaseRepository:
-    """Gère l'accès à la base de données SQLite (sync)."""
+    """
+    Gère l'accès à la base de données SQLite (sync).
+
+    Une seule connexion par processus, réglée pour la lecture rapide et
+    l'écriture concurrente de plusieurs shells (WAL + busy_timeout).
+    """
+
+    BUSY_TIMEOUT_MS = 5000
+    MMAP_SIZE = 256 * 1024 * 1024
+    CACHE_SIZE_KB = 16 * 1024
+    CACHED_STATEMENTS = 64
+    # Lignes insérées avant fusion automatique des segments FTS5
+    AUTO_MERGE_ROWS = 10000
+    MERGE_PAGES = 1000
 
     def __init__(self, db_path: str):
         self.db_path = os.path.expanduser(db_path)
+        # Connexion partagée entre threads (monitor, démon) : accès sérialisé
+        self._lock = threading.RLock()
+        self._rows_since_merge = 0
+        self._conn = self._connect()
         self._init_db()
+        self.has_trigram = self._ensure_trigram_index()
 
-    def _init_db(self) -> None:
-        """Crée les tables et index FTS5 si nécessaire."""
+    def _connect(self) -> sqlite3.Connection:
+        """Ouvre la connexion et applique les PRAGMA de performance."""
         os.makedirs(os.path.dirname(self.db_path), exist_ok=True)
+        new_db = not os.path.exists(self.db_path)
 
-        with sqlite3.connect(self.db_path) as conn:
-            conn.execute("""
-                CREATE TABLE IF NOT EXISTS history (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    command TEXT NOT NULL UNIQUE,
-                    timestamp DATETIME DEFAULT CURRENT_TIMESTAMP
-                )
-            """)
-            conn.execute("""
-                CREATE VIRTUAL TABLE IF NOT EXISTS history_fts USING fts5(
-                    command, content='history', content_rowid='id'
+        conn = sqlite3.connect(
+            self.db_path,
+            timeout=self.BUSY_TIMEOUT_MS / 1000,
+            isolation_level=None,  # Transactions explicites (BEGIN IMMEDIATE)
+            check_same_thread=False,
+            cached_statements=self.CACHED_STATEMENTS,
+        )
+        conn.execute(f"PRAGMA busy_timeout = {self.BUSY_TIMEOUT_MS}")
+        if new_db:
+            # Pages libérées rendables au système (incremental_vacuum) ;
+            # seulement avant WAL et la première table
+            conn.execute("PRAGMA auto_vacuum = INCREMENTAL")
+        try:
+            conn.execute("PRAGMA journal_mode = WAL")
+        except sqlite3.Error:
+            pass  # FS sans mémoire partagée (NFS...) : journal par défaut
+        conn.execute("PRAGMA synchronous = NORMAL")
+        conn.execute(f"PRAGMA mmap_size = {self.MMAP_SIZE}")
+        conn.execute(f"PRAGMA cache_size = -{self.CACHE_SIZE_KB}")
+        conn.execute("PRAGMA temp_store = MEMORY")
+        conn.create_function("rs_frecency", 3, frecency_score, deterministic=True)
+        return conn
+
+    @contextmanager
+    def _write(self) -> Iterator[sqlite3.Connection]:
+        """
+        Transaction d'écriture.
+
+        BEGIN IMMEDIATE prend le verrou d'écriture dès le début : un autre
+        shell en train d'écrire fait attendre (busy_timeout) au lieu de
+        provoquer "database is locked" en cours de transaction.
+        """
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                yield self._conn
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+            else:
+                self._conn.execute("COMMIT")
+
+    def _init_db(self) -> None:
+        """Crée ou migre le schéma (fast-path : user_version déjà à jour)."""
+        with self._lock:
+            version = self._conn.execute("PRAGMA user_version").fetchone()[0]
+            if version >= SCHEMA_VERSION:
+                return
+
+            with self._write() as conn:
+                # Relu sous verrou : un autre shell a pu migrer entre-temps
+                version = conn.execute("PRAGMA user_version").fetchone()[0]
+                for statements in _MIGRATIONS[version:]:
+                    for statement in statements:
+                        conn.execute(statement)
+                conn.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+
+    def _ensure_trigram_index(self) -> bool:
+        """
+        Crée l'index trigramme et ses triggers s'ils manquent (idempotent).
+
+        Sans tokenizer trigram (SQLite < 3.34), les triggers laissés par un
+        SQLite plus récent feraient échouer toute insertion : ils sont
+        supprimés, puis recréés (avec reconstruction de l'index) par le
+        prochain SQLite compatible.
+
+        Returns:
+            True si l'index trigramme est utilisable
+        """
+        names = (*_TRIGRAM_TRIGGERS, "history_trgm")
+        with self._lock:
+            present = {
+                row[0]
+                for row in self._conn.execute(
+                    f"SELECT name FROM sqlite_master WHERE name IN "
+                    f"({', '.join('?' * len(names))})",
+                    names,
                 )
-            """)
-            conn.execute("""
-                CREATE INDEX IF NOT EXISTS idx_command_lower 
-                ON history (LOWER(command))
-            """)
-            conn.commit()
+            }
+        if TRIGRAM_AVAILABLE and len(present) == len(names):
+            return True  # Fast-path : rien à faire
+        try:
+            with self._write() as conn:
+                if TRIGRAM_AVAILABLE:
+                    for statement in _TRIGRAM_SCHEMA:
+                        conn.execute(statement)
+                else:
+                    for trigger in _TRIGRAM_TRIGGERS:
+                        conn.execute(f"DROP TRIGGER IF EXISTS {trigger}")
+        except sqlite3.Error:
+            return False
+        return TRIGRAM_AVAILABLE
+
+    def close(self) -> None:
+        """Ferme la connexion."""
+        with self._lock:
+            self._conn.close()
+
+    # UPSERT : nouvelle commande insérée, commande connue → compteurs mis à jour
+    _UPSERT_SQL = """
+        INSERT INTO history (command, last_used, frecency)
+        VALUES (?1, ?2, rs_frecency(?2, 1, 0))
+        ON CONFLICT (command) DO UPDATE SET
+            run_count = run_count + ?3,
+            last_used = MAX(last_used, excluded.last_used),
+            frecency = rs_frecency(
+                MAX(last_used, excluded.last_used), run_count + ?3, select_count
+            )
+    """
 
     def insert_command(self, command: str) -> bool:
-        """Insère une commande (ignore si existe)."""
+        """Enregistre une exécution. L'index FTS suit par trigger."""
+        return self.insert_commands_batch([command]) > 0
+
+    def insert_commands_batch(
+        self,
+        commands: Iterable[str],
+        timestamp: Optional[float] = None,
+        count_runs: bool = True,
+    ) -> int:
+        """
+        Enregistre des exécutions en batch (une entrée = une exécution).
+
+        Args:
+            commands: Commandes dans l'ordre d'exécution (doublons = répétitions)
+            timestamp: Instant de la dernière commande (défaut : maintenant)
+            count_runs: Voir insert_entries
+
+        Returns:
+            Nombre de nouvelles commandes insérées
+        """
+        commands = list(commands)
+        end = time.time() if timestamp is None else timestamp
+        # Ordre conservé : chaque commande est un peu plus récente que la précédente
+        entries = (
+            (cmd, end - (len(commands) - i) * 1e-6) for i, cmd in enumerate(commands)
+        )
+        return self.insert_entries(entries, count_runs)
+
+    def insert_entries(
+        self, entries: Iterable[Tuple[str, float]], count_runs: bool = True
+    ) -> int:
+        """
+        Enregistre des exécutions horodatées (UPSERT).
+
+        Args:
+            entries: Paires (commande, timestamp epoch)
+            count_runs: False lors d'une relecture complète (fichier réécrit) :
+                les commandes déjà comptées ne sont pas recomptées
+
+        Returns:
+            Nombre de nouvelles commandes insérées
+        """
+        increment = 1 if count_runs else 0
+        rows = ((cmd, ts, increment) for cmd, ts in entries)
         try:
-            with sqlite3.connect(self.db_path) as conn:
-                cursor = conn.cursor()
-                cursor.execute(
-                    "INSERT OR IGNORE INTO history (command) VALUES (?)", (command,)
+            with self._write() as conn:
+                before = conn.execute("SELECT COALESCE(MAX(id), 0) FROM history")
+                max_before = before.fetchone()[0]
+                conn.executemany(self._UPSERT_SQL, rows)
+                # Pas MAX(id) - max_before : un UPSERT en conflit consomme
+                # aussi un id AUTOINCREMENT. Parcours de la plage de rowid.
+                after = conn.execute(
+                    "SELECT COUNT(*) FROM history WHERE id > ?", (max_before,)
                 )
-                if cursor.rowcount > 0:
-                    cursor.execute(
-                        "INSERT INTO history_fts (id, command) VALUES (last_insert_rowid(), ?)",
-                        (command,),
+                inserted = after.fetchone()[0]
+        except sqlite3.Error:
+            return 0
+
+        self._rows_since_merge += inserted
+        if self._rows_since_merge >= self.AUTO_MERGE_ROWS:
+            self.merge_index()
+        return inserted
+
+    # Exécution capturée par le hook shell : métadonnées de la dernière
+    # exécution. Un enregistrement plus ancien (import, spool relu en retard)
+    # ne les écrase pas ; un cwd absent garde le précédent. run_count n'est
+    # pas incrémenté, l'ingestion du fichier d'historique compte déjà
+    # chaque exécution.
+    _RECORD_SQL = """
+        INSERT INTO history (
+            command, last_used, frecency, run_count,
+            cwd, exit_status, duration, hostname, session
+        )
+        VALUES (?1, ?2, rs_frecency(?2, 0, 0), 0, ?3, ?4, ?5, ?6, ?7)
+        ON CONFLICT (command) DO UPDATE SET
+            last_used = MAX(last_used, excluded.last_used),
+            frecency = rs_frecency(
+                MAX(last_used, excluded.last_used), run_count, select_count
+            ),
+            cwd = CASE WHEN excluded.last_used >= history.last_used
+                THEN COALESCE(excluded.cwd, history.cwd) ELSE history.cwd END,
+            exit_status = CASE WHEN excluded.last_used >= history.last_used
+                THEN excluded.exit_status ELSE history.exit_status END,
+            duration = CASE WHEN excluded.last_used >= history.last_used
+                THEN excluded.duration ELSE history.duration END,
+            hostname = CASE WHEN excluded.last_used >= history.last_used
+                THEN excluded.hostname ELSE history.hostname END,
+            session = CASE WHEN excluded.last_used >= history.last_used
+                THEN excluded.session ELSE history.session END
+    """
+
+    # Dossier d'exécution ajouté aux portées de la commande (cf. history_cwd)
+    _RECORD_CWD_SQL = """
+        INSERT INTO history_cwd (cwd, history_id, last_used)
+        SELECT ?2, id, ?3 FROM history WHERE command = ?1
+        ON CONFLICT (cwd, history_id) DO UPDATE SET
+            last_used = MAX(last_used, excluded.last_used)
+    """
+
+    def insert_records(self, records: Iterable[Dict[str, Any]]) -> int:
+        """
+        Enregistre des exécutions capturées par `rapidstory record` (un lot).
+
+        Args:
+            records: Enregistrements du spool (cf. recorder.build_record)
+
+        Returns:
+            Nombre d'enregistrements écrits
+        """
+        rows = [
+            (
+                r["command"],
+                r["timestamp"],
+                r.get("cwd"),
+                r.get("exit_status"),
+                r.get("duration"),
+                r.get("hostname"),
+                r.get("session"),
+            )
+            for r in records
+            if r.get("command")
+        ]
+        if not rows:
+            return 0
+        try:
+            with self._write() as conn:
+                conn.executemany(self._RECORD_SQL, rows)
+                conn.executemany(
+                    self._RECORD_CWD_SQL,
+                    ((row[0], row[2], row[1]) for row in rows if row[2] is not None),
+                )
+        except sqlite3.Error:
+            return 0
+        return len(rows)
+
+    def record_selection(self, command: str) -> None:
+        """Compte une sélection dans RapidStory (remonte la commande en frecency)."""
+        try:
+            with self._write() as conn:
+                conn.execute(
+                    """
+                    UPDATE history SET
+                        select_count = select_count + 1,
+                        last_used = MAX(last_used, ?1),
+                        frecency = rs_frecency(
+                            MAX(last_used, ?1), run_count, select_count + 1
+                        )
+                    WHERE command = ?2
+                    """,
+                    (time.time(), command),
+                )
+        except sqlite3.Error:
+            pass
+
+    def top_commands(self, limit: int) -> List[str]:
+        """Commandes par frecency décroissante (parcours de l'index)."""
+        try:
+            with self._lock:
+                rows = self._conn.execute(
+                    "SELECT command FROM history ORDER BY frecency DESC LIMIT ?",
+                    (limit,),
+                ).fetchall()
+            return [row[0] for row in rows]
+        except sqlite3.Error:
+            return []
+
+    def corpus_version(self) -> Optional[int]:
+        """Compteur incrémenté à chaque changement de history (triggers)."""
+        try:
+            with self._lock:
+                return self._conn.execute(
+                    "SELECT version FROM corpus_version"
+                ).fetchone()[0]
+        except sqlite3.Error:
+            return None
+
+    def scoped_commands(
+        self, kind: str, path: str, limit: int, by_frecency: bool = True
+    ) -> List[str]:
+        """
+        Commandes exécutées dans un dossier ("exact") ou sous-arbre ("prefix").
+
+        Parcours de la clé (cwd, commande) de history_cwd : seul l'ensemble
+        filtré est lu, avant tout scoring flou. Une commande lancée dans
+        plusieurs dossiers appartient à chacune de ces portées ; en récence,
+        l'ordre est celui de la dernière exécution dans la portée. Les
+        commandes sans cwd (hook `rapidstory record` absent) ne sont dans
+        aucune portée.
+        """
+        order = "h.frecency DESC" if by_frecency else "MAX(c.last_used) DESC"
+        if kind == "exact":
+            where, params = "c.cwd = ?1", (path, limit)
+        else:
+            # Intervalle [base/, base0) : '0' suit '/' en ASCII
+            base = path.rstrip("/")
+            where = "c.cwd = ?1 OR (c.cwd >= ?3 AND c.cwd < ?4)"
+            params = (path, limit, base + "/", base + "0")
+        try:
+            with self._lock:
+                rows = self._conn.execute(
+                    "SELECT h.command FROM history_cwd c "
+                    f"JOIN history h ON h.id = c.history_id WHERE {where} "
+                    f"GROUP BY h.id ORDER BY {order} LIMIT ?2",
+                    params,
+                ).fetchall()
+            return [row[0] for row in rows]
+        except sqlite3.Error:
+            return []
+
+    def count_commands(self) -> int:
+        """Nombre de commandes distinctes en base."""
+        try:
+            with self._lock:
+                return self._conn.execute("SELECT COUNT(*) FROM history").fetchone()[0]
+        except sqlite3.Error:
+            return 0
+
+    def add_perf_counts(self, rows: Iterable[Tuple[str, int, int]]) -> None:
+        """Cumule des compteurs d'histogramme (étape, bucket, nombre)."""
+        try:
+            with self._write() as conn:
+                conn.executemany(
+                    "INSERT INTO perf_histogram (stage, bucket, count) VALUES (?, ?, ?) "
+                    "ON CONFLICT (stage, bucket) DO UPDATE SET count = count + excluded.count",
+                    rows,
+                )
+        except sqlite3.Error:
+            pass
+
+    def perf_counts(self) -> Dict[str, Dict[int, int]]:
+        """Histogrammes persistés : {étape: {bucket: nombre}}."""
+        counts: Dict[str, Dict[int, int]] = {}
+        try:
+            with self._lock:
+                rows = self._conn.execute(
+                    "SELECT stage, bucket, count FROM perf_histogram"
+                ).fetchall()
+        except sqlite3.Error:
+            return counts
+        for stage, bucket, count in rows:
+            counts.setdefault(stage, {})[bucket] = count
+        return counts
+
+    def _fts_tables(self) -> List[str]:
+        """Index FTS5 présents (history_fts + trigramme si disponible)."""
+        return ["history_fts", "history_trgm"] if self.has_trigram else ["history_fts"]
+
+    def rebuild_index(self) -> None:
+        """Reconstruit entièrement les index FTS5 depuis la table history."""
+        with self._write() as conn:
+            for table in self._fts_tables():
+                conn.execute(f"INSERT INTO {table} ({table}) VALUES ('rebuild')")
+
+    def optimize_index(self) -> None:
+        """Fusionne tous les segments FTS5 en un seul (coûteux, ponctuel)."""
+        with self._write() as conn:
+            for table in self._fts_tables():
+                conn.execute(f"INSERT INTO {table} ({table}) VALUES ('optimize')")
+        self._rows_since_merge = 0
+
+    def check_index(self) -> bool:
+        """
+        Vérifie la cohérence de l'index FTS5 avec la table history.
+
+        Returns:
+            True si l'index est intègre, False sinon
+        """
+        try:
+            with self._lock:
+                for table in self._fts_tables():
+                    self._conn.execute(
+                        f"INSERT INTO {table} ({table}, rank) "
+                        "VALUES ('integrity-check', 1)"
                     )
-                conn.commit()
+            return True
+        except sqlite3.DatabaseError:
+            return False
+
+    def merge_index(self) -> None:
+        """
+        Fusion incrémentale des segments FTS5 (après import massif).
+
+        Travaille par tranches de MERGE_PAGES pages jusqu'à ce qu'une
+        tranche ne modifie plus rien (cf. doc FTS5 'merge').
+        """
+        try:
+            for table in self._fts_tables():
+                while True:
+                    with self._write() as conn:
+                        before = conn.total_changes
+                        conn.execute(
+                            f"INSERT INTO {table} ({table}, rank) VALUES ('merge', ?)",
+                            (self.MERGE_PAGES,),
+                        )
+                        done = conn.total_changes - before < 2
+                    if done:
+                        break
+        except sqlite3.Error:
+            return
+        self._rows_since_merge = 0
+
+    # Purge et VACUUM par transactions courtes : un shell qui écrit pendant
+    # un compactage en arrière-plan n'attend jamais longtemps le verrou
+    PRUNE_BATCH = 5000
+    VACUUM_STEP_PAGES = 2000
+
+    def prune(
+        self,
+        max_rows: int = 0,
+        max_age_days: float = 0,
+        min_uses: int = 0,
+        keep_pinned: bool = True,
+    ) -> int:
+        """
+        Purge selon la politique de rétention (0 = critère désactivé).
+
+        Args:
+            max_rows: Nombre maximum de commandes gardées ; les frecency
+                les plus basses partent d'abord, les épinglées restent
+            max_age_days: Supprime les commandes inutilisées depuis plus
+                de max_age_days jours...
+            min_uses: ...sauf celles lancées ou choisies au moins
+                min_uses fois
+            keep_pinned: Les commandes épinglées ne sont jamais supprimées
+
+        Returns:
+            Nombre de commandes supprimées (index FTS5 suivis par trigger)
+        """
+        unpinned = "pinned = 0" if keep_pinned else "1"
+        removed = 0
+
+        if max_age_days > 0:
+            where = f"{unpinned} AND last_used < :cutoff"
+            if min_uses > 0:
+                where += " AND run_count + select_count < :min_uses"
+            params = {
+                "cutoff": time.time() - max_age_days * 86400,
+                "min_uses": min_uses,
+            }
+            removed += self._delete_rows(where, params)
+
+        if max_rows > 0:
+            try:
+                with self._lock:
+                    total, pinned = self._conn.execute(
+                        "SELECT COUNT(*), COALESCE(SUM(pinned != 0), 0) FROM history"
+                    ).fetchone()
+            except sqlite3.Error:
+                return removed
+            kept_pinned = pinned if keep_pinned else 0
+            excess = total - kept_pinned - max(0, max_rows - kept_pinned)
+            if excess > 0:
+                removed += self._delete_rows(
+                    unpinned, {}, f"ORDER BY frecency LIMIT {excess}"
+                )
+        return removed
+
+    def _delete_rows(self, where: str, params: Dict[str, Any], order: str = "") -> int:
+        """
+        Supprime les lignes répondant à `where`, par lots de PRUNE_BATCH.
+
+        La condition est revérifiée à la suppression : une commande
+        réutilisée entre-temps (autre shell) n'est pas supprimée.
+        """
+        try:
+            with self._lock:
+                ids = [
+                    row[0]
+                    for row in self._conn.execute(
+                        f"SELECT id FROM history WHERE {where} {order}", params
+                    )
+                ]
+            removed = 0
+            for start in range(0, len(ids), self.PRUNE_BATCH):
+                with self._write() as conn:
+                    cursor = conn.executemany(
+                        f"DELETE FROM history WHERE id = :id AND {where}",
+                        (
+                            {**params, "id": row_id}
+                            for row_id in ids[start : start + self.PRUNE_BATCH]
+                        ),
+                    )
+                    removed += cursor.rowcount
+            return removed
+        except sqlite3.Error:
+            return 0
+
+    def set_pinned(self, command: str, pinned: bool = True) -> bool:
+        """
+        Épingle une commande (ajoutée si absente) ou la désépingle.
+
+        Returns:
+            False si la commande à désépingler n'existe pas
+        """
+        try:
+            with self._write() as conn:
+                if pinned:
+                    conn.execute(
+                        "INSERT INTO history (command, last_used, frecency, run_count, pinned) "
+                        "VALUES (?1, ?2, rs_frecency(?2, 0, 0), 0, 1) "
+                        "ON CONFLICT (command) DO UPDATE SET pinned = 1",
+                        (command, time.time()),
+                    )
+                    return True
+                cursor = conn.execute(
+                    "UPDATE history SET pinned = 0 WHERE command = ?", (command,)
+                )
                 return cursor.rowcount > 0
         except sqlite3.Error:
             return False
 
-    def insert_commands_batch(self, commands: Set[str]) -> int:
-        """Insère plusieurs commandes dédupliquées en batch."""
-        inserted = 0
+    def pinned_commands(self) -> List[str]:
+        """Commandes épinglées (frecency décroissante)."""
         try:
-            with sqlite3.connect(self.db_path) as conn:
-                cursor = conn.cursor()
-                conn.execute("BEGIN")
-                for cmd in commands:
-                    cursor.execute(
-                        "INSERT OR IGNORE INTO history (command) VALUES (?)", (cmd,)
+            with self._lock:
+                rows = self._conn.execute(
+                    "SELECT command FROM history WHERE pinned != 0 ORDER BY frecency DESC"
+                ).fetchall()
+            return [row[0] for row in rows]
+        except sqlite3.Error:
+            return []
+
+    def incremental_vacuum_enabled(self) -> bool:
+        """True si la base est en auto_vacuum INCREMENTAL (créée ou compactée en v9+)."""
+        try:
+            with self._lock:
+                return self._conn.execute("PRAGMA auto_vacuum").fetchone()[0] == 2
+        except sqlite3.Error:
+            return False
+
+    def incremental_vacuum(self) -> int:
+        """
+        Rend au système les pages libres, VACUUM_STEP_PAGES à la fois.
+
+        Returns:
+            Pages libérées (0 si la base n'est pas en mode incrémental)
+        """
+        if not self.incremental_vacuum_enabled():
+            return 0
+        freed = 0
+        try:
+            while True:
+                with self._lock:
+                    before = self._conn.execute("PRAGMA freelist_count").fetchone()[0]
+                    if before == 0:
+                        return freed
+                    # executescript exécute le PRAGMA jusqu'au bout (execute
+                    # ne ferait qu'un pas : une seule page)
+                    self._conn.executescript(
+                        f"PRAGMA incremental_vacuum({self.VACUUM_STEP_PAGES})"
                     )
-                    if cursor.rowcount > 0:
-                        inserted += 1
-                        cursor.execute(
-                            "INSERT INTO history_fts (id, command) VALUES (last_insert_rowid(), ?)",
-                            (cmd,),
-                        )
-                conn.commit()
+                    after = self._conn.execute("PRAGMA freelist_count").fetchone()[0]
+                if after >= before:
+                    return freed
+                freed += before - after
+        except sqlite3.Error:
+            return freed
+
+    def vacuum(self) -> None:
+        """
+        VACUUM complet (réécrit toute la base, verrou exclusif).
+
+        Passe au passage la base en auto_vacuum INCREMENTAL : les
+        compactages suivants n'en ont plus besoin.
+        """
+        with self._lock:
+            self._conn.execute("PRAGMA auto_vacuum = INCREMENTAL")
+            self._conn.execute("VACUUM")
+
+    def checkpoint(self) -> None:
+        """Reporte le WAL dans la base et le tronque (taille disque réelle)."""
+        try:
+            with self._lock:
+                self._conn.execute("PRAGMA wal_checkpoint(TRUNCATE)").fetchall()
+        except sqlite3.Error:
+            pass
+
+    def disk_usage(self) -> int:
+        """Taille sur disque de la base et de son WAL (octets)."""
+        total = 0
+        for path in (self.db_path, self.db_path + "-wal"):
+            try:
+                total += os.path.getsize(path)
+            except OSError:
+                pass
+        return total
+
+    def last_maintenance(self, task: str) -> Optional[float]:
+        """Date (epoch) de la dernière exécution d'une tâche de maintenance."""
+        try:
+            with self._lock:
+                row = self._conn.execute(
+                    "SELECT last_run FROM maintenance WHERE task = ?", (task,)
+                ).fetchone()
+            return row[0] if row else None
+        except sqlite3.Error:
+            return None
+
+    def claim_maintenance(self, task: str, interval: float) -> bool:
+        """
+        Réserve une tâche si sa dernière exécution date d'au moins
+        `interval` secondes (atomique : un seul processus l'obtient).
+        """
+        now = time.time()
+        try:
+            with self._write() as conn:
+                row = conn.execute(
+                    "SELECT last_run FROM maintenance WHERE task = ?", (task,)
+                ).fetchone()
+                if row is not None and now - row[0] < interval:
+                    return False
+                conn.execute(
+                    "INSERT OR REPLACE INTO maintenance (task, last_run) VALUES (?, ?)",
+                    (task, now),
+                )
+            return True
+        except sqlite3.Error:
+            return False
+
+    def get_ingest_state(
+        self, path: str
+    ) -> Optional[Tuple[int, int, int, int, Optional[bytes]]]:
+        """
+        Récupère la position de lecture persistée d'un fichier d'historique.
+
+        Returns:
+            (inode, offset, size, mtime_ns, tail) ou None si jamais lu ;
+            tail (octets précédant l'offset) est None avant la migration
+        """
+        try:
+            with self._lock:
+                row = self._conn.execute(
+                    "SELECT inode, offset, size, mtime_ns, tail "
+                    "FROM ingest_state WHERE path = ?",
+                    (path,),
+                ).fetchone()
+            return (row[0], row[1], row[2], row[3], row[4]) if row else None
+        except sqlite3.Error:
+            return None
+
+    def save_ingest_state(
+        self, path: str, inode: int, offset: int, size: int, mtime_ns: int, tail: bytes
+    ) -> None:
+        """Persiste la position de lecture (octet) après ingestion."""
+        try:
+            with self._write() as conn:
+                conn.execute(
+                    "INSERT OR REPLACE INTO ingest_state "
+                    "(path, inode, offset, size, mtime_ns, tail) "
+                    "VALUES (?, ?, ?, ?, ?, ?)",
+                    (path, inode, offset, size, mtime_ns, tail),
+                )
         except sqlite3.Error:
             pass
-        return inserted
 
     def search_commands(self, query: str, limit: int) -> List[str]:
         """Recherche full-text via FTS5 (O(log n))."""
         if not query:
             return []
         try:
-            with sqlite3.connect(self.db_path) as conn:
-                cursor = conn.cursor()
-                cursor.execute(
+            with self._lock:
+                rows = self._conn.execute(
                     "SELECT command FROM history_fts WHERE history_fts MATCH ? LIMIT ?",
                     (f"{query}*", limit),
-                )
-                return [row[0] for row in cursor.fetchall()]
+                ).fetchall()
+            return [row[0] for row in rows]
         except sqlite3.Error:
             return []
 
+    def search_substring(
+        self, text: str, limit: int, by_frecency: bool = True
+    ) -> Optional[List[str]]:
+        """
+        Recherche de sous-chaîne via l'index trigramme (toute l'historique).
+
+        Args:
+            text: Fragment recherché (ex: '8000', '-it', '.yaml')
+            limit: Nombre maximum de résultats
+            by_frecency: Ordre frecency, sinon dernière utilisation (même
+                ordre que le corpus en mémoire de SEARCH_RANKING)
+
+        Returns:
+            Commandes contenant le fragment, ou None si l'index ne peut pas
+            répondre (fragment < 3 caractères, SQLite sans tokenizer
+            trigram) : l'appelant scanne en Python.
+        """
+        if not self.has_trigram or len(text) < 3:
+            return None
+        phrase = '"' + text.replace('"', '""') + '"'
+        order = "h.frecency DESC" if by_frecency else "h.last_used DESC"
+        try:
+            with self._lock:
+                rows = self._conn.execute(
+                    "SELECT h.command FROM history_trgm "
+                    "JOIN history h ON h.id = history_trgm.rowid "
+                    f"WHERE history_trgm MATCH ? ORDER BY {order} LIMIT ?",
+                    (phrase, limit),
+                ).fetchall()
+            return [row[0] for row in rows]
+        except sqlite3.Error:
+            return None
+
 
 class HistoryCache:
-    """Cache LRU en mémoire pour accès rapide (lazy)."""
+    """Corpus en mémoire (CommandStore), chargé au premier accès."""
 
-    def __init__(self, history_path: str, load_limit: int):
+    def __init__(
+        self,
+        history_path: str,
+        load_limit: int,
+        loader: Optional[Callable[[int], List[str]]] = None,
+        snapshot_path: Optional[str] = None,
+        version: Optional[Callable[[], Optional[int]]] = None,
+    ):
+        """
+        Args:
+            history_path: Fichier d'historique bash
+            load_limit: Nombre de commandes gardées en mémoire
+            loader: Source alternative (ex: DatabaseRepository.top_commands
+                pour l'ordre frecency) ; défaut : fin du fichier (récence)
+            snapshot_path: Instantané binaire du corpus (corpus_snapshot),
+                relu par mmap tant que la source n'a pas changé ; None = aucun
+            version: Compteur de modifications de la source du loader
+                (DatabaseRepository.corpus_version) ; sans lui, pas
+                d'instantané en mode loader
+        """
         self.history_path = os.path.expanduser(history_path)
         self.load_limit = load_limit
-        self._commands: Optional[List[str]] = None
+        self.loader = loader
+        self.snapshot_path = snapshot_path
+        self.version = version
+        # Store en mémoire ou sur l'instantané mmap (lecture seule)
+        self._commands: Optional[CommandStore] = None
+        # Incrémenté à chaque changement : clé des caches dérivés (SearchEngine)
+        self.generation = 0
+        self._lock = threading.RLock()
 
     @property
-    def commands(self) -> List[str]:
-        """Getter lazy : charge si besoin via méthode cached."""
-        return self._get_commands()
-
-    @lru_cache(maxsize=1)
-    def _get_commands(self) -> List[str]:
-        """Méthode interne cached pour load lazy."""
-        if self._commands is None:
-            self._load()
-        assert self._commands is not None, "Cache load failed"
-        return self._commands.copy()
+    def commands(self) -> CommandStore:
+        """
+        Corpus, chargé si besoin. Immuable : partagé sans copie, un
+        changement remplace le store (et incrémente la génération).
+        """
+        with self._lock:
+            if self._commands is None:
+                self._load()
+            assert self._commands is not None, "Cache load failed"
+            return self._commands
 
     def _load(self) -> None:
-        """Charge lazy depuis fichier (garde dernière occurrence)."""
+        """
+        Charge lazy : instantané mmap s'il est à jour, sinon la source
+        (DB ou fichier), puis réécrit l'instantané.
+        """
+        key = self._source_key() if self.snapshot_path else None
+        if key is not None:
+            snapshot = open_snapshot(self.snapshot_path, self.load_limit, key)
+            if snapshot is not None:
+                self._commands = snapshot
+                return
+
+        self._commands = CommandStore.from_commands(self._load_source())
+        # Clé lue AVANT la source : si elle a changé entre-temps, l'instantané
+        # sera simplement réécrit au prochain chargement
+        if key is not None:
+            write_snapshot(self.snapshot_path, self._commands, self.load_limit, key)
+
+    def _source_key(self) -> Optional[SourceKey]:
+        """
+        Identifie l'état de la source : (mode, ...) ; None = pas d'instantané.
+
+        Loader : compteur de modifications de la base. Fichier : inode,
+        taille et mtime de l'historique.
+        """
+        if self.loader is not None:
+            version = self.version() if self.version is not None else None
+            return None if version is None else (1, version, 0, 0)
+        try:
+            stat = os.stat(self.history_path)
+        except OSError:
+            return None
+        return (0, stat.st_ino, stat.st_size, stat.st_mtime_ns)
+
+    def _load_source(self) -> Iterable[str]:
+        """Charge depuis la source (garde dernière occurrence)."""
+        if self.loader is not None:
+            return self.loader(self.load_limit)
         if not os.path.exists(self.history_path):
-            self._commands = []
-            return
+            return []
         try:
-            with open(self.history_path, "r", encoding="utf-8") as f:
-                lines = f.readlines()
-                recent_lines = lines[-self.load_limit :]
-                cleaned = [line.strip() for line in recent_lines if line.strip()]
-                # Inverse AVANT déduplication pour garder la dernière occurrence
-                self._commands = list(dict.fromkeys(reversed(cleaned)))
+            recent_lines = self._read_last_lines(self.load_limit)
+            # Lignes "#<epoch>" (HISTTIMEFORMAT) : horodatages, pas des commandes
+            cleaned = [
+                line.strip()
+                for line in recent_lines
+                if line.strip() and not (line[:1] == "#" and line[1:].strip().isdigit())
+            ]
+            del recent_lines
+            # Inverse AVANT déduplication pour garder la dernière occurrence
+            return dict.fromkeys(reversed(cleaned)).keys()
         except IOError:
-            self._commands = []
+            return []
 
-    def add_command(self, command: str) -> None:
-        """Ajoute au cache (invalide LRU)."""
-        self.commands  # Force load
-        if self._commands is not None and command not in self._commands:
-            self._commands.insert(0, command)
-            self._commands = self._commands[: self.load_limit]
-        self._get_commands.cache_clear()
+    def _read_last_lines(self, count: int) -> List[str]:
+        """
+        Lit les `count` dernières lignes en remontant depuis la fin du fichier.
 
-    def invalidate(self) -> None:
-        """Force reload sur changement."""
-        self._commands = None
-        self._get_commands.cache_clear()
+        Coût proportionnel à load_limit, pas à la taille de l'historique :
+        chaque bloc est lu et compté une seule fois, concaténé à la fin.
+        """
+        block_size = 64 * 1024
+        blocks: List[bytes] = []
+        newlines = 0
+        with open(self.history_path, "rb") as f:
+            f.seek(0, os.SEEK_END)
+            position = f.tell()
+            while position > 0 and newlines <= count:
+                step = min(block_size, position)
+                position -= step
+                f.seek(position)
+                block = f.read(step)
+                blocks.append(block)
+                newlines += block.count(b"\n")
 
+        data = b"".join(reversed(blocks))
+        lines = data.decode("utf-8", errors="replace").splitlines()
+        if position > 0:
+            lines = lines[1:]  # Première ligne potentiellement tronquée
+        return lines[-count:] if count > 0 else []
 
-class HistoryMonitor:
-    """Surveille les changements en thread (non-bloquant)."""
+    def snapshot(self) -> Tuple[int, CommandStore]:
+        """
+        Retourne (génération, commandes) de façon cohérente.
 
-    def __init__(self, history_path: str, interval: int, callback):
-        self.history_path = os.path.expanduser(history_path)
-        self.interval = interval
-        self.callback = callback
-        self.last_mtime = 0
-        self._running = False
-        self._thread: Optional[threading.Thread] = None
-
-    def start(self) -> None:
-        """Démarre la surveillance en thread."""
-        if self._running:
-            return
-        self._running = True
-        self._thread = threading.Thread(target=self._monitor_loop, daemon=True)
-        self._thread.start()
-
-    def stop(self) -> None:
-        """Arrête la surveillance."""
-        self._running = False
-        if self._thread:
-            self._thread.join(timeout=1)
-
-    def _monitor_loop(self) -> None:
-        """Boucle de surveillance en thread."""
-        while self._running:
-            if os.path.exists(self.history_path):
-                try:
-                    current_mtime = os.path.getmtime(self.history_path)
-                    if current_mtime > self.last_mtime:
-                        self.last_mtime = current_mtime
-                        self.callback()
-                except OSError:
-                    pass
-            time.sleep(self.interval)
+        La génération identifie exactement cette liste : deux snapshots de
+        même génération ont le même contenu.
+        """
+        with self._lock:
+            return self.generation, self.commands
+
+    def add_command(self, command: str) -> None:
+        """Ajoute en tête du corpus (nouveau store, nouvelle génération)."""
+        with self._lock:
+            commands = self.commands  # Force load
+            if command not in commands:
+                self._commands = CommandStore.from_commands(
+                    [command, *commands[: self.load_limit - 1]]
+                )
+            self.generation += 1
+
+    def invalidate(self) -> None:
+        """Force reload sur changement."""
+        with self._lock:
+            self._commands = None
+            self.generation += 1
 
 
 class HistoryManager:
     """
-    Gestionnaire principal (threaded monitor, SQL-first pour perf).
+    Gestionnaire principal (surveillance en thread, SQL-first pour perf).
     """
 
     def __init__(
-        self, db_path: str, history_path: str, load_limit: int, monitor_interval: int
+        self,
+        db_path: str,
+        history_path: str,
+        load_limit: int,
+        monitor_interval: int,
+        ranking: str = "recency",
+        recorder=None,
+        watch: bool = False,
     ):
+        """
+        Args:
+            ranking: "frecency" (corpus lu depuis l'index frecency de la DB)
+                ou "recency" (ordre du fichier d'historique)
+            recorder: CommandRecorder dont le spool est versé en DB à
+                chaque chargement (None = pas de hook `rapidstory record`)
+            watch: Surveille le fichier dès maintenant (processus longs :
+                démon, usage en bibliothèque) ; cf. start_watching()
+        """
         self.db = DatabaseRepository(db_path)
-        self.cache = HistoryCache(history_path, load_limit)
-        self.monitor = HistoryMonitor(
-            history_path, monitor_interval, self._on_history_changed
+        self.recorder = recorder
+        self.ranking = ranking
+        loader = self.db.top_commands if ranking == "frecency" else None
+        self.cache = HistoryCache(
+            history_path,
+            load_limit,
+            loader,
+            snapshot_path=os.path.splitext(self.db.db_path)[0] + ".corpus",
+            version=self.db.corpus_version,
+        )
+        self.monitor_interval = monitor_interval
+        self.monitor = None  # InotifyWatcher | HistoryMonitor une fois démarré
+        self._scoped_cache: Optional[Tuple[Tuple[int, str, str, int], List[str]]] = None
+        # Le monitor et l'appelant peuvent ingérer en même temps : un seul
+        # lecteur à la fois, sinon la même tranche serait comptée deux fois
+        self._ingest_lock = threading.Lock()
+        if watch:
+            self.start_watching()
+
+    def start_watching(self) -> None:
+        """
+        Surveille le fichier d'historique (inotify, sinon scrutation).
+
+        Inutile pour une session Ctrl+R de quelques secondes : réservé aux
+        processus qui vivent longtemps.
+        """
+        if self.monitor is not None:
+            return
+        self.monitor = create_history_watcher(
+            self.cache.history_path, self.monitor_interval, self._on_history_changed
         )
         self.monitor.start()
 
+    def stop_watching(self) -> None:
+        """Arrête la surveillance (sans effet si non démarrée)."""
+        if self.monitor is not None:
+            self.monitor.stop()
+            self.monitor = None
+
+    INGEST_BATCH_SIZE = 5000
+    # Octets relus avant l'offset pour reconnaître le fichier déjà ingéré
+    INGEST_TAIL_BYTES = 64
+
     def load_from_file(self) -> None:
-        """Charge depuis fichier vers DB/cache, avec dédup."""
-        self.cache.invalidate()
-        commands_set: Set[str] = set(self.cache.commands)  # Dédupe early
-        self.db.insert_commands_batch(commands_set)
+        """Charge depuis fichier vers DB/cache (seulement la partie ajoutée)."""
+        with self._ingest_lock:
+            self.cache.invalidate()
+            self.flush_records()
+            self._ingest_tail()
+
+    def flush_records(self) -> int:
+        """Verse en DB les exécutions en attente dans le spool du hook."""
+        if self.recorder is None:
+            return 0
+        return self.db.insert_records(self.recorder.drain())
+
+    def _ingest_tail(self) -> int:
+        """
+        Ingère en DB uniquement les lignes ajoutées depuis la dernière lecture.
+
+        Relecture complète si le fichier a été tronqué, remplacé (inode
+        différent, taille inférieure à celle persistée) ou réécrit sur place :
+        les octets précédant l'offset ne sont plus ceux lus la dernière fois.
+
+        Returns:
+            Nombre de nouvelles commandes insérées
+        """
+        path = self.cache.history_path
+        try:
+            stat = os.stat(path)
+        except OSError:
+            return 0
+
+        state = self.db.get_ingest_state(path)
+        if state is not None:
+            inode, offset, size, mtime_ns, tail = state
+            # Inchangé depuis la dernière lecture : aucune E/S
+            if (inode, size, mtime_ns) == (stat.st_ino, stat.st_size, stat.st_mtime_ns):
+                return 0
+
+        # Sans horodatage dans le fichier : la position donne l'ordre
+        # (1 µs par octet avant la fin du fichier). Les commandes multi-lignes
+        # (lithist) restent une commande par ligne : cf. `rapidstory import`
+        now = time.time()
+
+        inserted = 0
+        stamp: Optional[float] = None  # Dernier "#<epoch>" (HISTTIMEFORMAT)
+        batch: List[Tuple[str, float]] = []
+        try:
+            with open(path, "rb") as f:
+                start = 0
+                if (
+                    state is not None
+                    and inode == stat.st_ino
+                    and offset <= size <= stat.st_size
+                    and (tail is None or self._read_tail(f, offset) == tail)
+                ):
+                    start = offset
+                # Relecture d'un fichier réécrit (rotation) : ne pas recompter les runs
+                count_runs = state is None or start > 0
+
+                offset = start
+                f.seek(start)
+                for raw in f:
+                    if not raw.endswith(b"\n"):
+                        break  # Ligne en cours d'écriture : relue au prochain passage
+                    offset += len(raw)
+                    match = BASH_TIMESTAMP.fullmatch(raw.rstrip(b"\r\n"))
+                    if match:
+                        stamp = float(match.group(1))
+                        continue
+                    command = raw.decode("utf-8", errors="replace").strip()
+                    if command:
+                        # Lignes suivantes d'une commande multi-ligne : même date
+                        if stamp is not None:
+                            batch.append((command, stamp))
+                        else:
+                            batch.append(
+                                (command, now - (stat.st_size - offset) * 1e-6)
+                            )
+                    if len(batch) >= self.INGEST_BATCH_SIZE:
+                        inserted += self.db.insert_entries(batch, count_runs)
+                        batch.clear()
+                tail = self._read_tail(f, offset)
+        except IOError:
+            return inserted
+
+        if batch:
+            inserted += self.db.insert_entries(batch, count_runs)
+
+        # Lignes ajoutées pendant la lecture : size >= offset ; la mtime
+        # d'avant lecture ne correspondra plus, d'où un nouveau passage
+        self.db.save_ingest_state(
+            path, stat.st_ino, offset, max(stat.st_size, offset), stat.st_mtime_ns, tail
+        )
+        return inserted
+
+    def _read_tail(self, f, offset: int) -> bytes:
+        """Derniers INGEST_TAIL_BYTES octets avant offset."""
+        begin = max(0, offset - self.INGEST_TAIL_BYTES)
+        f.seek(begin)
+        return f.read(offset - begin)
 
     def get_commands(
         self, use_sql: bool = True, query: Optional[str] = None, limit: int = 1000
-    ) -> List[str]:
-        """Retourne commandes : SQL si query, sinon cache LRU."""
+    ) -> Sequence[str]:
+        """Retourne commandes : SQL si query, sinon corpus en mémoire (vue)."""
         if query and use_sql:
             return self.db.search_commands(query, limit)
         return self.cache.commands[:limit]
 
+    def get_corpus(self, limit: Optional[int] = None) -> Tuple[int, Sequence[str]]:
+        """
+        Retourne le corpus de recherche avec sa génération.
+
+        Args:
+            limit: Troncature éventuelle (vue, sans copie) ; None = tout le
+                corpus chargé, soit HISTORY_LOAD_LIMIT commandes
+
+        Returns:
+            (génération, commandes) : la génération permet au moteur de
+            réutiliser son prétraitement tant que l'historique ne change pas
+        """
+        generation, commands = self.cache.snapshot()
+        return generation, commands if limit is None else commands[:limit]
+
+    def get_scoped_corpus(
+        self, scope: Tuple[str, str], limit: Optional[int] = None
+    ) -> Tuple[Tuple[int, str, str, int], List[str]]:
+        """
+        Corpus restreint à une portée (dossier, sous-arbre, dépôt).
+
+        Args:
+            scope: Filtre ("exact" | "prefix", chemin), cf. ScopeResolver
+            limit: Taille maximale (défaut : load_limit, comme le corpus global)
+
+        Returns:
+            (génération, commandes) : génération propre à la portée
+        """
+        kind, path = scope
+        if limit is None:
+            limit = self.cache.load_limit
+        generation = (self.cache.generation, kind, path, limit)
+        cached = self._scoped_cache
+        if cached is None or cached[0] != generation:
+            commands = self.db.scoped_commands(
+                kind, path, limit, by_frecency=self.ranking == "frecency"
+            )
+            cached = self._scoped_cache = (generation, commands)
+        return cached
+
+    def record_selection(self, command: str) -> None:
+        """Enregistre le choix d'une commande (frecency) et rafraîchit le corpus."""
+        self.db.record_selection(command)
+        if self.cache.loader is not None:
+            self.cache.invalidate()
+
     def _on_history_changed(self) -> None:
-        """Callback sur changement."""
-        self.load_from_file()
+        """
+        Callback sur changement : lecture incrémentale de la fin du fichier.
+
+        Le corpus en mémoire est invalidé dès que la base a changé
+        (corpus_version) : nouvelle commande, mais aussi commande relancée
+        (last_used, frecency, donc ordre). Réécriture à l'identique,
+        lignes vides... : rien à faire.
+        """
+        with self._ingest_lock:
+            before = self.db.corpus_version()
+            self.flush_records()
+            self._ingest_tail()
+            after = self.db.corpus_version()
+            if before is None or after != before:
+                self.cache.invalidate()
@@ -0,0 +1,171 @@
+import os
+import select
+import struct
+import threading
+from typing import Callable, Optional
+
+# Masques inotify (linux/inotify.h)
+IN_MODIFY = 0x00000002
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_NONBLOCK = 0o4000
+IN_CLOEXEC = 0o2000000
+
+# Le dossier parent est surveillé : bash réécrit parfois l'historique par
+# renommage (troncature HISTFILESIZE), ce qui change l'inode du fichier
+WATCH_MASK = IN_MODIFY | IN_CLOSE_WRITE | IN_MOVED_TO | IN_CREATE
+
+# struct inotify_event : wd, mask, cookie, len (+ nom sur `len` octets)
+_EVENT_HEADER = struct.Struct("iIII")
+
+
+class HistoryMonitor:
+    """
+    Surveillance par scrutation (repli sans inotify : macOS, BSD...).
+
+    Vérifie le mtime toutes les `interval` secondes.
+    """
+
+    def __init__(self, history_path: str, interval: int, callback: Callable[[], None]):
+        self.history_path = os.path.expanduser(history_path)
+        self.interval = interval
+        self.callback = callback
+        self.last_mtime = 0.0
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> None:
+        """Démarre la surveillance en thread (l'état actuel sert de référence)."""
+        if self._thread is not None:
+            return
+        try:
+            self.last_mtime = os.path.getmtime(self.history_path)
+        except OSError:
+            self.last_mtime = 0.0
+        self._thread = threading.Thread(target=self._monitor_loop, daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        """Arrête la surveillance."""
+        self._stop.set()
+        if self._thread:
+            self._thread.join(timeout=1)
+
+    def _monitor_loop(self) -> None:
+        """Boucle de surveillance en thread."""
+        while not self._stop.wait(self.interval):
+            try:
+                current_mtime = os.path.getmtime(self.history_path)
+            except OSError:
+                continue
+            if current_mtime > self.last_mtime:
+                self.last_mtime = current_mtime
+                self.callback()
+
+
+class InotifyWatcher:
+    """
+    Surveillance événementielle via inotify (Linux, ctypes).
+
+    Le thread dort dans select() jusqu'à une écriture sur le fichier :
+    aucun réveil périodique. Une rafale d'événements (bash écrit
+    l'historique en plusieurs write) ne déclenche qu'un seul callback.
+    """
+
+    # Regroupe les événements arrivant dans ce délai (secondes)
+    DEBOUNCE = 0.05
+
+    def __init__(self, history_path: str, callback: Callable[[], None]):
+        """
+        Raises:
+            OSError: inotify indisponible (non-Linux, limite de watches...)
+        """
+        import ctypes
+        import ctypes.util
+
+        self.history_path = os.path.expanduser(history_path)
+        self.callback = callback
+        self._name = os.fsencode(os.path.basename(self.history_path))
+
+        libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+        if not hasattr(libc, "inotify_init1"):
+            raise OSError("inotify indisponible")
+        self._fd = libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if self._fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1")
+
+        directory = os.path.dirname(self.history_path) or "."
+        if libc.inotify_add_watch(self._fd, os.fsencode(directory), WATCH_MASK) < 0:
+            errno = ctypes.get_errno()
+            os.close(self._fd)
+            raise OSError(errno, f"inotify_add_watch {directory}")
+
+        # Réveil du select() à l'arrêt
+        self._wake_r, self._wake_w = os.pipe()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> None:
+        """Démarre la surveillance en thread."""
+        if self._thread is not None:
+            return
+        self._thread = threading.Thread(target=self._watch_loop, daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        """Arrête la surveillance et libère les descripteurs."""
+        if self._thread is not None:
+            os.write(self._wake_w, b"x")
+            self._thread.join(timeout=1)
+            self._thread = None
+        for fd in (self._fd, self._wake_r, self._wake_w):
+            try:
+                os.close(fd)
+            except OSError:
+                pass
+
+    def _watch_loop(self) -> None:
+        """Attend les événements ; callback une fois par rafale."""
+        while True:
+            ready = select.select([self._fd, self._wake_r], [], [])[0]
+            if self._wake_r in ready:
+                return
+            if not self._drain_events():
+                continue
+            # Fin de rafale : plus rien pendant DEBOUNCE
+            while select.select([self._fd], [], [], self.DEBOUNCE)[0]:
+                self._drain_events()
+            self.callback()
+
+    def _drain_events(self) -> bool:
+        """Lit les événements en attente ; True si l'un concerne l'historique."""
+        try:
+            data = os.read(self._fd, 64 * 1024)
+        except BlockingIOError:
+            return False
+
+        relevant = False
+        offset = 0
+        while offset + _EVENT_HEADER.size <= len(data):
+            _, _, _, length = _EVENT_HEADER.unpack_from(data, offset)
+            offset += _EVENT_HEADER.size
+            name = data[offset : offset + length].rstrip(b"\0")
+            offset += length
+            if name == self._name:
+                relevant = True
+        return relevant
+
+
+def create_history_watcher(
+    history_path: str, interval: int, callback: Callable[[], None]
+):
+    """
+    Surveillance de l'historique : inotify si disponible, sinon scrutation.
+
+    Returns:
+        InotifyWatcher ou HistoryMonitor (méthodes start() / stop())
+    """
+    try:
+        return InotifyWatcher(history_path, callback)
+    except (OSError, AttributeError):
+        return HistoryMonitor(history_path, interval, callback)
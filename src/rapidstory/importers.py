@@ -0,0 +1,256 @@
+import os
+import re
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+# Ligne d'horodatage écrite par bash quand HISTTIMEFORMAT est défini
+BASH_TIMESTAMP = re.compile(rb"#(\d+)")
+
+# Historique étendu zsh : ": <début>:<durée>;<commande>" (durée ignorée :
+# 0 sauf avec INC_APPEND_HISTORY_TIME)
+_ZSH_EXTENDED = re.compile(r": *(\d+):(\d+);(.*)", re.S)
+
+# Octet "meta" de zsh : l'octet suivant est stocké XOR 0x20
+_ZSH_META = 0x83
+
+_FISH_ESCAPES = re.compile(r"\\(.)")
+
+SQLITE_MAGIC = b"SQLite format 3\0"
+
+IMPORT_CHUNK_SIZE = 5000
+
+# Une entrée importée : "command", "timestamp" (epoch) et, si la source les
+# fournit, les métadonnées de `rapidstory record` (cwd, exit_status...)
+Entry = Dict[str, Any]
+
+
+def _decode(raw: bytes) -> str:
+    return raw.decode("utf-8", errors="replace")
+
+
+def _position_clock(path: str) -> Callable[[int], float]:
+    """
+    Horodatage de repli pour les lignes sans date : la position donne
+    l'ordre (1 µs par octet avant la fin du fichier, comme l'ingestion).
+
+    Ancré sur la date de modification du fichier, pas sur l'heure de
+    l'import : un vieil historique importé ne passe pas devant les
+    commandes récentes de l'utilisateur.
+    """
+    stat = os.stat(path)
+    end, size = stat.st_mtime, stat.st_size
+    return lambda offset: end - (size - offset) * 1e-6
+
+
+def parse_bash(path: str) -> Iterator[Entry]:
+    """
+    Historique bash, avec ou sans HISTTIMEFORMAT.
+
+    Une ligne "#<epoch>" horodate la commande qui suit ; avec lithist, une
+    commande multi-ligne s'étend jusqu'à l'horodatage suivant. Sans
+    horodatage, une ligne = une commande.
+    """
+    clock = _position_clock(path)
+    offset = 0
+    timestamp: Optional[float] = None
+    lines: List[str] = []
+
+    with open(path, "rb") as f:
+        for raw in f:
+            offset += len(raw)
+            stripped = raw.rstrip(b"\r\n")
+            match = BASH_TIMESTAMP.fullmatch(stripped)
+            if match:
+                command = "\n".join(lines).strip()
+                if command:
+                    yield {"command": command, "timestamp": timestamp}
+                lines = []
+                timestamp = float(match.group(1))
+            elif timestamp is not None:
+                lines.append(_decode(stripped))
+            else:
+                command = _decode(stripped).strip()
+                if command:
+                    yield {"command": command, "timestamp": clock(offset)}
+
+    command = "\n".join(lines).strip()
+    if command:
+        yield {"command": command, "timestamp": timestamp}
+
+
+def _zsh_unmetafy(raw: bytes) -> bytes:
+    """Décode les octets "metafiés" de ~/.zsh_history."""
+    if _ZSH_META not in raw:
+        return raw
+    out = bytearray()
+    meta = False
+    for byte in raw:
+        if byte == _ZSH_META:
+            meta = True
+            continue
+        out.append(byte ^ 0x20 if meta else byte)
+        meta = False
+    return bytes(out)
+
+
+def parse_zsh(path: str) -> Iterator[Entry]:
+    """
+    Historique zsh, format simple ou étendu (EXTENDED_HISTORY).
+
+    Les commandes multi-lignes sont écrites avec un "\\" en fin de ligne.
+    """
+    clock = _position_clock(path)
+    offset = 0
+    pending = ""
+
+    with open(path, "rb") as f:
+        for raw in f:
+            offset += len(raw)
+            line = _decode(_zsh_unmetafy(raw.rstrip(b"\r\n")))
+            if line.endswith("\\"):
+                pending += line[:-1] + "\n"
+                continue
+            line, pending = pending + line, ""
+
+            match = _ZSH_EXTENDED.fullmatch(line)
+            if match:
+                command = match.group(3).strip()
+                if command:
+                    yield {"command": command, "timestamp": float(match.group(1))}
+            elif line.strip():
+                yield {"command": line.strip(), "timestamp": clock(offset)}
+
+    if pending.strip():
+        yield {"command": pending.strip(), "timestamp": clock(offset)}
+
+
+def _fish_unescape(text: str) -> str:
+    return _FISH_ESCAPES.sub(
+        lambda m: {"n": "\n", "\\": "\\"}.get(m.group(1), m.group(0)), text
+    )
+
+
+def parse_fish(path: str) -> Iterator[Entry]:
+    """
+    Historique fish (pseudo-YAML) :
+
+        - cmd: git status
+          when: 1700000000
+          paths: ...
+    """
+    clock = _position_clock(path)
+    offset = 0
+    command: Optional[str] = None
+    timestamp: Optional[float] = None
+
+    with open(path, "rb") as f:
+        for raw in f:
+            offset += len(raw)
+            line = _decode(raw.rstrip(b"\r\n"))
+            if line.startswith("- cmd: "):
+                if command:
+                    yield {"command": command, "timestamp": timestamp or clock(offset)}
+                command = _fish_unescape(line[len("- cmd: ") :]).strip()
+                timestamp = None
+            elif line.startswith("  when: "):
+                try:
+                    timestamp = float(line[len("  when: ") :])
+                except ValueError:
+                    pass
+
+    if command:
+        yield {"command": command, "timestamp": timestamp or clock(offset)}
+
+
+def parse_atuin(path: str) -> Iterator[Entry]:
+    """
+    Base SQLite d'Atuin (history.db), lue en lecture seule par curseur.
+
+    Horodatage et durée en nanosecondes ; -1 = inconnu.
+    """
+    import sqlite3
+    from urllib.parse import quote
+
+    conn = sqlite3.connect(f"file:{quote(os.path.abspath(path))}?mode=ro", uri=True)
+    try:
+        columns = {row[1] for row in conn.execute("PRAGMA table_info(history)")}
+        where = "WHERE deleted_at IS NULL" if "deleted_at" in columns else ""
+        cursor = conn.execute(
+            "SELECT command, timestamp, cwd, exit, duration, hostname, session "
+            f"FROM history {where} ORDER BY timestamp"
+        )
+        for command, timestamp, cwd, exit_status, duration, hostname, session in cursor:
+            command = (command or "").strip()
+            if not command:
+                continue
+            yield {
+                "command": command,
+                "timestamp": timestamp / 1e9,
+                "cwd": cwd if cwd and cwd != "unknown" else None,
+                "exit_status": exit_status if exit_status != -1 else None,
+                "duration": duration / 1e9 if duration and duration > 0 else None,
+                # "hôte:utilisateur"
+                "hostname": hostname.split(":", 1)[0] if hostname else None,
+                "session": session,
+            }
+    finally:
+        conn.close()
+
+
+PARSERS: Dict[str, Callable[[str], Iterator[Entry]]] = {
+    "bash": parse_bash,
+    "zsh": parse_zsh,
+    "fish": parse_fish,
+    "atuin": parse_atuin,
+}
+
+
+def detect_format(path: str) -> str:
+    """Devine le format d'un fichier d'historique (nom, puis contenu)."""
+    with open(path, "rb") as f:
+        head = f.read(4096)
+    if head.startswith(SQLITE_MAGIC):
+        return "atuin"
+    name = os.path.basename(path)
+    if "fish" in name or head.startswith(b"- cmd: "):
+        return "fish"
+    if "zsh" in name or re.match(rb": *\d+:\d+;", head):
+        return "zsh"
+    return "bash"
+
+
+def import_history(
+    db, path: str, fmt: Optional[str] = None, chunk_size: int = IMPORT_CHUNK_SIZE
+) -> Tuple[int, int]:
+    """
+    Importe un historique par lots (mémoire bornée à `chunk_size` entrées).
+
+    Chaque entrée compte une exécution à sa date réelle ; les métadonnées
+    (Atuin : dossier, code retour...) suivent via insert_records.
+
+    Args:
+        db: DatabaseRepository cible
+        fmt: "bash" | "zsh" | "fish" | "atuin" (None = détection)
+
+    Returns:
+        (entrées lues, nouvelles commandes)
+    """
+    parser = PARSERS[fmt or detect_format(path)]
+    read = inserted = 0
+    chunk: List[Entry] = []
+
+    def flush() -> int:
+        count = db.insert_entries((e["command"], e["timestamp"]) for e in chunk)
+        with_metadata = [e for e in chunk if len(e) > 2]
+        if with_metadata:
+            db.insert_records(with_metadata)
+        chunk.clear()
+        return count
+
+    for entry in parser(path):
+        chunk.append(entry)
+        read += 1
+        if len(chunk) >= chunk_size:
+            inserted += flush()
+    if chunk:
+        inserted += flush()
+    return read, inserted
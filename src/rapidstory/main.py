@@ -1,16 +1,31 @@
 import sys
-import logging
-from datetime import datetime
+import time
+from typing import List, Optional
 
-from .rapidstory_full import RapidStoryFull
-from .rapidstory_inline import RapidStoryInline
+from .startup_profile import profiler
 
+# Origine de --profile-startup (imports de rapidstory.main compris)
+_IMPORT_START = time.perf_counter()
 
-def setup_logging(debug: bool = False):
-    """Configure le logging dans un fichier /tmp/ avec niveau DEBUG si activé."""
-    log_file = f"/tmp/rapidstory_debug_{datetime.now().strftime('%Y%m%d_%H%M%S')}.log"
+
+def setup_logging(debug: bool = False) -> Optional[str]:
+    """
+    Configure le logging DEBUG dans un fichier /tmp/ (mode --debug seulement).
+
+    Sans --debug : ni fichier de log ni import de logging ; les erreurs
+    fatales sont écrites sur stderr par _run_app.
+
+    Returns:
+        Chemin du fichier de log ou None
+    """
+    if not debug:
+        return None
+
+    import logging
+
+    log_file = f"/tmp/rapidstory_debug_{time.strftime('%Y%m%d_%H%M%S')}.log"
     logging.basicConfig(
-        level=logging.DEBUG if debug else logging.ERROR,
+        level=logging.DEBUG,
         format="%(asctime)s - %(levelname)s - %(message)s",
         handlers=[
             logging.FileHandler(log_file),
@@ -22,52 +37,375 @@ def setup_logging(debug: bool = False):
 
 def run_full_mode(debug: bool):
     """Lance le mode full-screen (Ctrl+R)."""
+    from .rapidstory_full import RapidStoryFull
+
+    profiler.mark("imports")
+    _run_app(RapidStoryFull, "full", debug)
+
+
+def run_inline_mode(debug: bool):
+    """Lance le mode inline (Ctrl+Up)."""
+    from .rapidstory_inline import RapidStoryInline
+
+    profiler.mark("imports")
+    _run_app(RapidStoryInline, "inline", debug)
+
+
+def _run_app(app_class, mode: str, debug: bool):
+    """Exécute un mode TTY et transmet la commande choisie à bash."""
     log_file = setup_logging(debug)
-    logger = logging.getLogger(__name__)
-    logger.info("Debug: Initialisation RapidStoryFull...")
+    log = _debug_log if debug else _no_log
+    log(f"Debug: Initialisation {app_class.__name__}...")
 
     try:
-        app = RapidStoryFull()
-        logger.info("Debug: Lancement run()...")
+        app = app_class()
+        log("Debug: Lancement run()...")
         result = app.run()
+        profiler.report()  # Après cleanup de l'UI : visible dans le terminal
 
         if result:
             command, execute_directly = result
             _output_command(command, execute_directly)
-            logger.info(f"Debug: Commande sélectionnée : {command}")
+            log(f"Debug: Commande sélectionnée : {command}")
         else:
-            logger.info("Debug: Aucune commande sélectionnée.")
+            log("Debug: Aucune commande sélectionnée.")
 
     except Exception:
-        logger.error("Erreur en mode full:", exc_info=True)
+        if debug:
+            import logging
+
+            logging.getLogger(__name__).error(f"Erreur en mode {mode}:", exc_info=True)
+        else:
+            import traceback
+
+            sys.stderr.write(f"Erreur en mode {mode}:\n")
+            traceback.print_exc()
         sys.exit(1)
     finally:
-        logger.info(f"Debug: Logs écrits dans {log_file}")
+        if log_file:
+            log(f"Debug: Logs écrits dans {log_file}")
 
 
-def run_inline_mode(debug: bool):
-    """Lance le mode inline (Ctrl+Up)."""
+def _debug_log(message: str) -> None:
+    """Message de debug (logging configuré par setup_logging)."""
+    import logging
+
+    logging.getLogger(__name__).info(message)
+
+
+def _no_log(message: str) -> None:
+    """Sans --debug : aucun log."""
+
+
+def run_serve_mode(debug: bool):
+    """Lance le démon de recherche (`rapidstory serve`)."""
+    import signal
+
+    import logging
+
+    from .utils import ConfigLoader
+    from .service import SearchService
+    from .daemon import SearchServer
+
     log_file = setup_logging(debug)
     logger = logging.getLogger(__name__)
-    logger.info("Debug: Initialisation RapidStoryInline...")
 
+    config = ConfigLoader()
     try:
-        app = RapidStoryInline()
-        logger.info("Debug: Lancement run()...")
-        result = app.run()
+        server = SearchServer(
+            config.get("DAEMON_SOCKET_PATH"), SearchService(config, watch=True)
+        )
+    except (RuntimeError, OSError) as e:
+        sys.stderr.write(f"rapidstory serve : {e}\n")
+        sys.exit(1)
 
-        if result:
-            command, execute_directly = result
-            _output_command(command, execute_directly)
-            logger.info(f"Debug: Commande sélectionnée : {command}")
+    # SIGTERM → sortie propre (suppression du socket)
+    signal.signal(signal.SIGTERM, lambda *_: sys.exit(0))
+    logger.info(f"Debug: Démon à l'écoute sur {server.socket_path}")
+
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        if log_file:
+            logger.info(f"Debug: Logs écrits dans {log_file}")
+
+
+def run_index_command(args: List[str]):
+    """Maintenance de l'index FTS5 (`rapidstory index --rebuild|--optimize|--check`)."""
+    from .utils import ConfigLoader
+    from .database import DatabaseRepository
+
+    db = DatabaseRepository(ConfigLoader().get("DB_PATH"))
+    try:
+        if "--rebuild" in args:
+            db.rebuild_index()
+            print("Index FTS5 reconstruit.")
+        elif "--optimize" in args:
+            db.optimize_index()
+            print("Index FTS5 optimisé.")
+        elif "--check" in args:
+            if not db.check_index():
+                print("Index FTS5 corrompu : lancez `rapidstory index --rebuild`.")
+                sys.exit(1)
+            print("Index FTS5 intègre.")
         else:
-            logger.info("Debug: Aucune commande sélectionnée.")
+            sys.stderr.write("Usage : rapidstory index --rebuild|--optimize|--check\n")
+            sys.exit(2)
+    finally:
+        db.close()
 
-    except Exception:
-        logger.error("Erreur en mode inline:", exc_info=True)
-        sys.exit(1)
+
+def run_record_command(args: List[str]):
+    """
+    Capture une exécution depuis le hook shell (`rapidstory record`).
+
+    Usage : rapidstory record [--cwd DIR] [--status N] [--duration S]
+                              [--start EPOCH] [--hostname H] [--session ID]
+                              -- COMMANDE
+
+    --start (début de la commande, ex: $EPOCHREALTIME) remplace --duration
+    quand le shell ne sait pas soustraire des flottants.
+
+    Chemin critique (après chaque commande) : append dans le spool ;
+    sqlite3 n'est chargé que pour verser un lot complet.
+    """
+    from .utils import ConfigLoader
+    from .recorder import CommandRecorder, build_record
+
+    options = {}
+    command_words: List[str] = []
+    i = 0
+    try:
+        while i < len(args):
+            if args[i] == "--":
+                command_words = args[i + 1 :]
+                break
+            if args[i] in (
+                "--cwd",
+                "--status",
+                "--duration",
+                "--start",
+                "--hostname",
+                "--session",
+            ):
+                options[args[i][2:]] = args[i + 1]
+                i += 2
+            else:
+                command_words = args[i:]
+                break
+        if "start" in options and "duration" not in options:
+            start = float(options["start"].replace(",", "."))  # Locale décimale
+            options["duration"] = str(max(0.0, time.time() - start))
+        record = build_record(
+            " ".join(command_words),
+            cwd=options.get("cwd"),
+            exit_status=int(options["status"]) if "status" in options else None,
+            duration=float(options["duration"]) if "duration" in options else None,
+            hostname=options.get("hostname"),
+            session=options.get("session"),
+        )
+    except (IndexError, ValueError):
+        sys.stderr.write(
+            "Usage : rapidstory record [--cwd DIR] [--status N] [--duration S] "
+            "[--start EPOCH] [--hostname H] [--session ID] -- COMMANDE\n"
+        )
+        sys.exit(2)
+
+    if not record["command"]:
+        return
+
+    config = ConfigLoader()
+    recorder = CommandRecorder(
+        config.get("RECORD_SPOOL_PATH"), config.get("RECORD_BATCH_SIZE")
+    )
+    if recorder.append(record):
+        from .database import DatabaseRepository
+
+        db = DatabaseRepository(config.get("DB_PATH"))
+        try:
+            db.insert_records(recorder.drain())
+        finally:
+            db.close()
+
+
+def run_import_command(args: List[str]):
+    """
+    Importe un historique externe (`rapidstory import [--format F] FICHIER...`).
+
+    Formats : bash (avec ou sans HISTTIMEFORMAT), zsh (simple ou étendu),
+    fish, atuin (history.db). Détection automatique sans --format.
+    """
+    import os
+    import sqlite3
+
+    from .utils import ConfigLoader
+    from .database import DatabaseRepository
+    from .importers import PARSERS, import_history
+
+    usage = f"Usage : rapidstory import [--format {'|'.join(PARSERS)}] FICHIER...\n"
+    fmt = None
+    paths: List[str] = []
+    i = 0
+    while i < len(args):
+        if args[i] == "--format" and i + 1 < len(args) and args[i + 1] in PARSERS:
+            fmt = args[i + 1]
+            i += 2
+        elif args[i].startswith("-"):
+            sys.stderr.write(usage)
+            sys.exit(2)
+        else:
+            paths.append(os.path.expanduser(args[i]))
+            i += 1
+    if not paths:
+        sys.stderr.write(usage)
+        sys.exit(2)
+
+    config = ConfigLoader()
+    own_history = os.path.realpath(os.path.expanduser(config.get("BASH_HISTORY_PATH")))
+    db = DatabaseRepository(config.get("DB_PATH"))
+    try:
+        for path in paths:
+            if os.path.realpath(path) == own_history:
+                # Déjà ingéré en continu : l'importer compterait chaque exécution deux fois
+                print(f"{path} : historique surveillé (BASH_HISTORY_PATH), ignoré.")
+                continue
+            try:
+                read, inserted = import_history(db, path, fmt)
+            except (OSError, sqlite3.Error) as e:
+                sys.stderr.write(f"rapidstory import : {path} : {e}\n")
+                sys.exit(1)
+            print(f"{path} : {read} entrées importées, {inserted} nouvelles commandes.")
+    finally:
+        db.close()
+
+
+def run_compact_command(args: List[str]):
+    """
+    Purge et compactage de la base (`rapidstory compact [--auto]`).
+
+    Sans option : rétention (RETENTION_*), optimize FTS5, VACUUM, puis
+    rapport des octets récupérés. --auto : variante d'arrière-plan lancée
+    en fin de session ou par le démon, au plus une fois par
+    COMPACT_INTERVAL_HOURS, silencieuse et sans verrou long.
+    """
+    from .utils import ConfigLoader
+    from .database import DatabaseRepository
+    from .maintenance import (
+        COMPACT_TASK,
+        RetentionPolicy,
+        compact,
+        compact_in_background,
+    )
+
+    auto = "--auto" in args
+    if set(args) - {"--auto"}:
+        sys.stderr.write("Usage : rapidstory compact [--auto]\n")
+        sys.exit(2)
+
+    config = ConfigLoader()
+    policy = RetentionPolicy.from_config(config)
+    db = DatabaseRepository(config.get("DB_PATH"))
+    try:
+        if auto:
+            # Plusieurs sessions peuvent se terminer en même temps : une
+            # seule obtient la tâche
+            interval = config.get("COMPACT_INTERVAL_HOURS") * 3600
+            if interval > 0 and db.claim_maintenance(COMPACT_TASK, interval):
+                compact_in_background(db, policy)
+            return
+
+        db.claim_maintenance(COMPACT_TASK, 0)
+        report = compact(db, policy, full=True)
+    finally:
+        db.close()
+
+    before, after = report["bytes_before"], report["bytes_after"]
+    print(
+        f"{report['removed']} commandes supprimées, "
+        f"{max(0, before - after) / 2**20:.1f} Mio récupérés "
+        f"({before / 2**20:.1f} → {after / 2**20:.1f} Mio)."
+    )
+    if not policy.enabled:
+        print("Aucune règle de rétention : voir RETENTION_* dans la configuration.")
+
+
+def run_pin_command(args: List[str]):
+    """
+    Commandes épinglées, jamais purgées par la rétention.
+
+    Usage : rapidstory pin [--remove] -- COMMANDE
+            rapidstory pin --list
+    """
+    from .utils import ConfigLoader
+    from .database import DatabaseRepository
+
+    usage = "Usage : rapidstory pin [--remove] -- COMMANDE | rapidstory pin --list\n"
+    remove = False
+    command_words: List[str] = []
+    for i, arg in enumerate(args):
+        if arg == "--":
+            command_words = args[i + 1 :]
+            break
+        if arg == "--remove":
+            remove = True
+        elif arg != "--list":
+            command_words = args[i:]
+            break
+    command = " ".join(command_words).strip()
+    if "--list" not in args and not command:
+        sys.stderr.write(usage)
+        sys.exit(2)
+
+    db = DatabaseRepository(ConfigLoader().get("DB_PATH"))
+    try:
+        if not command:
+            for pinned in db.pinned_commands():
+                print(pinned)
+        elif not db.set_pinned(command, not remove):
+            sys.stderr.write(f"rapidstory pin : commande inconnue : {command}\n")
+            sys.exit(1)
     finally:
-        logger.info(f"Debug: Logs écrits dans {log_file}")
+        db.close()
+
+
+def run_stats_command(args: List[str]):
+    """Rapport de latence par étape (`rapidstory stats --perf`)."""
+    from .utils import ConfigLoader
+    from .database import DatabaseRepository
+    from .perf_stats import STAGES, STAGE_LABELS, LatencyHistogram
+
+    if "--perf" not in args:
+        sys.stderr.write("Usage : rapidstory stats --perf\n")
+        sys.exit(2)
+
+    config = ConfigLoader()
+    db = DatabaseRepository(config.get("DB_PATH"))
+    try:
+        counts = db.perf_counts()
+        corpus = db.count_commands()
+    finally:
+        db.close()
+
+    print(
+        f"Corpus : {corpus} commandes en base, "
+        f"{min(corpus, config.get('HISTORY_LOAD_LIMIT'))} chargées pour la recherche"
+    )
+    if not counts:
+        print("Aucune mesure : activez PERF_STATS = True dans la configuration.")
+        return
+
+    print(f"{'étape':<26}{'mesures':>9}{'p50':>11}{'p95':>11}{'p99':>11}")
+    for stage in STAGES + sorted(set(counts) - set(STAGES)):
+        if stage not in counts:
+            continue
+        histogram = LatencyHistogram(counts[stage])
+        row = "".join(
+            f"{histogram.percentile(p) * 1000:>9.2f}ms" for p in (0.50, 0.95, 0.99)
+        )
+        print(f"{STAGE_LABELS.get(stage, stage):<26}{histogram.total:>9}{row}")
 
 
 def _output_command(command: str, execute_directly: bool):
@@ -81,11 +419,26 @@ def _output_command(command: str, execute_directly: bool):
 def main():
     """Point d'entrée principal."""
     debug = "--debug" in sys.argv
+    if "--profile-startup" in sys.argv:
+        profiler.start(_IMPORT_START)
+
     if len(sys.argv) > 1 and sys.argv[1] == "--inline":
-        logging.info("Debug: Mode inline sélectionné.")
         run_inline_mode(debug)
+    elif len(sys.argv) > 1 and sys.argv[1] == "serve":
+        run_serve_mode(debug)
+    elif len(sys.argv) > 1 and sys.argv[1] == "index":
+        run_index_command(sys.argv[2:])
+    elif len(sys.argv) > 1 and sys.argv[1] == "record":
+        run_record_command(sys.argv[2:])
+    elif len(sys.argv) > 1 and sys.argv[1] == "stats":
+        run_stats_command(sys.argv[2:])
+    elif len(sys.argv) > 1 and sys.argv[1] == "import":
+        run_import_command(sys.argv[2:])
+    elif len(sys.argv) > 1 and sys.argv[1] == "compact":
+        run_compact_command(sys.argv[2:])
+    elif len(sys.argv) > 1 and sys.argv[1] == "pin":
+        run_pin_command(sys.argv[2:])
     else:
-        logging.info("Debug: Mode full sélectionné.")
         run_full_mode(debug)
 
 
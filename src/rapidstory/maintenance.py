@@ -0,0 +1,142 @@
+import sqlite3
+import sys
+import time
+from typing import Dict, Optional
+
+# Tâche enregistrée dans la table maintenance
+COMPACT_TASK = "compact"
+
+
+class RetentionPolicy:
+    """
+    Politique de rétention de la base (RETENTION_* dans la configuration).
+
+    0 désactive un critère : par défaut, rien n'est jamais supprimé.
+    """
+
+    def __init__(
+        self,
+        max_rows: int = 0,
+        max_age_days: float = 0,
+        min_uses: int = 0,
+        keep_pinned: bool = True,
+    ):
+        """
+        Args:
+            max_rows: Nombre maximum de commandes en base
+            max_age_days: Âge maximum (dernière utilisation), en jours...
+            min_uses: ...sauf pour les commandes utilisées au moins min_uses fois
+            keep_pinned: Ne jamais supprimer les commandes épinglées
+        """
+        self.max_rows = max_rows
+        self.max_age_days = max_age_days
+        self.min_uses = min_uses
+        self.keep_pinned = keep_pinned
+
+    @classmethod
+    def from_config(cls, config) -> "RetentionPolicy":
+        return cls(
+            max_rows=config.get("RETENTION_MAX_ROWS"),
+            max_age_days=config.get("RETENTION_MAX_AGE_DAYS"),
+            min_uses=config.get("RETENTION_MIN_USES"),
+            keep_pinned=config.get("RETENTION_KEEP_PINNED"),
+        )
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_rows > 0 or self.max_age_days > 0
+
+
+def compact(db, policy: RetentionPolicy, full: bool = True) -> Dict[str, int]:
+    """
+    Purge la base selon la politique, compacte l'index FTS5 et rend
+    l'espace libéré au système.
+
+    Args:
+        db: DatabaseRepository
+        full: `rapidstory compact` : optimize FTS5 (un seul segment) et,
+            pour une base antérieure à l'auto_vacuum incrémental, VACUUM
+            complet qui l'y convertit. Sinon (arrière-plan) : fusion
+            FTS5 et incremental_vacuum par transactions courtes uniquement
+
+    Returns:
+        {"removed": commandes supprimées, "bytes_before", "bytes_after"}
+    """
+    before = db.disk_usage()
+    removed = (
+        db.prune(
+            policy.max_rows, policy.max_age_days, policy.min_uses, policy.keep_pinned
+        )
+        if policy.enabled
+        else 0
+    )
+
+    if full:
+        db.optimize_index()
+    else:
+        db.merge_index()
+
+    if full and not db.incremental_vacuum_enabled():
+        db.vacuum()
+    else:
+        db.incremental_vacuum()
+    db.checkpoint()
+
+    return {"removed": removed, "bytes_before": before, "bytes_after": db.disk_usage()}
+
+
+def compact_in_background(db, policy: RetentionPolicy) -> Optional[Dict[str, int]]:
+    """
+    Compactage d'arrière-plan (`rapidstory compact --auto`, démon).
+
+    Base verrouillée au-delà de busy_timeout, disque plein... : l'échec
+    est journalisé (debug) et la tâche retentée à l'intervalle suivant,
+    claim_maintenance ayant déjà daté cette tentative.
+
+    Returns:
+        Rapport de compact(), ou None si le compactage a échoué
+    """
+    try:
+        return compact(db, policy, full=False)
+    except sqlite3.OperationalError:
+        import logging
+
+        logging.getLogger(__name__).debug(
+            "Compactage d'arrière-plan interrompu", exc_info=True
+        )
+        return None
+
+
+def compaction_due(db, interval_hours: float) -> bool:
+    """Le dernier compactage date-t-il de plus de interval_hours heures ?"""
+    if interval_hours <= 0:
+        return False
+    last = db.last_maintenance(COMPACT_TASK)
+    return last is not None and time.time() - last >= interval_hours * 3600
+
+
+def spawn_background_compaction() -> None:
+    """
+    Lance `rapidstory compact --auto` détaché de la session.
+
+    Sorties redirigées : bash lit la commande choisie sur stdout et
+    attendrait sinon la fin du compactage.
+    """
+    import subprocess
+
+    try:
+        subprocess.Popen(
+            [
+                sys.executable,
+                "-c",
+                "from rapidstory.main import main; main()",
+                "compact",
+                "--auto",
+            ],
+            stdin=subprocess.DEVNULL,
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+            start_new_session=True,
+        )
+    except OSError:
+        pass
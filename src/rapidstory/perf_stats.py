@@ -0,0 +1,107 @@
+import bisect
+import threading
+import time
+from typing import Dict, List, Optional
+
+# Bornes supérieures des buckets (secondes) : 8 µs × 2^(k/4), jusqu'à ~16 s.
+# Pas de 19 % : précision suffisante pour p50/p95/p99, taille fixe.
+BUCKET_BOUNDS: List[float] = [8e-6 * 2 ** (k / 4) for k in range(84)]
+
+# Étapes mesurées par frappe (ordre d'affichage de `rapidstory stats --perf`)
+STAGES = ["read", "search", "scoring", "build", "write"]
+STAGE_LABELS = {
+    "read": "lecture clavier",
+    "search": "recherche (_search)",
+    "scoring": "scoring moteur",
+    "build": "construction affichage",
+    "write": "écriture tty",
+}
+
+
+class LatencyHistogram:
+    """Histogramme à buckets fixes (log) : enregistrement O(log n), taille constante."""
+
+    __slots__ = ("counts",)
+
+    def __init__(self, counts: Optional[Dict[int, int]] = None):
+        self.counts = [0] * (len(BUCKET_BOUNDS) + 1)  # Dernier : au-delà
+        for bucket, count in (counts or {}).items():
+            if 0 <= bucket < len(self.counts):
+                self.counts[bucket] += count
+
+    def record(self, seconds: float) -> None:
+        """Compte une mesure."""
+        self.counts[bisect.bisect_left(BUCKET_BOUNDS, seconds)] += 1
+
+    @property
+    def total(self) -> int:
+        """Nombre de mesures."""
+        return sum(self.counts)
+
+    def percentile(self, fraction: float) -> float:
+        """
+        Percentile estimé (borne supérieure du bucket, secondes).
+
+        Returns:
+            0.0 si aucune mesure ; inf si au-delà du dernier bucket
+        """
+        total = self.total
+        if total == 0:
+            return 0.0
+        target = fraction * total
+        seen = 0
+        for bucket, count in enumerate(self.counts):
+            seen += count
+            if seen >= target and count:
+                return (
+                    BUCKET_BOUNDS[bucket]
+                    if bucket < len(BUCKET_BOUNDS)
+                    else float("inf")
+                )
+        return float("inf")
+
+
+class PerfStats:
+    """
+    Latences par étape et par frappe (PERF_STATS).
+
+    Boucle et worker enregistrent en parallèle : un verrou protège les
+    histogrammes et le compteur. Les compteurs sont cumulés en base par
+    flush().
+    """
+
+    def __init__(self):
+        self.histograms: Dict[str, LatencyHistogram] = {}
+        self.pending = 0
+        self._lock = threading.Lock()
+
+    def record(self, stage: str, seconds: float) -> None:
+        """Enregistre la durée d'une étape."""
+        with self._lock:
+            histogram = self.histograms.get(stage)
+            if histogram is None:
+                histogram = self.histograms[stage] = LatencyHistogram()
+            histogram.record(seconds)
+            self.pending += 1
+
+    def record_since(self, stage: str, start: float) -> float:
+        """Enregistre la durée écoulée depuis `start` ; retourne l'instant courant."""
+        now = time.perf_counter()
+        self.record(stage, now - start)
+        return now
+
+    def flush(self, db) -> None:
+        """Ajoute les compteurs en base (DatabaseRepository) et repart de zéro."""
+        # Échange sous verrou, écriture en base hors verrou
+        with self._lock:
+            if not self.pending:
+                return
+            histograms, self.histograms = self.histograms, {}
+            self.pending = 0
+        rows = [
+            (stage, bucket, count)
+            for stage, histogram in histograms.items()
+            for bucket, count in enumerate(histogram.counts)
+            if count
+        ]
+        db.add_perf_counts(rows)
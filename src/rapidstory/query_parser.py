@@ -0,0 +1,39 @@
+class QueryParser:
+    """
+    Parse les requêtes et gère le mode recherche avec délimiteurs.
+
+    Principe : Entre délimiteurs (ex: '8000'), les chiffres sont recherchés.
+    Hors délimiteurs, les chiffres sélectionnent des commandes.
+    """
+
+    def __init__(self, delimiter: str = "'"):
+        """
+        Args:
+            delimiter: Caractère délimiteur (apostrophe par défaut)
+        """
+        self.delimiter = delimiter
+
+    def is_in_search_mode(self, query: str) -> bool:
+        """
+        Vérifie si la query est en mode recherche (nombre impair de délimiteurs).
+
+        Args:
+            query: La requête à analyser
+
+        Returns:
+            True si en mode recherche, False sinon
+        """
+        count = query.count(self.delimiter)
+        return count % 2 == 1
+
+    def get_search_text(self, query: str) -> str:
+        """
+        Extrait le texte de recherche sans les délimiteurs.
+
+        Args:
+            query: La requête brute (avec délimiteurs)
+
+        Returns:
+            Texte nettoyé pour la recherche
+        """
+        return query.replace(self.delimiter, "")
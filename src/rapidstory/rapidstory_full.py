@@ -1,7 +1,7 @@
 from typing import Optional, Tuple, Dict, List
 
 from .rapidstory_global import RapidStoryGlobal
-from .ui import FullModeUI
+from .ui.ui_full_mode import FullModeUI
 from .ui.ui_protocol import UIProtocol
 from .ui.ui_global import KEY_CTRL_R
 
@@ -17,6 +17,8 @@ class RapidStoryFull(RapidStoryGlobal):
         return FullModeUI(
             max_command_length=self.config.get("MAX_COMMAND_DISPLAY_LENGTH"),
             config=self.config.get_all(),
+            perf=self.perf,
+            colors=self.config.colors,
         )
 
     def _get_initial_state(self) -> Dict:
@@ -29,7 +31,12 @@ class RapidStoryFull(RapidStoryGlobal):
 
     def _render(self, state: Dict) -> None:
         """Affiche l'UI full-screen."""
-        self.ui.render(state["query"], state["results"], state["active_index"])
+        self.ui.render(
+            state["query"],
+            state["results"],
+            state["active_index"],
+            self._scope_label(state),
+        )
 
     def _get_search_limit(self) -> int:
         """Limite d'affichage mode full."""
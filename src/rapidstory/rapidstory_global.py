@@ -1,10 +1,15 @@
 import sys
+import time
 from typing import Optional, Tuple, Dict, List
 from abc import ABC, abstractmethod
 
 from .utils import ConfigLoader, CommandValidator
-from .database import HistoryManager
-from .search import SearchEngine, QueryParser
+from .query_parser import QueryParser
+from .client import SearchClient
+from .search_worker import SearchWorker
+from .scope import ScopeResolver, SCOPE_GLOBAL
+from .startup_profile import profiler
+from .perf_stats import PerfStats
 from .ui.ui_protocol import UIProtocol
 from .ui.ui_global import (
     is_quit_key,
@@ -13,7 +18,8 @@ from .ui.ui_global import (
     is_digit_selection,
     is_navigation_up,
     is_navigation_down,
-    KEY_ESC,
+    is_escape_sequence,
+    KEY_CTRL_G,
 )
 
 
@@ -39,24 +45,41 @@ class RapidStoryGlobal(ABC):
             )
 
         self.config = ConfigLoader()
+        profiler.mark("config")
 
-        self.history = HistoryManager(
-            db_path=self.config.get("DB_PATH"),
-            history_path=self.config.get("BASH_HISTORY_PATH"),
-            load_limit=self.config.get("HISTORY_LOAD_LIMIT"),
-            monitor_interval=self.config.get("MONITOR_INTERVAL"),
-        )
-
-        query_parser = QueryParser(delimiter=self.config.get("SEARCH_MODE_DELIMITER"))
-        self.search = SearchEngine(
-            threshold=self.config.get("FUZZY_SEARCH_THRESHOLD"),
-            query_parser=query_parser,
+        self.query_parser = QueryParser(
+            delimiter=self.config.get("SEARCH_MODE_DELIMITER")
         )
+        self.backend = self._create_backend()
+        self.scope = ScopeResolver()
 
         self.validator = CommandValidator()
+        # Latences par étape (PERF_STATS) : None = aucune mesure
+        self.perf = PerfStats() if self.config.get("PERF_STATS") else None
         self.ui: UIProtocol = self._create_ui()
 
-        self.history.load_from_file()
+    def _create_backend(self):
+        """
+        Choisit le backend de recherche.
+
+        Démon `rapidstory serve` joignable → client léger (rien à charger).
+        Sinon → service local (import rapidfuzz, DB, lecture historique).
+        """
+        client = SearchClient.connect(
+            self.config.get("DAEMON_SOCKET_PATH"),
+            timeout=self.config.get("DAEMON_TIMEOUT"),
+        )
+        if client is not None:
+            profiler.mark("connexion démon")
+            return client
+        return self._create_local_backend()
+
+    def _create_local_backend(self):
+        """Crée le service local (imports lourds différés jusqu'ici)."""
+        from .service import SearchService
+
+        profiler.mark("imports recherche")
+        return SearchService(self.config)
 
     @abstractmethod
     def _create_ui(self) -> UIProtocol:
@@ -113,6 +136,11 @@ class RapidStoryGlobal(ABC):
             (commande, execute_directly) ou None si annulation
         """
         state = self._get_initial_state()
+        profiler.mark("première recherche")
+        state.setdefault("scope", SCOPE_GLOBAL)
+        self._applied_request = self._search_request(state)
+        self._submitted_request = self._applied_request
+        self.worker = SearchWorker(lambda request: self._search(*request))
 
         self.ui.setup()
 
@@ -127,25 +155,90 @@ class RapidStoryGlobal(ABC):
             return None
 
         finally:
+            self.worker.close()
             self.ui.cleanup()
+            self._flush_perf()
+            if isinstance(self.backend, SearchClient):
+                self.backend.close()
+            else:
+                self.backend.schedule_compaction()  # Le démon compacte lui-même
 
     def _interaction_loop(self, state: Dict) -> Optional[Tuple[str, bool]]:
-        """Boucle principale d'interaction."""
+        """
+        Boucle principale d'interaction.
+
+        La recherche tourne dans SearchWorker : la boucle attend à la fois
+        le clavier et la fin de recherche, et n'affiche que le résultat de
+        la dernière requête. Les touches arrivent par lots (saisie rapide,
+        collage) : une seule recherche et un seul rendu par lot, aucun
+        pour les requêtes intermédiaires.
+        """
+        self._render(state)
+        profiler.mark("premier rendu")
+
         while True:
-            self._render(state)
+            if not self.ui.wait_for_input_or([self.worker.fileno()]):
+                if self._apply_search_result(state, self.worker.take_result()):
+                    self._render(state)
+                continue
 
-            key = self.ui.wait_for_input()
+            start = time.perf_counter() if self.perf is not None else 0.0
+            keys = self.ui.read_keys()
+            if self.perf is not None:
+                self.perf.record_since("read", start)
 
-            action = self._handle_key(key, state)
+            for key in keys:
+                action = self._handle_key(key, state)
 
-            if action is None:
-                continue
-            elif action == "QUIT":
-                return None
-            elif isinstance(action, dict):
-                state.update(action)
-            elif isinstance(action, tuple):
-                return action
+                if action == "QUIT":
+                    return None
+                elif isinstance(action, dict):
+                    state.update(action)
+                elif isinstance(action, tuple):
+                    self._record_selection(action[0])
+                    return action
+
+            if self.ui.has_pending_input():
+                continue  # Coalescing : on traite d'abord toutes les touches
+
+            request = self._search_request(state)
+            if request != self._submitted_request:
+                self._submitted_request = request
+                self.worker.submit(request)
+
+            self._render(state)
+
+    def _search_request(self, state: Dict) -> Tuple[str, str]:
+        """Requête de recherche correspondant à l'état (query, portée)."""
+        return (state["query"], state["scope"])
+
+    def _apply_search_result(
+        self, state: Dict, result: Optional[Tuple[Tuple[str, str], List[str]]]
+    ) -> bool:
+        """Applique un résultat du worker s'il correspond à la requête affichée."""
+        if result is None:
+            return False
+        request, results = result
+        if request != self._search_request(state):
+            return False
+        state.update(self._create_search_update(request[0], results))
+        self._applied_request = request
+        return True
+
+    def _sync_search(self, state: Dict) -> None:
+        """
+        Garantit que les résultats correspondent à la query (avant sélection).
+
+        Entrée ou un chiffre juste après une frappe ne doivent pas choisir
+        dans les résultats de la requête précédente.
+        """
+        request = self._search_request(state)
+        if request == self._applied_request:
+            return
+        if request != self._submitted_request:
+            self._submitted_request = request
+            self.worker.submit(request)
+        self._apply_search_result(state, self.worker.wait_result())
 
     def _handle_key(self, key: str, state: Dict):
         """
@@ -153,8 +246,10 @@ class RapidStoryGlobal(ABC):
 
         Sorties définies centralement :
         - Ctrl+C, Ctrl+D : is_quit_key()
-        - ESC seul : séquence None
+        - ESC seul ou séquence non gérée : handle_escape() → None
         - Toggle : TOGGLE_KEY (Ctrl+R pour Full, Ctrl+Up pour Inline)
+
+        Ctrl+G : portée suivante (global → dossier → sous-arbre → dépôt).
         """
         # Sortie standard : Ctrl+C, Ctrl+D
         if is_quit_key(key):
@@ -164,9 +259,12 @@ class RapidStoryGlobal(ABC):
         if key == self.TOGGLE_KEY:
             return "QUIT"
 
-        # ESC : séquence ou sortie
-        if key == KEY_ESC:
-            seq = self.ui.handle_escape()
+        if key == KEY_CTRL_G:
+            return {"scope": self.scope.next_scope(state["scope"])}
+
+        # ESC : séquence (déjà complète, cf. KeyDecoder) ou sortie
+        if is_escape_sequence(key):
+            seq = self.ui.handle_escape(key)
 
             # ESC seul = quitter
             if seq is None:
@@ -183,36 +281,74 @@ class RapidStoryGlobal(ABC):
                 return self._move_down(state)
 
         if is_enter(key):
+            self._sync_search(state)
             return self._select_current(state)
 
         if is_backspace(key):
             return self._handle_backspace(state)
 
         # Mode recherche : tout va dans la query
-        if self.search.is_in_search_mode(state["query"]):
+        if self.query_parser.is_in_search_mode(state["query"]):
             return self._handle_char(key, state)
 
         # Hors mode recherche : chiffres = sélection
         if is_digit_selection(key):
+            self._sync_search(state)
             return self._handle_digit_selection(key, state)
 
         # Tout le reste = recherche
         return self._handle_char(key, state)
 
     def _handle_backspace(self, state: Dict) -> Dict:
-        """Supprime le dernier caractère de la recherche."""
-        query = state["query"][:-1]
-        results = self._search(query)
-        return self._create_search_update(query, results)
+        """Supprime le dernier caractère (recherche lancée par la boucle)."""
+        return {"query": state["query"][:-1]}
 
     def _handle_char(self, char: str, state: Dict) -> Dict:
-        """Ajoute un caractère à la recherche."""
-        query = state["query"] + char
-        results = self._search(query)
-        return self._create_search_update(query, results)
-
-    def _search(self, query: str) -> List[str]:
-        """Effectue une recherche dans l'historique."""
-        commands = self.history.get_commands()
+        """Ajoute un caractère (recherche lancée par la boucle)."""
+        return {"query": state["query"] + char}
+
+    def _record_selection(self, command: str) -> None:
+        """Remonte la commande choisie en frecency (échec sans conséquence)."""
+        try:
+            self.backend.record_selection(command)
+        except (OSError, ValueError):
+            pass
+
+    def _flush_perf(self) -> None:
+        """Cumule en base les latences de la session (PERF_STATS)."""
+        if self.perf is None:
+            return
+        if isinstance(self.backend, SearchClient):
+            # Le démon écrit ses propres mesures (scoring)
+            from .database import DatabaseRepository
+
+            db = DatabaseRepository(self.config.get("DB_PATH"))
+            try:
+                self.perf.flush(db)
+            finally:
+                db.close()
+        else:
+            self.perf.flush(self.backend.history.db)
+            self.backend.flush_perf()
+
+    def _scope_label(self, state: Dict) -> str:
+        """Libellé de la portée active (vide en global)."""
+        return self.scope.label(state.get("scope", SCOPE_GLOBAL))
+
+    def _search(self, query: str, scope: str = SCOPE_GLOBAL) -> List[str]:
+        """Effectue une recherche dans l'historique (démon ou local)."""
         limit = self._get_search_limit()
-        return self.search.search(query, commands, limit)
+        scope_filter = self.scope.filter(scope)
+        start = time.perf_counter() if self.perf is not None else 0.0
+        try:
+            results = self.backend.search(query, limit, scope=scope_filter)
+            if self.perf is not None:
+                self.perf.record_since("search", start)
+            return results
+        except (OSError, ValueError):
+            if not isinstance(self.backend, SearchClient):
+                raise
+            # Démon arrêté en cours de session : bascule en local
+            self.backend.close()
+            self.backend = self._create_local_backend()
+            return self.backend.search(query, limit, scope=scope_filter)
@@ -17,6 +17,8 @@ class RapidStoryInline(RapidStoryGlobal):
         return InlineModeUI(
             suggestions_limit=self.config.get("INLINE_SUGGESTIONS_LIMIT"),
             config=self.config.get_all(),
+            perf=self.perf,
+            colors=self.config.colors,
         )
 
     def _get_initial_state(self) -> Dict:
@@ -35,7 +37,9 @@ class RapidStoryInline(RapidStoryGlobal):
         current_cmd = all_results[current_index] if all_results else ""
         suggestions = self._get_suggestions(all_results, current_index)
 
-        self.ui.render(state["query"], current_cmd, suggestions)
+        self.ui.render(
+            state["query"], current_cmd, suggestions, self._scope_label(state)
+        )
 
     def _get_search_limit(self) -> int:
         """Limite plus large pour suggestions inline."""
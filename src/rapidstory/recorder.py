@@ -0,0 +1,145 @@
+import os
+import json
+import time
+from typing import Any, Dict, List, Optional
+
+
+class CommandRecorder:
+    """
+    File d'attente des exécutions capturées par `rapidstory record`.
+
+    Chemin critique (après chaque commande) : un seul append JSON dans un
+    fichier spool, sans sqlite3 ni rapidfuzz. Les enregistrements sont
+    versés en DB par lots (spool plein, ou au chargement de l'historique).
+    """
+
+    # Taille moyenne estimée d'un enregistrement JSON (commande, cwd, hôte...)
+    RECORD_BYTES = 200
+    # Spool déjà lu, gardé jusqu'au vidage suivant : <claim>.<offset>.drained
+    DRAINED_SUFFIX = ".drained"
+
+    def __init__(self, spool_path: str, batch_size: int = 32):
+        """
+        Args:
+            spool_path: Fichier spool (JSON, un enregistrement par ligne)
+            batch_size: Nombre d'enregistrements déclenchant un vidage en DB
+        """
+        self.spool_path = os.path.expanduser(spool_path)
+        self.batch_size = batch_size
+
+    def append(self, record: Dict[str, Any]) -> bool:
+        """
+        Ajoute un enregistrement au spool.
+
+        Un seul write() en O_APPEND : plusieurs shells peuvent écrire en
+        même temps sans entrelacer les lignes.
+
+        Returns:
+            True si le spool atteint environ batch_size enregistrements
+            (estimé d'après sa taille, sans le relire) : vidage conseillé
+        """
+        line = json.dumps(record, ensure_ascii=False).encode("utf-8") + b"\n"
+        os.makedirs(os.path.dirname(self.spool_path), exist_ok=True)
+        fd = os.open(self.spool_path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o600)
+        try:
+            os.write(fd, line)
+            size = os.fstat(fd).st_size
+        finally:
+            os.close(fd)
+        return size >= self.batch_size * self.RECORD_BYTES
+
+    def drain(self) -> List[Dict[str, Any]]:
+        """
+        Récupère et retire tous les enregistrements en attente.
+
+        Le spool est d'abord renommé (atomique) : les shells qui écrivent
+        pendant le vidage créent un nouveau spool. Un shell qui l'avait
+        ouvert juste avant le renommage écrit encore dans le fichier pris :
+        celui-ci est gardé (avec l'offset lu) et sa fin relue au vidage
+        suivant, puis supprimé.
+        """
+        records = self._drain_leftovers()
+        claimed = f"{self.spool_path}.{os.getpid()}"
+        try:
+            os.rename(self.spool_path, claimed)
+        except OSError:
+            return records  # Spool vide ou déjà pris par un autre processus
+
+        offset = self._read_records(claimed, 0, records)
+        try:
+            os.rename(claimed, f"{claimed}.{offset}{self.DRAINED_SUFFIX}")
+        except OSError:
+            pass
+        return records
+
+    def _drain_leftovers(self) -> List[Dict[str, Any]]:
+        """Lignes écrites après le vidage précédent dans les fichiers gardés."""
+        directory, base = os.path.split(self.spool_path)
+        try:
+            names = os.listdir(directory or ".")
+        except OSError:
+            return []
+
+        records: List[Dict[str, Any]] = []
+        for name in names:
+            if not (name.startswith(base + ".") and name.endswith(self.DRAINED_SUFFIX)):
+                continue
+            try:
+                offset = int(name[: -len(self.DRAINED_SUFFIX)].rsplit(".", 1)[1])
+            except (IndexError, ValueError):
+                continue
+            # Renommage : un seul processus relit chaque fichier gardé
+            path = os.path.join(directory, name)
+            claimed = f"{path}.{os.getpid()}"
+            try:
+                os.rename(path, claimed)
+            except OSError:
+                continue
+            try:
+                self._read_records(claimed, offset, records)
+            finally:
+                os.unlink(claimed)
+        return records
+
+    @staticmethod
+    def _read_records(path: str, offset: int, records: List[Dict[str, Any]]) -> int:
+        """
+        Ajoute à records les lignes complètes lues à partir de offset.
+
+        Returns:
+            Offset après la dernière ligne complète
+        """
+        try:
+            with open(path, "rb") as f:
+                f.seek(offset)
+                for line in f:
+                    if not line.endswith(b"\n"):
+                        break  # Écriture en cours : relue au vidage suivant
+                    offset += len(line)
+                    try:
+                        records.append(json.loads(line))
+                    except ValueError:
+                        continue  # Ligne tronquée (crash pendant l'écriture)
+        except OSError:
+            pass
+        return offset
+
+
+def build_record(
+    command: str,
+    cwd: Optional[str] = None,
+    exit_status: Optional[int] = None,
+    duration: Optional[float] = None,
+    hostname: Optional[str] = None,
+    session: Optional[str] = None,
+) -> Dict[str, Any]:
+    """Construit un enregistrement avec les valeurs par défaut du processus."""
+    return {
+        "command": command.strip(),
+        "timestamp": time.time(),
+        "cwd": cwd if cwd is not None else os.getcwd(),
+        "exit_status": exit_status,
+        "duration": duration,
+        "hostname": hostname if hostname is not None else os.uname().nodename,
+        "session": session,
+    }
@@ -0,0 +1,108 @@
+import os
+from functools import lru_cache
+from typing import List, Optional, Tuple
+
+# Portées de recherche, dans l'ordre du cycle (touche SCOPE_TOGGLE)
+SCOPE_GLOBAL = "global"
+SCOPE_DIRECTORY = "directory"
+SCOPE_SUBTREE = "subtree"
+SCOPE_REPO = "repo"
+SCOPES = [SCOPE_GLOBAL, SCOPE_DIRECTORY, SCOPE_SUBTREE, SCOPE_REPO]
+
+SCOPE_LABELS = {
+    SCOPE_GLOBAL: "",
+    SCOPE_DIRECTORY: "dossier",
+    SCOPE_SUBTREE: "sous-arbre",
+    SCOPE_REPO: "dépôt",
+}
+
+
+@lru_cache(maxsize=None)
+def find_git_root(path: str) -> Optional[str]:
+    """
+    Remonte l'arborescence jusqu'au dossier contenant `.git`.
+
+    Pas de sous-processus git : un stat par niveau, résultat mémorisé.
+
+    Returns:
+        Racine du dépôt ou None hors dépôt
+    """
+    current = path
+    while True:
+        if os.path.exists(os.path.join(current, ".git")):  # Dossier ou worktree
+            return current
+        parent = os.path.dirname(current)
+        if parent == current:
+            return None
+        current = parent
+
+
+def current_directory() -> str:
+    """
+    Dossier courant tel que le shell le voit ($PWD, liens symboliques
+    conservés), pour correspondre au cwd enregistré par le hook.
+    """
+    cwd = os.getcwd()
+    pwd = os.environ.get("PWD")
+    if pwd and pwd != cwd:
+        try:
+            if os.path.samefile(pwd, cwd):
+                return pwd
+        except OSError:
+            pass
+    return cwd
+
+
+class ScopeResolver:
+    """
+    Traduit une portée (dossier, sous-arbre, dépôt) en filtre SQL sur cwd.
+
+    Le filtre est une paire (type, chemin) sérialisable, transmise telle
+    quelle au service local ou au démon.
+    """
+
+    def __init__(self, cwd: Optional[str] = None):
+        self.cwd = cwd if cwd is not None else current_directory()
+
+    @property
+    def git_root(self) -> Optional[str]:
+        """Racine git du dossier courant (détectée une seule fois)."""
+        return find_git_root(self.cwd)
+
+    def available(self) -> List[str]:
+        """Portées utilisables ici (dépôt seulement dans un dépôt git)."""
+        if self.git_root is None:
+            return [scope for scope in SCOPES if scope != SCOPE_REPO]
+        return list(SCOPES)
+
+    def next_scope(self, scope: str) -> str:
+        """Portée suivante dans le cycle."""
+        scopes = self.available()
+        if scope not in scopes:
+            return scopes[0]
+        return scopes[(scopes.index(scope) + 1) % len(scopes)]
+
+    def filter(self, scope: str) -> Optional[Tuple[str, str]]:
+        """
+        Filtre SQL de la portée.
+
+        Returns:
+            ("exact", dossier), ("prefix", dossier) ou None (global)
+        """
+        if scope == SCOPE_DIRECTORY:
+            return ("exact", self.cwd)
+        if scope == SCOPE_SUBTREE:
+            return ("prefix", self.cwd)
+        if scope == SCOPE_REPO and self.git_root is not None:
+            return ("prefix", self.git_root)
+        return None
+
+    def label(self, scope: str) -> str:
+        """Libellé affiché dans l'UI (vide pour la portée globale)."""
+        if scope == SCOPE_GLOBAL:
+            return ""
+        path = self.git_root if scope == SCOPE_REPO else self.cwd
+        home = os.path.expanduser("~")
+        if path and (path == home or path.startswith(home + os.sep)):
+            path = "~" + path[len(home) :]
+        return f"{SCOPE_LABELS[scope]}: {path}"
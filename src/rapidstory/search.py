@@ -1,65 +1,65 @@
-from typing import List, Tuple, Optional
+from typing import Callable, Hashable, Iterable, List, Optional, Sequence, Tuple
+import heapq
 import logging
 from rapidfuzz import fuzz, process  # pip install rapidfuzz (rapide, C++ backend)
 
+from .query_parser import QueryParser
 
-class QueryParser:
-    """
-    Parse les requêtes et gère le mode recherche avec délimiteurs.
-
-    Principe : Entre délimiteurs (ex: '8000'), les chiffres sont recherchés.
-    Hors délimiteurs, les chiffres sélectionnent des commandes.
-    """
-
-    def __init__(self, delimiter: str = "'"):
-        """
-        Args:
-            delimiter: Caractère délimiteur (apostrophe par défaut)
-        """
-        self.delimiter = delimiter
-
-    def is_in_search_mode(self, query: str) -> bool:
-        """
-        Vérifie si la query est en mode recherche (nombre impair de délimiteurs).
+_numpy = None
 
-        Args:
-            query: La requête à analyser
 
-        Returns:
-            True si en mode recherche, False sinon
-        """
-        count = query.count(self.delimiter)
-        return count % 2 == 1
+def _load_numpy():
+    """Import paresseux de numpy (requis par process.cdist, optionnel)."""
+    global _numpy
+    if _numpy is None:
+        try:
+            import numpy
 
-    def get_search_text(self, query: str) -> str:
-        """
-        Extrait le texte de recherche sans les délimiteurs.
-
-        Args:
-            query: La requête brute (avec délimiteurs)
-
-        Returns:
-            Texte nettoyé pour la recherche
-        """
-        return query.replace(self.delimiter, "")
+            _numpy = numpy
+        except ImportError:
+            _numpy = False
+    return _numpy or None
 
 
 class SearchEngine:
     """Moteur de recherche centralisé. Gère parsing ET recherche."""
 
+    # Nombre de candidats flous retenus avant fusion avec les exacts
+    FUZZY_LIMIT = 50
+
     def __init__(
-        self, threshold: float = 0.5, query_parser: Optional[QueryParser] = None
+        self,
+        threshold: float = 0.5,
+        query_parser: Optional[QueryParser] = None,
+        workers: int = 1,
+        parallel_min_size: int = 50000,
     ):
         """
         Args:
             threshold: Seuil minimum pour la recherche floue (0.0 à 1.0)
             query_parser: Parser pour gérer les délimiteurs (optionnel)
+            workers: Threads pour la passe floue (-1 = tous les cœurs)
+            parallel_min_size: Taille de corpus à partir de laquelle la
+                passe floue est parallélisée (process.cdist, requiert numpy)
         """
         self.threshold = threshold
         self.query_parser = query_parser if query_parser is not None else QueryParser()
+        self.workers = workers
+        self.parallel_min_size = parallel_min_size
         self.logger = logging.getLogger(__name__)
 
-    def search(self, query: str, commands: List[str], limit: int) -> List[str]:
+        # Corpus prétraité (casefold) réutilisé tant que la génération ne change pas
+        self._corpus_key: Optional[Tuple[Hashable, int]] = None
+        self._folded: List[str] = []
+
+    def search(
+        self,
+        query: str,
+        commands: Sequence[str],
+        limit: int,
+        exact_matches: Optional[List[str]] = None,
+        generation: Optional[Hashable] = None,
+    ) -> List[str]:
         """
         Recherche des commandes selon une requête.
 
@@ -73,6 +73,10 @@ class SearchEngine:
             query: La chaîne de recherche (peut contenir délimiteurs)
             commands: Liste des commandes à parcourir
             limit: Nombre maximum de résultats
+            exact_matches: Correspondances exactes déjà calculées (index
+                trigramme SQL), évite le scan Python de sous-chaîne
+            generation: Génération du corpus (HistoryCache) ; si fournie,
+                le prétraitement est réutilisé d'une frappe à l'autre
 
         Returns:
             Liste des commandes correspondantes, triées par pertinence
@@ -81,14 +85,105 @@ class SearchEngine:
         clean_query = self.query_parser.get_search_text(query)
 
         if not clean_query:
-            return commands[:limit]
+            # Corpus éventuellement paresseux (instantané mmap) : seules
+            # les lignes affichées sont décodées
+            return list(commands[:limit])
+
+        lower_query = clean_query.casefold()
+        folded = self.prepare_corpus(commands, generation)
+        exact_indices = (
+            self.find_exact(lower_query, folded, limit)[0]
+            if exact_matches is None
+            else None
+        )
+        return self.rank(
+            lower_query, commands, folded, limit, exact_indices, exact_matches
+        )
+
+    # Taille des tranches du scan exact (compréhension rapide + arrêt anticipé)
+    SCAN_CHUNK = 4096
+
+    def find_exact(
+        self,
+        query: str,
+        folded: List[str],
+        limit: int,
+        candidates: Optional[Iterable[int]] = None,
+        resume_from: Optional[int] = None,
+    ) -> Tuple[List[int], int]:
+        """
+        Indices des commandes contenant la requête (sous-chaîne).
 
-        lower_query = clean_query.lower()
-        scored_results = self._score_commands_optimized(lower_query, commands)
+        Le corpus est en ordre de récence : les `limit` premiers matches
+        sont exactement ceux affichés, le scan s'arrête donc dès qu'ils
+        sont trouvés.
 
-        scored_results.sort(key=lambda x: (x[0], x[1]), reverse=True)
+        Args:
+            query: Requête casefoldée
+            folded: Corpus casefoldé
+            limit: Nombre de matches suffisant pour arrêter le scan
+            candidates: Indices à examiner d'abord (matches du préfixe,
+                fournis par SearchSession) au lieu de tout le corpus
+            resume_from: Avec candidates, position où le scan du préfixe
+                s'était arrêté : le scan reprend ensuite à partir de là
 
-        return [cmd for _, _, cmd in scored_results[:limit]]
+        Returns:
+            (indices croissants, position de fin de scan) : tout index
+            inférieur à la position de fin a été examiné
+        """
+        hits: List[int] = []
+        start = 0
+
+        if candidates is not None:
+            for idx in candidates:
+                if query in folded[idx]:
+                    hits.append(idx)
+                    if len(hits) >= limit:
+                        return hits, idx + 1
+            start = len(folded) if resume_from is None else resume_from
+
+        for chunk_start in range(start, len(folded), self.SCAN_CHUNK):
+            chunk = folded[chunk_start : chunk_start + self.SCAN_CHUNK]
+            hits.extend(
+                chunk_start + offset for offset, low in enumerate(chunk) if query in low
+            )
+            if len(hits) >= limit:
+                del hits[limit:]
+                return hits, hits[-1] + 1
+
+        return hits, len(folded)
+
+    def rank(
+        self,
+        query: str,
+        commands: Sequence[str],
+        folded: List[str],
+        limit: int,
+        exact_indices: Optional[List[int]] = None,
+        exact_matches: Optional[List[str]] = None,
+    ) -> List[str]:
+        """
+        Classe les correspondances exactes puis complète en flou.
+
+        Args:
+            query: Requête casefoldée
+            commands: Corpus original
+            folded: Corpus casefoldé
+            limit: Nombre maximum de résultats
+            exact_indices: Indices des matches exacts dans commands
+            exact_matches: Ou matches exacts fournis directement (SQL)
+
+        Returns:
+            Commandes triées par pertinence
+        """
+        scored_results = self._score_commands_optimized(
+            query, commands, folded, limit, exact_indices, exact_matches
+        )
+
+        # Top-k borné : pas de tri complet de tous les matches
+        top = heapq.nlargest(limit, scored_results, key=lambda x: (x[0], x[1]))
+
+        return [cmd for _, _, cmd in top]
 
     def is_in_search_mode(self, query: str) -> bool:
         """
@@ -102,44 +197,70 @@ class SearchEngine:
         """
         return self.query_parser.is_in_search_mode(query)
 
+    def prepare_corpus(
+        self, commands: Sequence[str], generation: Optional[Hashable]
+    ) -> List[str]:
+        """
+        Retourne le corpus casefoldé, recalculé seulement si l'historique change.
+
+        La forme casefoldée sert aussi d'entrée prétraitée à rapidfuzz
+        (processor=None) : aucune transformation par frappe. Le corpus
+        d'origine (CommandStore) n'est ensuite lu que par index, pour les
+        seuls résultats retenus : jamais recopié.
+        """
+        key = (generation, len(commands)) if generation is not None else None
+        if key is None or key != self._corpus_key:
+            self._folded = [cmd.casefold() for cmd in commands]
+            self._corpus_key = key
+        return self._folded
+
     def _score_commands_optimized(
-        self, query: str, commands: List[str]
+        self,
+        query: str,
+        commands: Sequence[str],
+        folded: List[str],
+        limit: int,
+        exact_indices: Optional[List[int]] = None,
+        exact_matches: Optional[List[str]] = None,
     ) -> List[Tuple[float, int, str]]:
         """
         Calcule le score de pertinence pour chaque commande (version rapide).
 
         Args:
-            query: Requête en minuscules
+            query: Requête casefoldée
             commands: Liste des commandes
+            folded: Commandes casefoldées (même ordre que commands)
+            limit: Nombre de résultats affichés
+            exact_indices: Indices des correspondances exactes dans commands
+            exact_matches: Correspondances exactes fournies (ordre = rang)
 
         Returns:
             Liste de tuples (score, -index, commande)
         """
         scored_results: List[Tuple[float, int, str]] = []
 
-        # Priorité 1: Matches exacts (rapide)
-        exact_matches = [cmd for cmd in commands if query in cmd.lower()]
-        for cmd in exact_matches:
-            idx = commands.index(cmd)  # Stable pour tri
-            scored_results.append((1.0, -idx, cmd))
-
-        # Priorité 2: Fuzzy rapide avec rapidfuzz (seulement si pas assez d'exacts)
-        if len(scored_results) < len(commands):
+        # Priorité 1: Matches exacts (rapide). L'index positionnel vient de
+        # l'énumération : pas de commands.index() (O(n) par match)
+        if exact_matches is not None:
+            for idx, cmd in enumerate(exact_matches):
+                scored_results.append((1.0, -idx, cmd))
+            seen_cmds = set(exact_matches)
+        else:
+            if exact_indices is None:
+                exact_indices = self.find_exact(query, folded, limit)[0]
+            for idx in exact_indices:
+                scored_results.append((1.0, -idx, commands[idx]))
+            seen_cmds = {s[2] for s in scored_results}  # Set pour O(1) check doublons
+
+        # Priorité 2: Fuzzy rapide avec rapidfuzz (seulement si pas assez d'exacts :
+        # un score flou < 1.0 ne peut pas entrer dans un top déjà rempli d'exacts)
+        if len(scored_results) < min(limit, len(commands)):
             try:
-                fuzzy_matches = process.extract(
-                    query,
-                    [cmd.lower() for cmd in commands],
-                    scorer=fuzz.ratio,
-                    limit=50,
-                )
-                seen_cmds = {
-                    s[2] for s in scored_results
-                }  # Set pour O(1) check doublons
-                for _, score, idx in fuzzy_matches:
+                for score, idx in self._fuzzy_matches(query, folded):
                     score_norm: float = (
                         float(score) / 100.0
                     )  # Cast explicite pour Pyright
-                    if score_norm >= self.threshold and score_norm < 1.0:
+                    if score_norm < 1.0:
                         cmd = commands[idx]
                         if cmd not in seen_cmds:
                             scored_results.append((score_norm, -idx, cmd))
@@ -152,6 +273,156 @@ class SearchEngine:
 
         return scored_results
 
+    def _fuzzy_matches(self, query: str, folded: List[str]) -> List[Tuple[float, int]]:
+        """
+        Meilleurs candidats flous au-dessus du seuil.
+
+        Le seuil est passé en score_cutoff : les candidats sans espoir sont
+        rejetés dans le backend C++. Au-delà de parallel_min_size, la passe
+        utilise process.cdist multi-threadé (si numpy est disponible).
+
+        Returns:
+            Liste de (score 0-100, index)
+        """
+        cutoff = self.threshold * 100
+        np = (
+            _load_numpy()
+            if self.workers != 1 and len(folded) >= self.parallel_min_size
+            else None
+        )
+
+        if np is None:
+            return [
+                (score, idx)
+                for _, score, idx in process.extract(
+                    query,
+                    folded,
+                    scorer=fuzz.ratio,
+                    processor=None,
+                    limit=self.FUZZY_LIMIT,
+                    score_cutoff=cutoff,
+                )
+            ]
+
+        scores = process.cdist(
+            [query],
+            folded,
+            scorer=fuzz.ratio,
+            processor=None,
+            score_cutoff=cutoff,
+            workers=self.workers,
+            dtype=np.float32,
+        )[0]
+        count = min(self.FUZZY_LIMIT, len(scores))
+        top = np.argpartition(scores, -count)[-count:]
+        return [
+            (float(scores[idx]), int(idx))
+            for idx in top
+            if scores[idx] >= cutoff and scores[idx] > 0
+        ]
+
+
+class _SessionEntry:
+    """Résultat mémorisé pour une requête de la session."""
+
+    __slots__ = ("query", "exact_indices", "scan_end", "results")
+
+    def __init__(
+        self,
+        query: str,
+        exact_indices: Optional[List[int]],
+        scan_end: int,
+        results: List[str],
+    ):
+        self.query = query
+        self.exact_indices = exact_indices
+        self.scan_end = scan_end  # Tout index < scan_end a été examiné
+        self.results = results
+
+
+class SearchSession:
+    """
+    Recherche incrémentale pour une session interactive (une frappe = une requête).
+
+    Garde une pile (requête → matches exacts, résultats) :
+    - prolonger la requête ('dock' → 'docke') ne rescanne que les matches
+      exacts du préfixe, jamais tout le corpus ;
+    - Backspace dépile et renvoie instantanément le résultat mémorisé.
+    """
+
+    def __init__(self, engine: SearchEngine):
+        self.engine = engine
+        self._stack: List[_SessionEntry] = []
+        self._key: Optional[Tuple[Hashable, int, int]] = None
+
+    def search(
+        self,
+        query: str,
+        commands: Sequence[str],
+        limit: int,
+        generation: Optional[Hashable] = None,
+        exact_lookup: Optional[Callable[[str], Optional[List[str]]]] = None,
+    ) -> List[str]:
+        """
+        Recherche en réutilisant les résultats des requêtes précédentes.
+
+        Args:
+            query: Requête brute (peut contenir délimiteurs)
+            commands: Corpus
+            limit: Nombre maximum de résultats
+            generation: Génération du corpus (None = pas de mémorisation)
+            exact_lookup: Source externe de matches exacts (index SQL) ;
+                retourne None si elle ne peut pas répondre
+
+        Returns:
+            Commandes triées par pertinence
+        """
+        clean_query = self.engine.query_parser.get_search_text(query)
+        if not clean_query:
+            self._stack.clear()
+            return list(commands[:limit])
+
+        key = (generation, len(commands), limit) if generation is not None else None
+        if key is None or key != self._key:
+            self._stack.clear()  # Historique modifié : mémoire invalide
+            self._key = key
+
+        lower_query = clean_query.casefold()
+        while self._stack and not lower_query.startswith(self._stack[-1].query):
+            self._stack.pop()
+
+        if self._stack and self._stack[-1].query == lower_query:
+            return self._stack[-1].results
+
+        folded = self.engine.prepare_corpus(commands, generation)
+
+        exact_matches = exact_lookup(clean_query) if exact_lookup else None
+        if exact_matches is not None:
+            results = self.engine.rank(
+                lower_query, commands, folded, limit, exact_matches=exact_matches
+            )
+            exact_indices, scan_end = None, 0
+        else:
+            previous = self._stack[-1] if self._stack else None
+            if previous is not None and previous.exact_indices is not None:
+                exact_indices, scan_end = self.engine.find_exact(
+                    lower_query,
+                    folded,
+                    limit,
+                    candidates=previous.exact_indices,
+                    resume_from=previous.scan_end,
+                )
+            else:
+                exact_indices, scan_end = self.engine.find_exact(
+                    lower_query, folded, limit
+                )
+            results = self.engine.rank(
+                lower_query, commands, folded, limit, exact_indices=exact_indices
+            )
+
+        self._stack.append(_SessionEntry(lower_query, exact_indices, scan_end, results))
+        return results
+
 
 class FuzzyMatcher:
     """Matcher pour recherche floue uniquement (extension future)."""
@@ -0,0 +1,132 @@
+import os
+import threading
+from typing import Callable, Hashable, List, Optional, Tuple
+
+
+class SearchWorker:
+    """
+    Exécute les recherches dans un thread, hors de la boucle d'interaction.
+
+    Chaque requête reçoit un numéro de génération : seule la plus récente
+    compte. Une requête soumise pendant une recherche remplace celle en
+    attente (les intermédiaires ne sont jamais calculées) et le résultat
+    d'une recherche devenue obsolète est ignoré.
+
+    La fin d'une recherche est signalée sur un pipe (fileno()) pour que la
+    boucle puisse attendre clavier et résultat avec un seul select().
+    """
+
+    def __init__(self, search_fn: Callable[[Hashable], List[str]]):
+        """
+        Args:
+            search_fn: Fonction de recherche (requête → résultats) ; la
+                requête est opaque pour le worker (ex: (query, portée))
+        """
+        self._search_fn = search_fn
+        self._cond = threading.Condition()
+        self._generation = 0
+        self._pending: Optional[Tuple[int, Hashable]] = None
+        self._result: Optional[Tuple[int, Hashable, List[str]]] = None
+        self._error: Optional[BaseException] = None
+        self._busy = False
+        self._running = True
+
+        self._read_fd, self._write_fd = os.pipe()
+        os.set_blocking(self._read_fd, False)
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def fileno(self) -> int:
+        """Descripteur lisible quand un résultat est disponible."""
+        return self._read_fd
+
+    def submit(self, query: Hashable) -> int:
+        """
+        Demande une recherche (annule logiquement les précédentes).
+
+        Returns:
+            Génération de la requête
+        """
+        with self._cond:
+            self._generation += 1
+            self._pending = (self._generation, query)
+            self._cond.notify()
+            return self._generation
+
+    def take_result(self) -> Optional[Tuple[Hashable, List[str]]]:
+        """
+        Récupère le résultat de la dernière requête s'il est prêt.
+
+        Returns:
+            (requête, résultats) ou None (rien de prêt ou résultat obsolète)
+        """
+        self._drain_pipe()
+        with self._cond:
+            if self._error is not None:
+                error, self._error = self._error, None
+                raise error
+            result, self._result = self._result, None
+        if result is None or result[0] != self._generation:
+            return None
+        return result[1], result[2]
+
+    def wait_result(self) -> Optional[Tuple[Hashable, List[str]]]:
+        """Attend la fin de la dernière requête soumise et retourne son résultat."""
+        with self._cond:
+            while self._running and self._error is None and self._in_flight():
+                self._cond.wait()
+        return self.take_result()
+
+    def _in_flight(self) -> bool:
+        """Une requête est en attente ou en cours (appelé sous verrou)."""
+        return self._pending is not None or self._busy
+
+    def close(self) -> None:
+        """Arrête le thread (la recherche en cours finit en arrière-plan)."""
+        with self._cond:
+            self._running = False
+            self._cond.notify_all()
+        for fd in (self._read_fd, self._write_fd):
+            try:
+                os.close(fd)
+            except OSError:
+                pass
+
+    def _run(self) -> None:
+        """Boucle du thread : traite toujours la requête la plus récente."""
+        while True:
+            with self._cond:
+                while self._running and self._pending is None:
+                    self._cond.wait()
+                if not self._running:
+                    return
+                generation, query = self._pending  # type: ignore[misc]
+                self._pending = None
+                self._busy = True
+
+            try:
+                results = self._search_fn(query)
+                error = None
+            except Exception as e:  # Remonté dans la boucle principale
+                results, error = [], e
+
+            with self._cond:
+                self._busy = False
+                if not self._running:
+                    return  # Pipe fermé par close()
+                if error is not None:
+                    self._error = error
+                elif generation == self._generation:
+                    self._result = (generation, query, results)
+                else:
+                    continue  # Obsolète : la boucle n'est pas réveillée
+                self._cond.notify_all()
+                os.write(self._write_fd, b"\x00")
+
+    def _drain_pipe(self) -> None:
+        """Vide le pipe de notification (non bloquant)."""
+        try:
+            while os.read(self._read_fd, 4096):
+                pass
+        except OSError:  # BlockingIOError : pipe vide
+            pass
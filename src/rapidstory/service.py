@@ -0,0 +1,161 @@
+import threading
+import time
+from typing import List, Optional, Tuple
+
+from .utils import ConfigLoader
+from .database import HistoryManager
+from .search import SearchEngine, SearchSession, QueryParser
+from .recorder import CommandRecorder
+from .startup_profile import profiler
+from .perf_stats import PerfStats
+
+
+class SearchService:
+    """
+    Service de recherche local : historique + moteur de recherche.
+
+    Utilisé directement par les modes TTY (sans démon) ou maintenu
+    en mémoire par `rapidstory serve` pour répondre via socket Unix.
+    """
+
+    # Mesures gardées en mémoire avant écriture en base (démon)
+    PERF_FLUSH_SAMPLES = 256
+    # Le démon vérifie toutes les heures si un compactage est dû
+    MAINTENANCE_CHECK_INTERVAL = 3600
+
+    def __init__(self, config: ConfigLoader, watch: bool = False):
+        """
+        Args:
+            watch: Surveille l'historique après le chargement (démon) ;
+                inutile pour une session Ctrl+R de quelques secondes
+        """
+        self.config = config
+
+        self.history = HistoryManager(
+            db_path=config.get("DB_PATH"),
+            history_path=config.get("BASH_HISTORY_PATH"),
+            load_limit=config.get("HISTORY_LOAD_LIMIT"),
+            monitor_interval=config.get("MONITOR_INTERVAL"),
+            ranking=config.get("SEARCH_RANKING"),
+            recorder=CommandRecorder(
+                config.get("RECORD_SPOOL_PATH"), config.get("RECORD_BATCH_SIZE")
+            ),
+        )
+        profiler.mark("init DB")
+
+        query_parser = QueryParser(delimiter=config.get("SEARCH_MODE_DELIMITER"))
+        self.engine = SearchEngine(
+            threshold=config.get("FUZZY_SEARCH_THRESHOLD"),
+            query_parser=query_parser,
+            workers=config.get("FUZZY_WORKERS"),
+            parallel_min_size=config.get("FUZZY_PARALLEL_MIN_SIZE"),
+        )
+
+        # Latences du moteur (PERF_STATS), cumulées en base par lots
+        self.perf = PerfStats() if config.get("PERF_STATS") else None
+
+        # Le démon sert plusieurs clients en parallèle : une recherche à la fois
+        self._lock = threading.Lock()
+        self._session = self.create_session()
+
+        self.history.load_from_file()
+        profiler.mark("chargement historique")
+        self._stop_maintenance = threading.Event()
+        if watch:
+            self.history.start_watching()
+            threading.Thread(target=self._maintenance_loop, daemon=True).start()
+
+    def create_session(self) -> SearchSession:
+        """Crée une session de recherche incrémentale (une par client)."""
+        return SearchSession(self.engine)
+
+    def search(
+        self,
+        query: str,
+        limit: int,
+        session: Optional[SearchSession] = None,
+        scope: Optional[Tuple[str, str]] = None,
+    ) -> List[str]:
+        """
+        Recherche dans l'historique chargé.
+
+        Args:
+            query: Requête brute (peut contenir délimiteurs)
+            limit: Nombre maximum de résultats
+            session: Session du client (None = session locale par défaut)
+            scope: Filtre de portée (cf. ScopeResolver.filter), None = global
+
+        Returns:
+            Commandes triées par pertinence
+        """
+        session = session if session is not None else self._session
+        with self._lock:
+            start = time.perf_counter() if self.perf is not None else 0.0
+            if scope is not None:
+                # Corpus déjà restreint par la clé (cwd, commande) : scan direct
+                generation, commands = self.history.get_scoped_corpus(scope)
+                results = session.search(query, commands, limit, generation=generation)
+            else:
+                generation, commands = self.history.get_corpus()
+                results = session.search(
+                    query,
+                    commands,
+                    limit,
+                    generation=generation,
+                    exact_lookup=lambda text: self._sql_substring_matches(text, limit),
+                )
+
+            if self.perf is not None:
+                self.perf.record_since("scoring", start)
+                if self.perf.pending >= self.PERF_FLUSH_SAMPLES:
+                    self.perf.flush(self.history.db)  # Démon : pas de fin de session
+            return results
+
+    def flush_perf(self) -> None:
+        """Écrit en base les latences en attente."""
+        if self.perf is not None:
+            with self._lock:
+                self.perf.flush(self.history.db)
+
+    def record_selection(self, command: str) -> None:
+        """Enregistre la commande choisie (frecency)."""
+        with self._lock:
+            self.history.record_selection(command)
+
+    def _sql_substring_matches(self, text: str, limit: int) -> Optional[List[str]]:
+        """Sous-chaînes via l'index trigramme (None = scan Python du corpus)."""
+        if not self.config.get("SQL_SUBSTRING_SEARCH"):
+            return None
+        return self.history.db.search_substring(
+            text, limit, by_frecency=self.history.ranking == "frecency"
+        )
+
+    def schedule_compaction(self) -> None:
+        """
+        Fin de session : si un compactage est dû (COMPACT_INTERVAL_HOURS),
+        le lance dans un processus détaché. Une lecture de la base sinon.
+        """
+        from .maintenance import compaction_due, spawn_background_compaction
+
+        if compaction_due(self.history.db, self.config.get("COMPACT_INTERVAL_HOURS")):
+            spawn_background_compaction()
+
+    def _maintenance_loop(self) -> None:
+        """Démon : compactage d'arrière-plan dans le processus, si dû."""
+        from .maintenance import COMPACT_TASK, RetentionPolicy, compact_in_background
+
+        while not self._stop_maintenance.wait(self.MAINTENANCE_CHECK_INTERVAL):
+            interval = self.config.get("COMPACT_INTERVAL_HOURS") * 3600
+            db = self.history.db
+            if interval <= 0 or not db.claim_maintenance(COMPACT_TASK, interval):
+                continue
+            report = compact_in_background(db, RetentionPolicy.from_config(self.config))
+            if report is not None and report["removed"]:
+                self.history.cache.invalidate()
+
+    def close(self) -> None:
+        """Arrête la surveillance de l'historique et ferme la base."""
+        self._stop_maintenance.set()
+        self.flush_perf()
+        self.history.stop_watching()
+        self.history.db.close()
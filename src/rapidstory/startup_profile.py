@@ -0,0 +1,50 @@
+import sys
+import time
+from typing import List, Optional, TextIO, Tuple
+
+
+class StartupProfiler:
+    """
+    Chronométrage des phases de démarrage (`--profile-startup`).
+
+    Désactivé par défaut : mark() ne coûte alors qu'un test booléen.
+    """
+
+    def __init__(self):
+        self.enabled = False
+        self._origin = 0.0
+        self._last = 0.0
+        self._phases: List[Tuple[str, float]] = []
+
+    def start(self, origin: Optional[float] = None) -> None:
+        """
+        Active le profilage.
+
+        Args:
+            origin: Instant de départ (perf_counter), défaut : maintenant
+        """
+        self.enabled = True
+        self._origin = self._last = (
+            origin if origin is not None else time.perf_counter()
+        )
+
+    def mark(self, phase: str) -> None:
+        """Clôt une phase (durée depuis la phase précédente)."""
+        if not self.enabled:
+            return
+        now = time.perf_counter()
+        self._phases.append((phase, now - self._last))
+        self._last = now
+
+    def report(self, stream: Optional[TextIO] = None) -> None:
+        """Affiche les durées par phase (stderr : stdout est lu par bash)."""
+        if not self.enabled:
+            return
+        stream = stream or sys.stderr
+        for phase, elapsed in self._phases:
+            stream.write(f"{phase:<24}{elapsed * 1000:>9.1f} ms\n")
+        stream.write(f"{'total':<24}{(self._last - self._origin) * 1000:>9.1f} ms\n")
+
+
+# Instance du processus : les phases sont réparties entre plusieurs modules
+profiler = StartupProfiler()
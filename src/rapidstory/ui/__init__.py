@@ -1,11 +1,10 @@
 # Expose les classes et modules principaux pour imports simples
 # (from ui import FullModeUI, etc.)
 
-from .ui_full_mode import FullModeUI, FullModeDisplay
-from .ui_inline_mode import InlineModeUI, InlineModeDisplay
-from .colors import ColorFormatter
 from .ui_global import (
     KeyboardInput,
+    KeyDecoder,
+    is_escape_sequence,
     is_quit_key,
     is_navigation_up,
     is_navigation_down,
@@ -31,6 +30,8 @@ __all__ = [
     "InlineModeDisplay",
     "ColorFormatter",
     "KeyboardInput",
+    "KeyDecoder",
+    "is_escape_sequence",
     "is_quit_key",
     "is_navigation_up",
     "is_navigation_down",
@@ -48,3 +49,20 @@ __all__ = [
     "SEQ_ARROW_DOWN",
     "SEQ_CTRL_UP",
 ]
+
+# UI des modes chargées à la demande (un seul mode par exécution)
+_LAZY = {
+    "FullModeUI": ".ui_full_mode",
+    "FullModeDisplay": ".ui_full_mode",
+    "InlineModeUI": ".ui_inline_mode",
+    "InlineModeDisplay": ".ui_inline_mode",
+    "ColorFormatter": ".colors",
+}
+
+
+def __getattr__(name: str):
+    if name not in _LAZY:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    import importlib
+
+    return getattr(importlib.import_module(_LAZY[name], __name__), name)
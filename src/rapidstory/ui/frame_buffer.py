@@ -0,0 +1,83 @@
+from typing import Callable, List, Optional, Tuple
+
+# Une ligne = segments (colonne de départ, texte ANSI). Les segments d'une
+# ligne se suivent exactement : la largeur visible de l'un mène au suivant.
+Segment = Tuple[int, str]
+Row = List[Segment]
+
+CLEAR_LINE = "\033[K"  # Efface jusqu'à la fin de la ligne
+CLEAR_BELOW = "\033[J"  # Efface jusqu'à la fin de l'écran
+
+
+class FrameBuffer:
+    """
+    Mémorise la dernière frame et calcule la sortie minimale pour la suivante.
+
+    Seules les lignes modifiées sont réécrites ; dans une ligne de même
+    structure, seuls les segments modifiés (ex: numéro relatif). Le
+    positionnement du curseur est fourni par l'affichage : absolu en
+    plein écran, relatif au point d'origine en inline.
+    """
+
+    def __init__(self, move_to: Callable[[int, int], str]):
+        """
+        Args:
+            move_to: (ligne, colonne) → séquence de déplacement du curseur
+        """
+        self._move_to = move_to
+        self._rows: Optional[List[Row]] = None  # None : écran à redessiner
+        self.last_frame_bytes = 0
+
+    def invalidate(self) -> None:
+        """Force un rafraîchissement complet à la prochaine frame."""
+        self._rows = None
+
+    def render(self, rows: List[Row], clear: str = "") -> str:
+        """
+        Calcule la sortie faisant passer l'écran à `rows`.
+
+        Args:
+            rows: Nouvelle frame
+            clear: Séquence d'effacement pour un rafraîchissement complet
+
+        Returns:
+            Séquences ANSI à écrire ("" si rien n'a changé)
+        """
+        previous = self._rows
+        output = []
+        if previous is None:
+            output.append(clear)
+            previous = []
+
+        for index, row in enumerate(rows):
+            old = previous[index] if index < len(previous) else None
+            if old == row:
+                continue
+            if old is not None and [col for col, _ in old] == [col for col, _ in row]:
+                output.append(self._diff_segments(index, old, row))
+            else:
+                output.append(self._move_to(index, 0))
+                output.extend(text for _, text in row)
+                output.append(CLEAR_LINE)
+
+        if len(rows) < len(previous):
+            output.append(self._move_to(len(rows), 0))
+            output.append(CLEAR_BELOW)
+
+        self._rows = rows
+        frame = "".join(output)
+        self.last_frame_bytes = len(frame.encode("utf-8"))
+        return frame
+
+    def _diff_segments(self, index: int, old: Row, new: Row) -> str:
+        """Réécrit les segments modifiés d'une ligne de même structure."""
+        output = []
+        last = len(new) - 1
+        for position, ((col, text), (_, old_text)) in enumerate(zip(new, old)):
+            if text == old_text:
+                continue
+            output.append(self._move_to(index, col))
+            output.append(text)
+            if position == last:
+                output.append(CLEAR_LINE)  # Le dernier segment a pu raccourcir
+        return "".join(output)
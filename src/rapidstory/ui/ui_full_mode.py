@@ -1,8 +1,10 @@
 import sys
-from typing import List, Dict, Any, Optional
+import time
+from typing import List, Dict, Any, Optional, Tuple
 
 from .colors import ColorFormatter
-from .ui_global import KeyboardInput
+from .frame_buffer import FrameBuffer, Row
+from .ui_global import KeyboardInput, display_command
 
 
 class FullModeDisplay:
@@ -13,48 +15,54 @@ class FullModeDisplay:
     Ne gère AUCUNE logique métier, seulement le rendu visuel.
     """
 
-    def __init__(self, max_command_length: int, config: Dict[str, Any]):
+    def __init__(
+        self,
+        max_command_length: int,
+        config: Dict[str, Any],
+        perf=None,
+        colors: Optional[Dict[str, str]] = None,
+    ):
+        self.perf = perf  # PerfStats (None = pas de mesure)
         self.max_command_length = max_command_length
         self.config = config
+        self.colors = colors or {}  # Table précalculée (ConfigLoader.colors)
         self.tty_out = None
 
-        self.terminal_width = self._get_terminal_width()
+        self.terminal_width, self.terminal_height = self._get_terminal_size()
         self._prepare_colors()
 
-    def _get_terminal_width(self) -> int:
-        """Récupère la largeur du terminal pour l'affichage."""
+        # Adressage absolu : seules les lignes modifiées sont réécrites
+        self.frame = FrameBuffer(lambda row, col: f"\033[{row + 1};{col + 1}H")
+
+    def _get_terminal_size(self) -> Tuple[int, int]:
+        """Récupère la taille du terminal (colonnes, lignes) pour l'affichage."""
         try:
             import shutil
 
-            return shutil.get_terminal_size().columns
+            size = shutil.get_terminal_size()
+            return size.columns, size.lines
         except Exception:
-            return 80
+            return 80, 24
+
+    def _color(self, group: str) -> str:
+        """Séquence ANSI d'un groupe : table précalculée, sinon calculée."""
+        if group in self.colors:
+            return self.colors[group]
+        return ColorFormatter.format(
+            self.config.get(f"{group}_FG"),
+            self.config.get(f"{group}_BG"),
+            self.config.get(f"{group}_ATTR"),
+        )
 
     def _prepare_colors(self) -> None:
         """Prépare les codes ANSI à partir de la configuration."""
-        self.active_line_color = ColorFormatter.format(
-            self.config.get("FULL_ACTIVE_LINE_FG"),
-            self.config.get("FULL_ACTIVE_LINE_BG"),
-            self.config.get("FULL_ACTIVE_LINE_ATTR"),
-        )
+        self.active_line_color = self._color("FULL_ACTIVE_LINE")
 
-        self.normal_line_color = ColorFormatter.format(
-            self.config.get("FULL_NORMAL_LINE_FG"),
-            self.config.get("FULL_NORMAL_LINE_BG"),
-            self.config.get("FULL_NORMAL_LINE_ATTR"),
-        )
+        self.normal_line_color = self._color("FULL_NORMAL_LINE")
 
-        self.number_color = ColorFormatter.format(
-            self.config.get("FULL_NUMBER_FG"),
-            self.config.get("FULL_NUMBER_BG"),
-            self.config.get("FULL_NUMBER_ATTR"),
-        )
+        self.number_color = self._color("FULL_NUMBER")
 
-        self.indicator_color = ColorFormatter.format(
-            self.config.get("FULL_ACTIVE_INDICATOR_FG"),
-            self.config.get("FULL_ACTIVE_INDICATOR_BG"),
-            self.config.get("FULL_ACTIVE_INDICATOR_ATTR"),
-        )
+        self.indicator_color = self._color("FULL_ACTIVE_INDICATOR")
 
         self.indicator = self.config.get("FULL_ACTIVE_INDICATOR") or "→"
         self.reset = ColorFormatter.reset()
@@ -68,6 +76,7 @@ class FullModeDisplay:
             self.tty_out.flush()
         except IOError:
             self.tty_out = None
+        self.frame.invalidate()  # Nouvel écran : première frame complète
 
     def cleanup(self) -> None:
         """Restaure le terminal normal et affiche le curseur."""
@@ -79,7 +88,9 @@ class FullModeDisplay:
             self.tty_out.close()
             self.tty_out = None
 
-    def render(self, query: str, results: List[str], active_index: int) -> None:
+    def render(
+        self, query: str, results: List[str], active_index: int, scope_label: str = ""
+    ) -> None:
         """
         Affiche l'interface de recherche complète.
 
@@ -87,43 +98,55 @@ class FullModeDisplay:
             query: Texte de recherche actuel
             results: Liste des commandes trouvées
             active_index: Index de la ligne active (1-based)
+            scope_label: Portée active (vide = tout l'historique)
         """
-        output = self._build_display(query, results, active_index)
-
-        try:
-            if self.tty_out:
-                self.tty_out.write(output)
-                self.tty_out.flush()
-            else:
-                sys.stdout.write(output)
-                sys.stdout.flush()
-        except IOError:
-            pass
-
-    def _build_display(self, query: str, results: List[str], active_index: int) -> str:
+        start = time.perf_counter() if self.perf is not None else 0.0
+        rows = self._build_display(query, results, active_index, scope_label)
+        output = self.frame.render(rows, clear="\033[2J")
+        if self.perf is not None:
+            start = self.perf.record_since("build", start)
+
+        if output:
+            try:
+                if self.tty_out:
+                    self.tty_out.write(output)
+                    self.tty_out.flush()
+                else:
+                    sys.stdout.write(output)
+                    sys.stdout.flush()
+            except IOError:
+                pass
+
+        if self.perf is not None:
+            self.perf.record_since("write", start)
+
+    def _build_display(
+        self, query: str, results: List[str], active_index: int, scope_label: str = ""
+    ) -> List[Row]:
         """
-        Construit le contenu complet à afficher.
+        Construit la frame à afficher, limitée à la hauteur du terminal.
 
         Returns:
-            Chaîne ANSI formatée prête à afficher
+            Lignes (segments ANSI) pour le FrameBuffer
         """
-        lines = []
-
-        lines.append("\033[2J\033[H")  # Clear + home
-
-        lines.append(f"Recherche : {query}")
-        lines.append("-------------------")
+        header = f"Recherche : {query}"
+        if scope_label:
+            header += f"  [{scope_label}]"
+        rows = [
+            [(0, header[: self.terminal_width])],
+            [(0, "-------------------")],
+        ]
 
         if not results:
-            lines.append("Aucun résultat trouvé.")
+            rows.append([(0, "Aucun résultat trouvé.")])
         else:
-            for i, cmd in enumerate(results):
-                line = self._format_result_line(cmd, i + 1, active_index)
-                lines.append(line)
+            visible = max(0, self.terminal_height - len(rows))
+            for i, cmd in enumerate(results[:visible]):
+                rows.append(self._format_result_line(cmd, i + 1, active_index))
 
-        return "\n".join(lines)
+        return rows
 
-    def _format_result_line(self, command: str, index: int, active_index: int) -> str:
+    def _format_result_line(self, command: str, index: int, active_index: int) -> Row:
         """
         Formate une ligne de résultat avec colonnes fixes.
 
@@ -135,10 +158,20 @@ class FullModeDisplay:
             active_index: Position de la ligne active
 
         Returns:
-            Ligne formatée avec codes ANSI
+            Ligne en deux segments : numéro (colonne 0), puis le reste (colonne 2).
+            Un déplacement de la ligne active ne réécrit que les numéros des
+            autres lignes.
         """
-        display_cmd = command[: self.max_command_length]
-        if len(command) > self.max_command_length:
+        indicator_width = len(self.indicator) + 1
+
+        # Jamais de retour à la ligne : l'adressage absolu suppose 1 ligne = 1 rangée
+        max_len = min(
+            self.max_command_length, self.terminal_width - 3 - indicator_width - 3
+        )
+        max_len = max(0, max_len)
+        command = display_command(command)
+        display_cmd = command[:max_len]
+        if len(command) > max_len:
             display_cmd += "..."
 
         rel_pos = index - active_index + 1
@@ -148,8 +181,6 @@ class FullModeDisplay:
         else:
             col_number = "  "
 
-        indicator_width = len(self.indicator) + 1
-
         if index == active_index:
             col_indicator = f"{self.indicator_color}{self.indicator}{self.reset} "
         else:
@@ -160,7 +191,7 @@ class FullModeDisplay:
         else:
             col_command = f"{self.normal_line_color}{display_cmd}{self.reset}"
 
-        return f"{col_number} {col_indicator}{col_command}"
+        return [(0, col_number), (2, f" {col_indicator}{col_command}")]
 
 
 class FullModeUI:
@@ -171,9 +202,15 @@ class FullModeUI:
     Principe de séparation : UI ≠ logique métier.
     """
 
-    def __init__(self, max_command_length: int, config: Dict[str, Any]):
-        self.display = FullModeDisplay(max_command_length, config)
-        self.keyboard = KeyboardInput()
+    def __init__(
+        self,
+        max_command_length: int,
+        config: Dict[str, Any],
+        perf=None,
+        colors: Optional[Dict[str, str]] = None,
+    ):
+        self.display = FullModeDisplay(max_command_length, config, perf, colors)
+        self.keyboard = KeyboardInput(config.get("ESCAPE_TIMEOUT"))
 
     def setup(self) -> None:
         """Configure l'UI (keyboard + display)."""
@@ -185,22 +222,32 @@ class FullModeUI:
         self.keyboard.cleanup()
         self.display.cleanup()
 
-    def render(self, query: str, results: List[str], active_index: int) -> None:
+    def render(
+        self, query: str, results: List[str], active_index: int, scope_label: str = ""
+    ) -> None:
         """Délègue l'affichage au display."""
-        self.display.render(query, results, active_index)
+        self.display.render(query, results, active_index, scope_label)
+
+    def read_keys(self) -> List[str]:
+        """Attend et retourne toutes les touches disponibles (un lot)."""
+        return self.keyboard.read_keys()
+
+    def has_pending_input(self) -> bool:
+        """Des touches attendent-elles déjà (saisie rapide, collage) ?"""
+        return self.keyboard.has_pending_input()
 
-    def wait_for_input(self) -> str:
-        """Attend une touche de l'utilisateur."""
-        return self.keyboard.read_key()
+    def wait_for_input_or(self, fds: List[int]) -> bool:
+        """Attend une touche ou un autre événement (fin de recherche)."""
+        return self.keyboard.wait_for_input_or(fds)
 
-    def handle_escape(self) -> Optional[str]:
+    def handle_escape(self, key: str) -> Optional[str]:
         """
-        Gère la touche Échap et lit la séquence complète.
+        Filtre une séquence d'échappement lue par read_keys().
 
         Returns:
-            Séquence ANSI ou None
+            Séquence ANSI sans ESC (ex: '[A') ou None
         """
-        seq = self.keyboard.read_escape_sequence()
+        seq = key[1:]
         if seq in ("[A", "[B"):
             return seq
         return None
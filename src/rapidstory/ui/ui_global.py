@@ -2,12 +2,14 @@ import sys
 import tty
 import termios
 import os
-import fcntl
-from typing import Optional
+import codecs
+import select
+from typing import List
 
 
 KEY_CTRL_C = "\x03"
 KEY_CTRL_D = "\x04"
+KEY_CTRL_G = "\x07"
 KEY_CTRL_R = "\x12"
 KEY_ESC = "\x1b"
 KEY_ENTER = "\n"
@@ -17,17 +19,109 @@ SEQ_ARROW_UP = "[A"
 SEQ_ARROW_DOWN = "[B"
 SEQ_CTRL_UP = "[1;5A"
 
+# Affichage d'une commande sur une seule rangée (multi-lignes importées :
+# heredocs, zsh/fish) ; la commande sélectionnée reste intacte
+DISPLAY_ESCAPES = str.maketrans({"\n": "⏎", "\r": None, "\t": " "})
+
+
+class KeyDecoder:
+    """
+    Machine à états : texte saisi → touches.
+
+    Une touche est un caractère ou une séquence d'échappement complète
+    (ESC inclus : '\\x1b[A', '\\x1b[1;5A', '\\x1bx' pour Alt+x). Une
+    séquence coupée entre deux lectures reste en attente (pending) ;
+    flush() la livre telle quelle (ESC seul = touche Échap).
+    """
+
+    GROUND, ESCAPE, CSI, SS3 = range(4)
+
+    # Flèches en mode curseur "application" (ESC O A) → forme CSI
+    SS3_ALIASES = {"\x1bOA": KEY_ESC + SEQ_ARROW_UP, "\x1bOB": KEY_ESC + SEQ_ARROW_DOWN}
+
+    def __init__(self):
+        self.state = self.GROUND
+        self._sequence = ""
+
+    @property
+    def pending(self) -> bool:
+        """Une séquence d'échappement est-elle incomplète ?"""
+        return self.state != self.GROUND
+
+    def feed(self, text: str) -> List[str]:
+        """Décode un bloc de texte ; retourne les touches complètes."""
+        keys: List[str] = []
+        for char in text:
+            self._feed_char(char, keys)
+        return keys
+
+    def flush(self) -> List[str]:
+        """Délai écoulé : livre la séquence incomplète en l'état."""
+        keys = [self._sequence] if self.pending else []
+        self.state, self._sequence = self.GROUND, ""
+        return keys
+
+    def _feed_char(self, char: str, keys: List[str]) -> None:
+        state = self.state
+
+        if state == self.GROUND:
+            if char == KEY_ESC:
+                self.state, self._sequence = self.ESCAPE, char
+            else:
+                keys.append(char)
+
+        elif state == self.ESCAPE:
+            if char == "[":
+                self.state, self._sequence = self.CSI, self._sequence + char
+            elif char == "O":
+                self.state, self._sequence = self.SS3, self._sequence + char
+            elif char == KEY_ESC:
+                keys.append(KEY_ESC)  # Échap seul suivi d'une autre séquence
+            else:
+                keys.append(self._sequence + char)  # Alt+touche
+                self.state = self.GROUND
+
+        elif state == self.CSI:
+            if "\x40" <= char <= "\x7e":  # Octet final
+                keys.append(self._sequence + char)
+                self.state = self.GROUND
+            elif "\x20" <= char <= "\x3f":  # Paramètres / intermédiaires
+                self._sequence += char
+            else:
+                # Séquence malformée : livrée telle quelle, char retraité
+                keys.append(self._sequence)
+                self.state = self.GROUND
+                self._feed_char(char, keys)
+
+        else:  # SS3 : un seul caractère final
+            sequence = self._sequence + char
+            keys.append(self.SS3_ALIASES.get(sequence, sequence))
+            self.state = self.GROUND
+
 
 class KeyboardInput:
     """
     Gère la lecture brute des entrées clavier en mode cbreak.
 
     Responsabilité unique : capture des touches sans interprétation.
+    Lecture par os.read de tout ce qui est disponible : une rafale
+    (collage, saisie rapide) est livrée en un seul lot.
     """
 
-    def __init__(self):
+    def __init__(self, escape_timeout: float = 0.05):
+        """
+        Args:
+            escape_timeout: Attente max (secondes) de la fin d'une séquence
+                d'échappement avant de la considérer complète (ESC seul)
+        """
         self.fd = sys.stdin.fileno()
         self.old_settings = None
+        self.escape_timeout = escape_timeout
+        # Lecture directe du fd (pas de tampon caché de sys.stdin) :
+        # select() reflète alors exactement ce qui reste à lire
+        self._utf8 = codecs.getincrementaldecoder("utf-8")(errors="replace")
+        self._decoder = KeyDecoder()
+        self._keys: List[str] = []
 
     def setup(self) -> None:
         """Active le mode cbreak (lecture caractère par caractère)."""
@@ -39,35 +133,61 @@ class KeyboardInput:
         if self.old_settings:
             termios.tcsetattr(self.fd, termios.TCSADRAIN, self.old_settings)
 
-    def read_key(self) -> str:
+    def _ready(self, timeout: float) -> bool:
+        """Des octets sont-ils lisibles sur le fd (attente max `timeout`) ?"""
+        return bool(select.select([self.fd], [], [], timeout)[0])
+
+    def _read(self) -> None:
+        """Lit un bloc d'octets et décode les touches complètes."""
+        data = os.read(self.fd, 4096)
+        if not data:
+            raise EOFError
+        self._keys.extend(self._decoder.feed(self._utf8.decode(data)))
+
+    def read_keys(self) -> List[str]:
         """
-        Lit un seul caractère depuis stdin.
+        Lit toutes les touches disponibles (bloque jusqu'à la première).
 
         Returns:
-            Caractère lu (ex: 'a', '\n', '\x1b')
+            Touches dans l'ordre de frappe (caractères ou séquences
+            d'échappement complètes, ex: 'a', '\\x1b[A', '\\x1b')
         """
-        return sys.stdin.read(1)
-
-    def read_escape_sequence(self) -> Optional[str]:
+        while not self._keys:
+            self._read()
+            while self._ready(0):
+                self._read()
+            # Séquence coupée : la suite arrive en général dans la foulée
+            while self._decoder.pending:
+                if self._ready(self.escape_timeout):
+                    self._read()
+                else:
+                    self._keys.extend(self._decoder.flush())
+
+        keys, self._keys = self._keys, []
+        return keys
+
+    def has_pending_input(self) -> bool:
+        """Vérifie (sans bloquer) si des touches attendent d'être lues."""
+        if self._keys:
+            return True
+        return self._ready(0)
+
+    def wait_for_input_or(self, fds: List[int]) -> bool:
         """
-        Lit une séquence d'échappement ANSI.
+        Attend qu'une touche OU un des descripteurs fournis soit prêt.
 
         Returns:
-            Séquence lue (ex: '[A', '[1;5A') ou None
+            True si une touche est disponible, False sinon
         """
-        try:
-            flags = fcntl.fcntl(self.fd, fcntl.F_GETFL)
-            fcntl.fcntl(self.fd, fcntl.F_SETFL, flags | os.O_NONBLOCK)
+        if self._keys:
+            return True
+        ready = select.select([self.fd, *fds], [], [])[0]
+        return self.fd in ready
 
-            try:
-                # Lit jusqu'à 6 caractères pour Ctrl+Up/Down
-                seq = sys.stdin.read(6)
-                return seq.rstrip("\x00") if seq else None
-            finally:
-                fcntl.fcntl(self.fd, fcntl.F_SETFL, flags)
 
-        except (IOError, OSError):
-            return None
+def is_escape_sequence(key: str) -> bool:
+    """Vérifie si c'est Échap ou une séquence d'échappement."""
+    return key.startswith(KEY_ESC)
 
 
 def is_quit_key(key: str) -> bool:
@@ -98,3 +218,8 @@ def is_backspace(key: str) -> bool:
 def is_digit_selection(key: str) -> bool:
     """Vérifie si c'est un chiffre 1-9 (sélection de commande)."""
     return key.isdigit() and key != "0"
+
+
+def display_command(command: str) -> str:
+    """Commande sur une rangée : retours à la ligne en ⏎, tabulations en espace."""
+    return command.translate(DISPLAY_ESCAPES)
@@ -1,9 +1,10 @@
 import sys
-import shutil
+import time
 from typing import List, Dict, Any, Optional
 
 from .colors import ColorFormatter
-from .ui_global import KeyboardInput
+from .frame_buffer import FrameBuffer, Row
+from .ui_global import KeyboardInput, display_command
 
 
 class InlineModeDisplay:
@@ -14,64 +15,92 @@ class InlineModeDisplay:
     Aucune logique métier, uniquement du formatage visuel.
     """
 
-    def __init__(self, suggestions_limit: int, config: Dict[str, Any]):
+    def __init__(
+        self,
+        suggestions_limit: int,
+        config: Dict[str, Any],
+        perf=None,
+        colors: Optional[Dict[str, str]] = None,
+    ):
+        self.perf = perf  # PerfStats (None = pas de mesure)
         self.suggestions_limit = min(suggestions_limit, 9)
         self.config = config
+        self.colors = colors or {}  # Table précalculée (ConfigLoader.colors)
         self.tty_out = None
 
         self.terminal_width = self._get_terminal_width()
         self._prepare_colors()
 
+        # Libellé + commande courante + suggestions
+        self.max_rows = 2 + self.suggestions_limit
+        self.frame = FrameBuffer(self._move_to)
+
+    @staticmethod
+    def _move_to(row: int, col: int) -> str:
+        """
+        Déplacement relatif au point d'origine (sauvegardé par \\033[s).
+
+        La ligne 0 commence à la colonne d'origine (après le prompt),
+        les suivantes en colonne 0.
+        """
+        output = "\033[u"
+        if row:
+            output += f"\033[{row}B\r"
+        if col:
+            output += f"\033[{col}C"
+        return output
+
     def _get_terminal_width(self) -> int:
         """Récupère la largeur du terminal pour tronquer cmds."""
         try:
+            import shutil
+
             return shutil.get_terminal_size().columns
         except Exception:
             return 80
 
+    def _color(self, group: str) -> str:
+        """Séquence ANSI d'un groupe : table précalculée, sinon calculée."""
+        if group in self.colors:
+            return self.colors[group]
+        return ColorFormatter.format(
+            self.config.get(f"{group}_FG"),
+            self.config.get(f"{group}_BG"),
+            self.config.get(f"{group}_ATTR"),
+        )
+
     def _prepare_colors(self) -> None:
         """Prépare les codes ANSI depuis la configuration."""
-        self.current_color = ColorFormatter.format(
-            self.config.get("INLINE_CURRENT_FG"),
-            self.config.get("INLINE_CURRENT_BG"),
-            self.config.get("INLINE_CURRENT_ATTR"),
-        )
+        self.current_color = self._color("INLINE_CURRENT")
 
-        self.indicator_color = ColorFormatter.format(
-            self.config.get("INLINE_CURRENT_INDICATOR_FG"),
-            self.config.get("INLINE_CURRENT_INDICATOR_BG"),
-            self.config.get("INLINE_CURRENT_INDICATOR_ATTR"),
-        )
+        self.indicator_color = self._color("INLINE_CURRENT_INDICATOR")
 
         self.indicator = self.config.get("INLINE_CURRENT_INDICATOR") or "→"
 
-        self.suggestion_color = ColorFormatter.format(
-            self.config.get("INLINE_SUGGESTION_FG"),
-            self.config.get("INLINE_SUGGESTION_BG"),
-            self.config.get("INLINE_SUGGESTION_ATTR"),
-        )
+        self.suggestion_color = self._color("INLINE_SUGGESTION")
 
-        self.number_color = ColorFormatter.format(
-            self.config.get("INLINE_NUMBER_FG"),
-            self.config.get("INLINE_NUMBER_BG"),
-            self.config.get("INLINE_NUMBER_ATTR"),
-        )
+        self.number_color = self._color("INLINE_NUMBER")
 
-        self.search_label_color = ColorFormatter.format(
-            self.config.get("INLINE_SEARCH_LABEL_FG"),
-            self.config.get("INLINE_SEARCH_LABEL_BG"),
-            self.config.get("INLINE_SEARCH_LABEL_ATTR"),
-        )
+        self.search_label_color = self._color("INLINE_SEARCH_LABEL")
 
         self.reset = ColorFormatter.reset()
 
     def setup(self) -> None:
-        """Ouvre le terminal pour écriture directe."""
+        """
+        Ouvre le terminal et réserve la hauteur maximale sous le curseur.
+
+        Les lignes ajoutées font défiler l'écran si besoin : l'origine
+        sauvegardée reste valable pour toutes les frames suivantes.
+        """
         try:
             self.tty_out = open("/dev/tty", "w")
         except IOError:
             self.tty_out = None
 
+        reserve = self.max_rows - 1
+        self._write("\033D" * reserve + f"\033[{reserve}A\033[s")
+        self.frame.invalidate()
+
     def cleanup(self) -> None:
         """Efface l'affichage et ferme le terminal."""
         if self.tty_out:
@@ -83,7 +112,9 @@ class InlineModeDisplay:
             sys.stdout.write("\033[J")
             sys.stdout.flush()
 
-    def render(self, query: str, current: str, suggestions: List[str]) -> None:
+    def render(
+        self, query: str, current: str, suggestions: List[str], scope_label: str = ""
+    ) -> None:
         """
         Affiche la recherche inline.
 
@@ -91,9 +122,22 @@ class InlineModeDisplay:
             query: Texte de recherche (affiché en haut)
             current: Commande courante (ligne 1)
             suggestions: Liste des suggestions suivantes
+            scope_label: Portée active (vide = tout l'historique)
         """
-        output = self._build_display(query, current, suggestions)
+        start = time.perf_counter() if self.perf is not None else 0.0
+        rows = self._build_display(query, current, suggestions, scope_label)
+        output = self.frame.render(rows, clear="\033[u\033[J")
+        if self.perf is not None:
+            start = self.perf.record_since("build", start)
+
+        if output:
+            self._write(output + "\033[u")  # Curseur ramené à l'origine
 
+        if self.perf is not None:
+            self.perf.record_since("write", start)
+
+    def _write(self, output: str) -> None:
+        """Écrit sur le terminal (stdout à défaut)."""
         try:
             if self.tty_out:
                 self.tty_out.write(output)
@@ -104,22 +148,27 @@ class InlineModeDisplay:
         except IOError:
             pass
 
-    def _build_display(self, query: str, current: str, suggestions: List[str]) -> str:
+    def _build_display(
+        self, query: str, current: str, suggestions: List[str], scope_label: str = ""
+    ) -> List[Row]:
         """
-        Construit l'affichage inline complet.
+        Construit la frame inline.
 
         Gère deux positions : top (suggestions au-dessus) ou bottom (en-dessous).
 
         Returns:
-            Chaîne ANSI formatée
+            Lignes (segments ANSI) pour le FrameBuffer
         """
-        output = []
-
-        output.append("\033[s\033[2J")  # Save + full clear pour éviter wrapping
+        output: List[Row] = []
 
+        labels = []
         if query:
+            labels.append(f"[Recherche: {query}]")
+        if scope_label:
+            labels.append(f"[{scope_label}]")
+        if labels:
             output.append(
-                f"{self.search_label_color}[Recherche: {query}]{self.reset}\n"
+                [(0, f"{self.search_label_color}{' '.join(labels)}{self.reset}")]
             )
 
         indicator_width = len(self.indicator) + 1
@@ -141,12 +190,11 @@ class InlineModeDisplay:
                 )
             )
 
-        output.append("\033[u")  # Restaure position curseur
-
-        return "".join(output)
+        return output
 
     def _truncate_cmd(self, cmd: str, max_len: int) -> str:
-        """Tronque une commande pour éviter wrapping."""
+        """Tronque une commande pour éviter wrapping (une seule rangée)."""
+        cmd = display_command(cmd)
         if len(cmd) <= max_len:
             return cmd
         return f"{cmd[: max_len - 3]}..."
@@ -157,7 +205,7 @@ class InlineModeDisplay:
         suggestions: List[str],
         indicator_width: int,
         max_cmd_len: int,
-    ) -> List[str]:
+    ) -> List[Row]:
         """
         Layout top : suggestions au-dessus de la commande actuelle.
 
@@ -173,13 +221,13 @@ class InlineModeDisplay:
             col_number = f"{self.number_color}{num}.{self.reset}"
             col_indicator = " " * indicator_width
             col_cmd = f"{self.suggestion_color}{self._truncate_cmd(cmd, max_cmd_len)}{self.reset}"
-            lines.append(f"{col_number} {col_indicator}{col_cmd}\n")
+            lines.append([(0, col_number), (2, f" {col_indicator}{col_cmd}")])
 
         if current:
             col_number = f"{self.number_color}1.{self.reset}"
             col_indicator = f"{self.indicator_color}{self.indicator}{self.reset} "
             col_cmd = f"{self.current_color}{self._truncate_cmd(current, max_cmd_len)}{self.reset}"
-            lines.append(f"{col_number} {col_indicator}{col_cmd}\n")
+            lines.append([(0, col_number), (2, f" {col_indicator}{col_cmd}")])
 
         return lines
 
@@ -189,7 +237,7 @@ class InlineModeDisplay:
         suggestions: List[str],
         indicator_width: int,
         max_cmd_len: int,
-    ) -> List[str]:
+    ) -> List[Row]:
         """
         Layout bottom : commande actuelle puis suggestions en-dessous.
 
@@ -201,13 +249,13 @@ class InlineModeDisplay:
             col_number = f"{self.number_color}1.{self.reset}"
             col_indicator = f"{self.indicator_color}{self.indicator}{self.reset} "
             col_cmd = f"{self.current_color}{self._truncate_cmd(current, max_cmd_len)}{self.reset}"
-            lines.append(f"{col_number} {col_indicator}{col_cmd}\n")
+            lines.append([(0, col_number), (2, f" {col_indicator}{col_cmd}")])
 
         for i, cmd in enumerate(suggestions[: self.suggestions_limit], 2):
             col_number = f"{self.number_color}{i}.{self.reset}"
             col_indicator = " " * indicator_width
             col_cmd = f"{self.suggestion_color}{self._truncate_cmd(cmd, max_cmd_len)}{self.reset}"
-            lines.append(f"{col_number} {col_indicator}{col_cmd}\n")
+            lines.append([(0, col_number), (2, f" {col_indicator}{col_cmd}")])
 
         return lines
 
@@ -219,9 +267,15 @@ class InlineModeUI:
     Orchestration : coordonne display + keyboard pour mode compact.
     """
 
-    def __init__(self, suggestions_limit: int, config: Dict[str, Any]):
-        self.display = InlineModeDisplay(suggestions_limit, config)
-        self.keyboard = KeyboardInput()
+    def __init__(
+        self,
+        suggestions_limit: int,
+        config: Dict[str, Any],
+        perf=None,
+        colors: Optional[Dict[str, str]] = None,
+    ):
+        self.display = InlineModeDisplay(suggestions_limit, config, perf, colors)
+        self.keyboard = KeyboardInput(config.get("ESCAPE_TIMEOUT"))
 
     def setup(self) -> None:
         """Configure l'UI (keyboard + display)."""
@@ -233,22 +287,32 @@ class InlineModeUI:
         self.keyboard.cleanup()
         self.display.cleanup()
 
-    def render(self, query: str, current: str, suggestions: List[str]) -> None:
+    def render(
+        self, query: str, current: str, suggestions: List[str], scope_label: str = ""
+    ) -> None:
         """Délègue l'affichage au display."""
-        self.display.render(query, current, suggestions)
+        self.display.render(query, current, suggestions, scope_label)
+
+    def read_keys(self) -> List[str]:
+        """Attend et retourne toutes les touches disponibles (un lot)."""
+        return self.keyboard.read_keys()
+
+    def has_pending_input(self) -> bool:
+        """Des touches attendent-elles déjà (saisie rapide, collage) ?"""
+        return self.keyboard.has_pending_input()
 
-    def wait_for_input(self) -> str:
-        """Attend une touche de l'utilisateur."""
-        return self.keyboard.read_key()
+    def wait_for_input_or(self, fds: List[int]) -> bool:
+        """Attend une touche ou un autre événement (fin de recherche)."""
+        return self.keyboard.wait_for_input_or(fds)
 
-    def handle_escape(self) -> Optional[str]:
+    def handle_escape(self, key: str) -> Optional[str]:
         """
-        Gère la touche Échap et lit la séquence.
+        Filtre une séquence d'échappement lue par read_keys().
 
         Returns:
-            Séquence ANSI ou None
+            Séquence ANSI sans ESC ou None
         """
-        seq = self.keyboard.read_escape_sequence()
+        seq = key[1:]
         if seq in ("[A", "[B", "[1;5A"):
             return seq
         return None
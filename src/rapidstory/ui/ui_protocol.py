@@ -1,4 +1,4 @@
-from typing import Protocol, Optional
+from typing import List, Protocol, Optional
 
 
 class UIProtocol(Protocol):
@@ -20,10 +20,18 @@ class UIProtocol(Protocol):
         """Affiche l'interface."""
         ...
 
-    def wait_for_input(self) -> str:
-        """Attend une touche utilisateur."""
+    def read_keys(self) -> List[str]:
+        """Attend les touches utilisateur (toutes celles disponibles)."""
         ...
 
-    def handle_escape(self) -> Optional[str]:
-        """Gère la séquence d'échappement."""
+    def has_pending_input(self) -> bool:
+        """Vérifie si des touches attendent (sans bloquer)."""
+        ...
+
+    def wait_for_input_or(self, fds: List[int]) -> bool:
+        """Attend une touche ou un descripteur prêt (True = touche)."""
+        ...
+
+    def handle_escape(self, key: str) -> Optional[str]:
+        """Filtre une séquence d'échappement (None = non gérée)."""
         ...
@@ -1,6 +1,23 @@
+import marshal
 import os
 import re
-from typing import Dict, Any
+from typing import Dict, Any, Optional, Tuple
+
+# Groupes de couleurs (préfixes de *_FG / *_BG / *_ATTR) précalculés
+COLOR_GROUPS = [
+    "FULL_ACTIVE_INDICATOR",
+    "FULL_ACTIVE_LINE",
+    "FULL_NORMAL_LINE",
+    "FULL_NUMBER",
+    "INLINE_CURRENT_INDICATOR",
+    "INLINE_CURRENT",
+    "INLINE_SUGGESTION",
+    "INLINE_NUMBER",
+    "INLINE_SEARCH_LABEL",
+]
+
+# Format du cache (à incrémenter si son contenu change)
+CONFIG_CACHE_VERSION = 1
 
 
 class ConfigLoader:
@@ -9,10 +26,17 @@ class ConfigLoader:
 
     Lit config.py et fusionne avec les valeurs par défaut.
     Responsabilité unique : gestion centralisée de la configuration.
+
+    Le résultat (valeurs + séquences ANSI des couleurs) est mis en cache
+    dans config.cache, à côté de config.py : exec() n'a lieu que si le
+    fichier a changé (mtime, taille).
     """
 
     def __init__(self, config_path: str = "~/.local/share/rapidstory/config.py"):
         self.config_path = os.path.expanduser(config_path)
+        self.cache_path = os.path.join(
+            os.path.dirname(self.config_path), "config.cache"
+        )
         self.defaults = {
             "DISPLAY_LIMIT": 20,
             "HISTORY_LOAD_LIMIT": 1000,
@@ -23,7 +47,22 @@ class ConfigLoader:
             "DB_PATH": "~/.local/share/rapidstory/rapidstory.db",
             "BASH_HISTORY_PATH": "~/.bash_history",
             "FUZZY_SEARCH_THRESHOLD": 0.5,
+            "FUZZY_WORKERS": -1,
+            "FUZZY_PARALLEL_MIN_SIZE": 50000,
             "SEARCH_MODE_DELIMITER": "'",
+            "SQL_SUBSTRING_SEARCH": True,
+            "SEARCH_RANKING": "frecency",
+            "DAEMON_SOCKET_PATH": "~/.local/share/rapidstory/rapidstory.sock",
+            "DAEMON_TIMEOUT": 2.0,
+            "RECORD_SPOOL_PATH": "~/.local/share/rapidstory/record.spool",
+            "RECORD_BATCH_SIZE": 32,
+            "PERF_STATS": False,
+            "ESCAPE_TIMEOUT": 0.05,
+            "RETENTION_MAX_ROWS": 0,
+            "RETENTION_MAX_AGE_DAYS": 0,
+            "RETENTION_MIN_USES": 0,
+            "RETENTION_KEEP_PINNED": True,
+            "COMPACT_INTERVAL_HOURS": 24,
             "EXECUTE_DIRECTLY_FULL_MODE": True,
             "MAX_COMMAND_DISPLAY_LENGTH": 80,
             "FULL_EXTEND_BACKGROUND": True,
@@ -64,26 +103,108 @@ class ConfigLoader:
             "INLINE_SEARCH_LABEL_ATTR": None,
         }
         self.config = self.defaults.copy()
+        # Séquences ANSI par groupe (cf. COLOR_GROUPS), calculées à la demande
+        self._colors: Optional[Dict[str, str]] = None
         self._load()
 
     def _load(self) -> None:
-        """Charge la configuration depuis le fichier Python."""
-        if not os.path.exists(self.config_path):
+        """Charge la configuration : cache si à jour, sinon exec de config.py."""
+        try:
+            stat = os.stat(self.config_path)
+        except OSError:
             return
 
+        key = (stat.st_mtime_ns, stat.st_size)
+        if self._load_cache(key):
+            return
+
+        overrides = self._exec_config()
+        if overrides is None:
+            return  # Fichier invalide : valeurs par défaut, pas de cache
+        self.config.update(overrides)
+        self._save_cache(key, overrides)
+
+    def _exec_config(self) -> Optional[Dict[str, Any]]:
+        """
+        Exécute config.py.
+
+        Returns:
+            Valeurs définies par l'utilisateur (clés connues), None si erreur
+        """
         try:
             with open(self.config_path, "r", encoding="utf-8") as f:
                 code = compile(f.read(), self.config_path, "exec")
-                namespace = {}
-                exec(code, namespace)
+            namespace = {}
+            exec(code, namespace)
+        except Exception:
+            return None
+        return {key: namespace[key] for key in self.defaults if key in namespace}
 
-                for key in self.defaults:
-                    if key in namespace:
-                        self.config[key] = namespace[key]
+    def _build_colors(self) -> Dict[str, str]:
+        """Calcule les séquences ANSI de chaque groupe de couleurs."""
+        from .ui.colors import ColorFormatter
 
-        except Exception:
+        return {
+            group: ColorFormatter.format(
+                self.config.get(f"{group}_FG"),
+                self.config.get(f"{group}_BG"),
+                self.config.get(f"{group}_ATTR"),
+            )
+            for group in COLOR_GROUPS
+        }
+
+    def _load_cache(self, key: Tuple[int, int]) -> bool:
+        """
+        Applique le cache s'il correspond à config.py et aux défauts actuels.
+
+        Returns:
+            True si la configuration a été chargée depuis le cache
+        """
+        try:
+            with open(self.cache_path, "rb") as f:
+                cached = marshal.loads(f.read())
+            if (
+                cached["version"] != CONFIG_CACHE_VERSION
+                or cached["key"] != key
+                or cached["defaults"] != self.defaults
+            ):
+                return False
+            self.config.update(cached["overrides"])
+            self._colors = cached["colors"]
+            return True
+        except (OSError, EOFError, ValueError, TypeError, KeyError):
+            return False
+
+    def _save_cache(self, key: Tuple[int, int], overrides: Dict[str, Any]) -> None:
+        """Écrit le cache (atomique) ; ignoré si valeurs non sérialisables."""
+        try:
+            data = marshal.dumps(
+                {
+                    "version": CONFIG_CACHE_VERSION,
+                    "key": key,
+                    "defaults": self.defaults,
+                    "overrides": overrides,
+                    "colors": self.colors,
+                }
+            )
+            tmp_path = f"{self.cache_path}.{os.getpid()}"
+            with open(tmp_path, "wb") as f:
+                f.write(data)
+            os.replace(tmp_path, self.cache_path)
+        except (OSError, ValueError):
             pass
 
+    @property
+    def colors(self) -> Dict[str, str]:
+        """Table des séquences ANSI par groupe de couleurs."""
+        if self._colors is None:
+            self._colors = self._build_colors()
+        return self._colors
+
+    def color(self, group: str) -> str:
+        """Séquence ANSI précalculée d'un groupe de couleurs (ex: "FULL_NUMBER")."""
+        return self.colors.get(group, "")
+
     def get(self, key: str) -> Any:
         """Récupère une valeur de configuration."""
         return self.config.get(key, self.defaults.get(key))